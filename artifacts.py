@@ -0,0 +1,205 @@
+import hashlib
+import json
+import os
+import struct
+import sys
+import threading
+import time
+
+import numpy as np
+
+from preprocessing import CAT_COLS, PreprocessPlan
+from tree_engine import CompiledForest
+
+MODEL_FILE = "lightgbm_model.txt"
+ENCODER_FILE = "encoder.pkl"
+SCALER_FILE = "scaler.pkl"
+ARTIFACT_FILES = (MODEL_FILE, ENCODER_FILE, SCALER_FILE)
+BUNDLE_FILE = "model_bundle.bin"
+BUNDLE_FORMAT = 2
+MAGIC = b"SALESMB\x00"
+
+
+# Content hash of the source artifacts, stored in the bundle to detect stale builds
+def fingerprint(paths=ARTIFACT_FILES):
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+# Parse the text model and unpickle encoder/scaler (the slow path: imports lightgbm and scikit-learn)
+def compile_artifacts(model_file=MODEL_FILE, encoder_file=ENCODER_FILE, scaler_file=SCALER_FILE):
+    import joblib
+    forest = CompiledForest.from_model_file(model_file)
+    plan = PreprocessPlan.from_artifacts(joblib.load(encoder_file), joblib.load(scaler_file), forest.feature_names)
+    return plan, forest
+
+
+# Pre-serialized binary form of the preprocessing constants and the compiled tree tables,
+# loadable with numpy alone. It does not replace the model file: the Booster that scores
+# requests still imports lightgbm and parses the text model.
+# Layout: MAGIC, u64 header length, JSON header, then each array 64-byte aligned.
+def save_bundle(path, plan, forest, source_fingerprint):
+    arrays = {"mean": plan.mean, "scale": plan.scale, **forest.arrays()}
+    meta = {
+        "format": BUNDLE_FORMAT,
+        "fingerprint": source_fingerprint,
+        "feature_names": plan.feature_names,
+        # json keeps float('nan') categories (e.g. a missing size) as NaN
+        "categories": [list(plan.categories[col]) for col in CAT_COLS],
+        "arrays": {},
+    }
+    offset = 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        meta["arrays"][name] = {"dtype": array.dtype.str, "shape": array.shape, "offset": offset}
+        offset += _aligned(array.nbytes)
+    header = json.dumps(meta).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC + struct.pack('<Q', len(header)) + header)
+        for name, array in arrays.items():
+            f.seek(data_start + meta["arrays"][name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp, path)
+
+
+def _aligned(n, alignment=64):
+    return -(-n // alignment) * alignment
+
+
+def load_bundle(path, expected_fingerprint=None):
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return None
+        header_len, = struct.unpack('<Q', f.read(8))
+        meta = json.loads(f.read(header_len))
+    if meta.get("format") != BUNDLE_FORMAT:
+        return None
+    if expected_fingerprint is not None and meta["fingerprint"] != expected_fingerprint:
+        return None
+    data_start = _aligned(len(MAGIC) + 8 + header_len)
+    buffer = np.fromfile(path, dtype=np.uint8)
+    arrays = {}
+    for name, spec in meta["arrays"].items():
+        arrays[name] = np.ndarray(tuple(spec["shape"]), dtype=np.dtype(spec["dtype"]), buffer=buffer,
+                                  offset=data_start + spec["offset"])
+    plan = PreprocessPlan(meta["feature_names"], arrays['mean'], arrays['scale'], meta["categories"])
+    return plan, CompiledForest.from_arrays(meta["feature_names"], arrays)
+
+
+def build_bundle(path=BUNDLE_FILE, files=ARTIFACT_FILES):
+    plan, forest = compile_artifacts(*files)
+    save_bundle(path, plan, forest, fingerprint(files))
+    return plan, forest
+
+
+# Model state for the API with deferred loading.
+# mode "eager" loads on construction, "background" loads in a thread so the server can
+# bind its port immediately, "lazy" loads on first use. Accessing plan/predictor blocks
+# until loading has finished. The precompiled bundle is used when it matches the
+# artifacts on disk; otherwise it is rebuilt (best effort) from the text model and pickles.
+# Requests are scored by the LightGBM booster; the compiled forest backs tier curves.
+class ModelState:
+    def __init__(self, mode="eager", files=ARTIFACT_FILES, bundle_path=BUNDLE_FILE, version=None):
+        if mode not in ("eager", "background", "lazy"):
+            raise ValueError(f"Unknown SALES_STARTUP mode: {mode}")
+        self.mode = mode
+        self.version = version
+        self.files = files
+        self.bundle_path = bundle_path
+        self.error = None
+        self.timings = {}
+        self._plan = self._forest = self._booster = self._predictor = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._booster_lock = threading.Lock()
+        if mode == "eager":
+            self.load()
+        elif mode == "background":
+            threading.Thread(target=self._load_quietly, name="model-loader", daemon=True).start()
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def _load_quietly(self):
+        try:
+            self.load()
+        except Exception:
+            pass
+
+    def load(self):
+        with self._lock:
+            if self._ready.is_set():
+                return
+            try:
+                self._load()
+                self.error = None
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                raise
+            self._ready.set()
+
+    def _load(self):
+        t0 = time.perf_counter()
+        source = fingerprint(self.files)
+        bundle = None
+        if self.bundle_path and os.path.exists(self.bundle_path):
+            bundle = load_bundle(self.bundle_path, source)
+        self.timings["bundle_hit"] = bundle is not None
+        if bundle is None:
+            bundle = compile_artifacts(*self.files)
+            if self.bundle_path:
+                try:
+                    save_bundle(self.bundle_path, *bundle, source)
+                except OSError:
+                    pass  # read-only deploy: keep serving from the freshly compiled tables
+        self._plan, self._forest = bundle
+        self.timings["artifacts_s"] = time.perf_counter() - t0
+        self._predictor = self.booster
+        self.timings["total_s"] = time.perf_counter() - t0
+
+    def wait(self, timeout=None):
+        if not self._ready.is_set():
+            if self.mode == "lazy" or self.error is not None:
+                self.load()
+            elif not self._ready.wait(timeout):
+                raise TimeoutError("Model is still loading")
+        return self
+
+    @property
+    def plan(self):
+        return self.wait()._plan
+
+    @property
+    def predictor(self):
+        return self.wait()._predictor
+
+    @property
+    def forest(self):
+        return self.wait()._forest
+
+    # The LightGBM booster is only loaded when something needs it
+    @property
+    def booster(self):
+        with self._booster_lock:
+            if self._booster is None:
+                import lightgbm as lgb
+                t0 = time.perf_counter()
+                self._booster = lgb.Booster(model_file=self.files[0])
+                self.timings["booster_s"] = time.perf_counter() - t0
+        return self._booster
+
+
+if __name__ == "__main__":
+    # python -m artifacts build  -> writes model_bundle.bin next to the artifacts
+    if sys.argv[1:] != ["build"]:
+        raise SystemExit("usage: python -m artifacts build")
+    t0 = time.perf_counter()
+    build_bundle()
+    print(f"wrote {BUNDLE_FILE} in {time.perf_counter() - t0:.2f}s")
@@ -0,0 +1,110 @@
+import asyncio
+import bisect
+import time
+
+import numpy as np
+
+WAIT_BUCKETS_MS = [0.5, 1, 2, 5, 10, 20, 50, 100, 250, 1000]
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def to_dict(self):
+        labels = [f"<={b}" for b in self.buckets] + [f">{self.buckets[-1]}"]
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+# Dynamic micro-batcher for single-row predictions.
+# Requests arriving within `window_ms` of the first queued one (or until `max_batch`
+# rows are waiting) are stacked into one matrix and scored with a single booster call
+# in the default executor; results are fanned back out to the waiting requests.
+# While a batch is being scored the next one keeps filling up.
+# Rows carry a group (the model version that preprocessed them); rows of different groups
+# collected in one window are scored with separate calls to predict_fn(X, group).
+class MicroBatcher:
+    def __init__(self, predict_fn, max_batch=256, window_ms=2.0):
+        self.predict_fn = predict_fn
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self.batch_sizes = Histogram([2 ** i for i in range(max_batch.bit_length())])
+        self.queue_wait_ms = Histogram(WAIT_BUCKETS_MS)
+        self.rows = 0
+        self.batches = 0
+        self._queue = None
+        self._task = None
+
+    async def submit(self, row: np.ndarray, group=None) -> float:
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future, time.perf_counter(), group))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch:
+            if self._queue.empty():
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            else:
+                batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            for _, _, queued_at, _ in batch:
+                self.queue_wait_ms.observe((started - queued_at) * 1000)
+            self.batch_sizes.observe(len(batch))
+            self.batches += 1
+            self.rows += len(batch)
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[3], []).append(item)
+            for group, items in groups.items():
+                X = np.vstack([row for row, _, _, _ in items])
+                try:
+                    prediction = await loop.run_in_executor(None, self.predict_fn, X, group)
+                except Exception as e:
+                    for _, future, _, _ in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, future, _, _), value in zip(items, prediction.tolist()):
+                    if not future.done():
+                        future.set_result(value)
+
+    def stats(self):
+        return {
+            "max_batch": self.max_batch,
+            "window_ms": self.window * 1000,
+            "batches": self.batches,
+            "rows": self.rows,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batch_size": self.batch_sizes.to_dict(),
+            "queue_wait_ms": self.queue_wait_ms.to_dict(),
+        }
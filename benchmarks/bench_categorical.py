@@ -0,0 +1,76 @@
+# Categorical encoding cost per batch: the original OneHotEncoder.transform().toarray() path
+# vs the plan's category -> column index on string columns, on pandas categoricals (what
+# ingest returns for CAT_COLS) and as a CSR matrix. Reports rows/sec, the time of the
+# plan's categorical stage, the size of the feature matrix and the peak traced allocation
+# while building it, per 1M rows.
+# --predict also times the booster on each output.
+# Run from the repository root: python -m benchmarks.bench_categorical [--rows 1000000] [--predict]
+import argparse
+import time
+import tracemalloc
+
+import joblib
+import lightgbm as lgb
+
+from benchmarks.bench_preprocess import legacy_preprocess
+from benchmarks.synthetic import synthetic_orders
+from preprocessing import CAT_COLS, PreprocessPlan
+
+
+def nbytes(X):
+    if hasattr(X, 'indptr'):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.values.nbytes if hasattr(X, 'values') else X.nbytes
+
+
+def measure(build):
+    stages = {}
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    X = build(lambda stage, seconds: stages.__setitem__(stage, seconds))
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return X, elapsed, peak, stages.get('categorical')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000])
+    parser.add_argument('--predict', action='store_true', help="also time Booster.predict on each output")
+    args = parser.parse_args()
+
+    model = lgb.Booster(model_file="lightgbm_model.txt")
+    encoder = joblib.load("encoder.pkl")
+    scaler = joblib.load("scaler.pkl")
+    plan = PreprocessPlan.from_artifacts(encoder, scaler, model.feature_name())
+    plan32 = PreprocessPlan.from_artifacts(encoder, scaler, model.feature_name(), dtype='float32')
+
+    print(f"{'rows':>10} {'path':<26} {'rows/s':>10} {'cat stage s':>12} {'MB/1M rows':>11} {'peak MB/1M':>11} "
+          f"{'predict s':>10}")
+    for n in args.rows:
+        df = synthetic_orders(n)
+        categorical = df.astype({col: 'category' for col in CAT_COLS})
+        cases = {
+            "onehot encoder .toarray()": lambda observe: legacy_preprocess(df.copy(), encoder, scaler, model),
+            "plan, string columns": lambda observe: plan.transform(df, observe=observe),
+            "plan, categorical columns": lambda observe: plan.transform(categorical, observe=observe),
+            "plan float32, categorical": lambda observe: plan32.transform(categorical, observe=observe),
+            "plan CSR, categorical": lambda observe: plan.transform_csr(categorical, observe=observe),
+        }
+        for name, build in cases.items():
+            X, elapsed, peak, categorical_s = measure(build)
+            predict = ""
+            if args.predict:
+                t0 = time.perf_counter()
+                model.predict(X)
+                predict = f"{time.perf_counter() - t0:.2f}"
+            scale = 1_000_000 / n
+            stage = "" if categorical_s is None else f"{categorical_s:.3f}"
+            print(f"{n:>10,} {name:<26} {n / elapsed:>10,.0f} {stage:>12} {nbytes(X) * scale / 1e6:>11,.0f} "
+                  f"{peak * scale / 1e6:>11,.0f} {predict:>10}")
+            del X
+
+
+if __name__ == "__main__":
+    main()
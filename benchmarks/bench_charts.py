@@ -0,0 +1,59 @@
+# Browser payload of the dashboard charts: every row (the old figures) vs the reduced
+# figures from charts.py. Reports points, JSON payload size and build + serialize time
+# per chart, which is what Streamlit ships to the browser on every rerun.
+# Run from the repository root: python -m benchmarks.bench_charts [--rows 10000 100000 1000000]
+import argparse
+import time
+
+import pandas as pd
+import plotly.express as px
+
+import charts
+from benchmarks.synthetic import synthetic_orders
+
+
+def full_figures(df, series):
+    return {
+        "revenue histogram": lambda: px.histogram(df, x='revenue'),
+        "3d scatter": lambda: px.scatter_3d(df, x='unit_price', y='quantity', z='age', color='revenue'),
+        "relationship scatter": lambda: px.scatter(df, x='unit_price', y='revenue'),
+        "revenue trend": lambda: px.line(series, x='order_date', y='revenue'),
+    }
+
+
+def reduced_figures(df, series):
+    return {
+        "revenue histogram": lambda: charts.histogram(df['revenue'], "", '#3B82F6', 'revenue'),
+        "3d scatter": lambda: charts.scatter_3d(df, 'unit_price', 'quantity', 'age', 'revenue', ""),
+        "relationship scatter": lambda: charts.scatter(df, 'unit_price', 'revenue', "", '#10B981'),
+        "revenue trend": lambda: charts.line(series, 'order_date', 'revenue', "", '#3B82F6'),
+    }
+
+
+def measure(build):
+    t0 = time.perf_counter()
+    fig = build()
+    payload = fig.to_json()
+    return charts.point_count(fig), len(payload), time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'chart':<22} {'points':>17} {'payload KB':>21} {'seconds':>15}")
+    for n in args.rows:
+        df = synthetic_orders(n)
+        df['order_date'] = pd.to_datetime(df['order_date'])
+        series = df[['order_date', 'revenue']].sort_values('order_date', kind='stable')
+        full, reduced = full_figures(df, series), reduced_figures(df, series)
+        for name in full:
+            # the OLS trendline is left out of the full scatter: statsmodels alone dominates it
+            before, after = measure(full[name]), measure(reduced[name])
+            print(f"{n:>9,} {name:<22} {before[0]:>8,} -> {after[0]:>6,} {before[1] / 1024:>10,.0f} -> {after[1] / 1024:>7,.0f} "
+                  f"{before[2]:>6.2f} -> {after[2]:>5.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Rerun latency of streamlit_app.py on a large upload, driven headless with AppTest.
+# AppTest cannot upload files, so the script is run through a small wrapper that makes
+# st.file_uploader return a synthetic CSV from disk. Reported per interaction:
+# wall time of the script run (parsing, aggregates, figures and their serialization).
+# Run from the repository root: python -m benchmarks.bench_dashboard [--rows 1000000]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import write_synthetic_csv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WRAPPER = '''
+import logging, os, sys
+sys.path.insert(0, {root!r})
+os.chdir({root!r})
+import streamlit as st
+
+# deprecation notices would otherwise be logged on every run
+for name in list(logging.root.manager.loggerDict):
+    if name.startswith("streamlit"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+
+class LocalUpload:
+    def __init__(self, path):
+        self.name = os.path.basename(path)
+        self.type = "text/csv"
+        self.file_id = path
+        with open(path, "rb") as f:
+            self._data = f.read()
+        self.size = len(self._data)
+
+    def getvalue(self):
+        return self._data
+
+
+st.file_uploader = lambda *args, **kwargs: LocalUpload({csv!r})
+with open("streamlit_app.py") as f:
+    exec(compile(f.read(), "streamlit_app.py", "exec"))
+'''
+
+
+def timed_run(element):
+    t0 = time.perf_counter()
+    element.run()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    from streamlit.testing.v1 import AppTest
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = write_synthetic_csv(os.path.join(tmp, "orders.csv"), args.rows)
+        script = os.path.join(tmp, "dashboard.py")
+        with open(script, "w") as f:
+            f.write(WRAPPER.format(root=ROOT, csv=csv_path))
+        at = AppTest.from_file(script, default_timeout=3600)
+
+        cases = [("first load", lambda: timed_run(at)),
+                 ("rerun, no change", lambda: timed_run(at)),
+                 ("change feature 2", lambda: timed_run(at.selectbox(key="feat2").select_index(3))),
+                 ("change X-axis", lambda: timed_run(at.selectbox[1].select_index(3))),
+                 ("back to feature 2 = 1", lambda: timed_run(at.selectbox(key="feat2").select_index(1))),
+                 ("rerun, no change", lambda: timed_run(at))]
+        print(f"{args.rows:,} rows, {os.path.getsize(csv_path) / 2**20:,.0f} MB CSV")
+        for name, case in cases:
+            seconds = case()
+            if at.exception:
+                print(at.exception[0].value, file=sys.stderr)
+                raise SystemExit(1)
+            print(f"{name:<24} {seconds:>8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
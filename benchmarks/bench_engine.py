@@ -0,0 +1,39 @@
+# Throughput of lgb.Booster.predict vs the compiled NumPy forest (fixed-depth gather over
+# padded trees, summed per row) across batch sizes.
+# Run from the repository root: python -m benchmarks.bench_engine [--rows 1 10 100 1000 10000 100000]
+import argparse
+import time
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+
+from benchmarks.synthetic import best_of, synthetic_orders
+from preprocessing import PreprocessPlan
+from tree_engine import CompiledForest
+
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[1, 10, 100, 1000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    booster = lgb.Booster(model_file="lightgbm_model.txt")
+    t0 = time.perf_counter()
+    forest = CompiledForest.from_model_file("lightgbm_model.txt")
+    print(f"compiled {forest.num_trees()} trees (max depth {forest.max_depth}) in {time.perf_counter() - t0:.3f}s")
+    plan = PreprocessPlan.from_artifacts(joblib.load("encoder.pkl"), joblib.load("scaler.pkl"), booster.feature_name())
+
+    print(f"{'rows':>8} {'booster rows/s':>15} {'numpy rows/s':>15} {'ratio':>7}  max|diff|")
+    for n in args.rows:
+        X = plan.transform(synthetic_orders(n))
+        repeat = 50 if n <= 1000 else 5
+        t_booster = best_of(lambda: booster.predict(X), repeat)
+        t_forest = best_of(lambda: forest.tree_outputs(X).sum(axis=1), repeat)
+        diff = np.abs(booster.predict(X) - forest.tree_outputs(X).sum(axis=1)).max()
+        print(f"{n:>8} {n / t_booster:>15,.0f} {n / t_forest:>15,.0f} {t_booster / t_forest:>6.2f}x  {diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# /explain vs /predict against a real uvicorn server:
+#   single row   median latency of /predict and /explain, cold (every record new) and warm
+#                (the same record again, served from the explanation cache)
+#   batch        rows/sec of /predict-batch and /explain-batch, cold and warm
+# Cold requests use distinct synthetic rows, so each one is scored. The first /predict
+# call on a cold server also loads the model, so the medians are what matter.
+# Run from the repository root: python -m benchmarks.bench_explain [--calls 50] [--batch 1000]
+import argparse
+import statistics
+import time
+
+import httpx
+
+from benchmarks.bench_upload import serve
+from benchmarks.bench_wire import sales_inputs
+
+
+def timed(client, path, body):
+    t0 = time.perf_counter()
+    client.post(path, json=body).raise_for_status()
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=50)
+    parser.add_argument('--batch', type=int, nargs='+', default=[100, 1000])
+    args = parser.parse_args()
+
+    rows = sales_inputs(args.calls + sum(args.batch)).to_dict('records')
+    with serve() as (base, _), httpx.Client(base_url=base, timeout=None) as client:
+        print(f"{'single row':<12} {'route':<15} {'cold p50 ms':>12} {'warm p50 ms':>12}")
+        for path in ("/predict", "/explain"):
+            cold = [timed(client, path, row) for row in rows[:args.calls]]
+            warm = [timed(client, path, rows[0]) for _ in range(args.calls)]
+            print(f"{'':<12} {path:<15} {statistics.median(cold) * 1000:>12.2f} "
+                  f"{statistics.median(warm) * 1000:>12.2f}")
+
+        print(f"{'batch rows':<12} {'route':<15} {'cold rows/s':>12} {'warm rows/s':>12}")
+        start = args.calls
+        for n in args.batch:
+            # predictions and explanations are cached separately, so both routes start cold
+            batch = rows[start:start + n]
+            for path in ("/predict-batch", "/explain-batch"):
+                cold = timed(client, path, batch)
+                warm = timed(client, path, batch)
+                print(f"{n:<12,} {path:<15} {n / cold:>12,.0f} {n / warm:>12,.0f}")
+            start += n
+
+
+if __name__ == "__main__":
+    main()
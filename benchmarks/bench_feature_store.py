@@ -0,0 +1,50 @@
+# Category feature store: filling category_avg_price / category_total_revenue /
+# category_popularity by category_id through the store's array lookup vs a pandas merge
+# against an aggregate table and a per-request groupby over the order history (what
+# clients do today), plus the single-record path and incremental update throughput.
+# Run from the repository root: python -m benchmarks.bench_feature_store [--rows 10000 1000000]
+import argparse
+
+from benchmarks.synthetic import best_of, synthetic_orders
+from feature_store import STORE_FEATURES, CategoryFeatureStore
+
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 1_000_000])
+    args = parser.parse_args()
+
+    store = CategoryFeatureStore.from_csv()
+    history = synthetic_orders(100_000, seed=1)
+    aggregates = history.groupby('category_id')[STORE_FEATURES].first().reset_index()
+
+    print(f"{'rows':>10} {'path':<22} {'seconds':>9} {'rows/s':>13}")
+    for n in args.rows:
+        requests = synthetic_orders(n).drop(columns=STORE_FEATURES)
+        cases = {
+            "store lookup": lambda: store.fill(requests),
+            "pandas merge": lambda: requests.merge(aggregates, on='category_id', how='left'),
+            "groupby history": lambda: requests.merge(
+                history.groupby('category_id').agg(category_avg_price=('unit_price', 'mean'),
+                                                   category_total_revenue=('revenue', 'sum'),
+                                                   category_popularity=('order_id', 'count')).reset_index(),
+                on='category_id', how='left'),
+        }
+        for name, fn in cases.items():
+            seconds = best_of(fn, repeat=5)
+            print(f"{n:>10,} {name:<22} {seconds:>9.4f} {n / seconds:>13,.0f}")
+
+    record = requests.iloc[0].to_dict()
+    for col in STORE_FEATURES:
+        record[col] = None
+    calls = 100_000
+    seconds = best_of(lambda: [store.fill_record(record) for _ in range(calls)], repeat=3)
+    print(f"fill_record: {seconds / calls * 1e6:.2f} us per record")
+    batch = synthetic_orders(100_000, seed=2)
+    seconds = best_of(lambda: store.update(batch), repeat=3)
+    print(f"update: {len(batch) / seconds:,.0f} orders/s in batches of {len(batch):,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Sidebar filter latency: boolean masks over the unsorted frame vs FilterIndex
+# (binary-searched date slice + precomputed category/SKU positions).
+#   build   one-off per upload: date sort and per-category/SKU positions
+#   mask    pandas comparisons over every row, then the filtered copy
+#   select  FilterIndex.select: the matching rows as a slice or positions
+#   view    select + the filtered frame (a date range alone is a zero-copy slice)
+# Only the filtered columns are generated, so 10M rows fit in a few hundred MB.
+# Run from the repository root: python -m benchmarks.bench_filters [--rows 1000000 10000000]
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import best_of, synthetic_orders
+from filter_index import FilterIndex
+
+FILTERS = {
+    "date range": dict(start="2022-03-01", end="2022-05-31"),
+    "date + category": dict(start="2022-03-01", end="2022-05-31", categories=("Dresses", "Jeans")),
+    "category + sku": dict(categories=("Dresses",), skus=(77, 439, 512)),
+    "revenue >= 1000": dict(revenue_min=1000),
+    "all four": dict(start="2022-03-01", end="2022-05-31", categories=("Dresses",), revenue_min=1000),
+}
+
+
+def filter_columns(n, seed=0):
+    base = synthetic_orders(100_000, seed=seed)[['category', 'sku', 'revenue']]
+    rng = np.random.default_rng(seed)
+    df = base.iloc[rng.integers(0, len(base), n)].reset_index(drop=True)
+    df['category'] = df['category'].astype('category')
+    offsets = rng.integers(0, 365 * 24 * 60, n)
+    df['order_date'] = pd.Timestamp("2022-01-01") + pd.to_timedelta(offsets, unit='m')
+    return df
+
+
+def mask_filter(df, start=None, end=None, categories=None, skus=None, revenue_min=None):
+    keep = np.ones(len(df), dtype=bool)
+    if start is not None:
+        keep &= (df['order_date'] >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        keep &= (df['order_date'] < pd.Timestamp(end) + pd.Timedelta(days=1)).to_numpy()
+    if categories:
+        keep &= df['category'].isin(categories).to_numpy()
+    if skus:
+        keep &= df['sku'].isin(skus).to_numpy()
+    if revenue_min is not None:
+        keep &= (df['revenue'] >= revenue_min).to_numpy()
+    return df[keep]
+
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>11} {'filter':<16} {'matched':>10} {'mask ms':>9} {'select ms':>10} {'view ms':>9}")
+    for n in args.rows:
+        df = filter_columns(n)
+        t0 = time.perf_counter()
+        index = FilterIndex(df)
+        build = time.perf_counter() - t0
+        print(f"{n:>11,} {'(build)':<16} {'':>10} {'':>9} {build * 1e3:>10,.0f}")
+        for name, kw in FILTERS.items():
+            mask_time = best_of(lambda: mask_filter(df, **kw))
+            select_time = best_of(lambda: index.select(**kw))
+            view_time = best_of(lambda: index.view(index.select(**kw)))
+            expected, view = mask_filter(df, **kw), index.view(index.select(**kw))
+            assert len(view) == len(expected), (name, len(view), len(expected))
+            print(f"{n:>11,} {name:<16} {len(view):>10,} {mask_time * 1e3:>9,.1f} {select_time * 1e3:>10,.1f} "
+                  f"{view_time * 1e3:>9,.1f}")
+        del df, index
+
+
+if __name__ == "__main__":
+    main()
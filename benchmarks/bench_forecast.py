@@ -0,0 +1,54 @@
+# Forecast grid construction: a client-style DataFrame of every (date, product) row run
+# through PreprocessPlan.transform vs forecast.grid_features (products transformed once,
+# date columns rewritten per day), plus booster time and the JSON payload a client would
+# otherwise post to /predict-batch. Uses the full SKU x color x size cross grid.
+# Run from the repository root: python -m benchmarks.bench_forecast [--horizons 30 90]
+import argparse
+import json
+import time
+
+import pandas as pd
+
+from artifacts import ModelState
+from forecast import DEFAULT_HOLIDAY, ProductCatalog, grid_features, product_features, score_grid
+
+
+def dataframe_grid(plan, products, dates):
+    frame = products.iloc[list(range(len(products))) * len(dates)].reset_index(drop=True)
+    frame['order_date'] = dates.repeat(len(products))
+    frame['holiday_type'] = DEFAULT_HOLIDAY
+    return frame, plan.transform(frame)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - t0, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--horizons', type=int, nargs='+', default=[30, 90])
+    args = parser.parse_args()
+
+    state = ModelState(mode="eager")
+    plan, predictor = state.plan, state.predictor
+    products = ProductCatalog.from_csv().select(cross=True)
+
+    print(f"{'days':>5} {'rows':>9} {'dataframe s':>12} {'grid s':>8} {'predict s':>10} {'batch JSON MB':>14}")
+    for horizon in args.horizons:
+        dates = pd.date_range("2023-01-01", periods=horizon, freq="D")
+        frame_time, (frame, _) = timed(lambda: dataframe_grid(plan, products, dates))
+        grid_time, _ = timed(lambda: grid_features(plan, product_features(plan, products), dates))
+        base = product_features(plan, products)
+        predict_time, _ = timed(lambda: [block for block in score_grid(plan, predictor, base, dates)])
+        payload = len(json.dumps(frame.drop(columns='order_date').assign(
+            year=dates.year.repeat(len(products)), month=dates.month.repeat(len(products)),
+            day=dates.day.repeat(len(products)), weekday=dates.weekday.repeat(len(products))).to_dict('records'),
+            default=int))
+        print(f"{horizon:>5} {len(frame):>9,} {frame_time:>12.2f} {grid_time:>8.2f} {predict_time:>10.2f} "
+              f"{payload / 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
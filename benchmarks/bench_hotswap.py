@@ -0,0 +1,87 @@
+# /predict latency while the served model is swapped: two versions are published to a
+# temporary registry, a client keeps one request in flight against a real uvicorn server and
+# version B is activated halfway. Latency percentiles are reported before, during (load +
+# canary warm-up) and after the swap, with failed requests and the versions that answered,
+# followed by the load and warm-up timings from /admin/model. Cache disabled.
+# Run from the repository root: python -m benchmarks.bench_hotswap [--seconds 10]
+import argparse
+import tempfile
+import threading
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.bench_upload import serve
+from registry import ModelRegistry
+
+RECORD = {
+    'unit_price': 50.0, 'quantity': 2, 'age': 30, 'discount': 0.1, 'customer_rating': 4.0, 'stock': 10,
+    'category_id': 1, 'category_avg_price': 40.0, 'category_total_revenue': 1000.0, 'category_popularity': 5,
+    'year': 2023, 'month': 5, 'day': 3, 'weekday': 2,
+    'color': 'Red', 'size': 'M', 'category': 'Dresses', 'holiday_type': 'No Holiday',
+}
+
+
+def client_loop(base, stop, samples):
+    with httpx.Client(base_url=base, timeout=30) as client:
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                response = client.post("/predict", json=RECORD)
+                version = response.json().get("model_version") if response.status_code == 200 else None
+                status = response.status_code
+            except httpx.HTTPError:
+                version, status = None, 0
+            samples.append((t0, time.perf_counter() - t0, status, version))
+
+
+def summarize(name, samples):
+    if not samples:
+        print(f"{name:<8} {'-':>8}")
+        return
+    latency = np.array([s[1] for s in samples]) * 1000
+    failed = sum(1 for s in samples if s[2] != 200)
+    versions = sorted({s[3] for s in samples if s[3] is not None})
+    print(f"{name:<8} {len(samples):>8} {np.percentile(latency, 50):>8.2f} {np.percentile(latency, 99):>8.2f} "
+          f"{latency.max():>8.2f} {failed:>7}  {','.join(versions)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        registry = ModelRegistry(root)
+        for version in ("A", "B"):
+            registry.publish(version=version)
+        env = {"SALES_REGISTRY_DIR": root, "SALES_MODEL_VERSION": "A", "SALES_CACHE_SIZE": "0"}
+        with serve(env=env) as (base, _):
+            stop, samples = threading.Event(), []
+            client = threading.Thread(target=client_loop, args=(base, stop, samples))
+            client.start()
+            time.sleep(args.seconds / 2)
+            swap_started = time.perf_counter()
+            httpx.post(base + "/admin/model/activate", json={"version": "B"}).raise_for_status()
+            while (status := httpx.get(base + "/admin/model").json())["loading"] is not None:
+                time.sleep(0.01)
+            swap_done = time.perf_counter()
+            time.sleep(args.seconds / 2)
+            stop.set()
+            client.join()
+
+    print(f"{'phase':<8} {'requests':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'failed':>7}  versions")
+    summarize("before", [s for s in samples if s[0] < swap_started])
+    summarize("during", [s for s in samples if swap_started <= s[0] < swap_done])
+    summarize("after", [s for s in samples if s[0] >= swap_done])
+    swap = status["history"][-1] if status["history"] else {}
+    warmup = swap.get("warmup") or {}
+    print(f"swap to {status['active']['version']} in {swap_done - swap_started:.3f} s: "
+          f"load {swap.get('load_s', float('nan')):.3f} s, canary {warmup.get('rows', 0)} rows in "
+          f"{warmup.get('seconds', float('nan')):.3f} s, mean abs change {warmup.get('mean_abs_change')}; "
+          f"error {status['last_error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# Parse time and peak RSS of the upload readers: the old read_csv path vs Arrow CSV,
+# Parquet and Arrow IPC with column projection. Each case runs in a fresh process so
+# peak RSS (ru_maxrss) is not polluted by earlier cases.
+# Run from the repository root: python -m benchmarks.bench_ingest [--rows 1000000]
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from benchmarks.synthetic import write_synthetic_csv
+from ingest import MODEL_COLUMNS, read_table
+
+
+def legacy_streamlit(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    return pd.read_csv(io.StringIO(data.decode("utf-8")))
+
+
+def legacy_api(path):
+    with open(path, 'rb') as f:
+        return pd.read_csv(io.BytesIO(f.read()))
+
+
+def reader(fmt, columns):
+    def read(path):
+        with open(path, 'rb') as f:
+            return read_table(f, fmt, columns=columns)
+    return read
+
+
+CASES = {
+    "read_csv (streamlit, decoded str)": ("csv", legacy_streamlit),
+    "read_csv (api, bytes)": ("csv", legacy_api),
+    "arrow csv, all columns": ("csv", reader("csv", None)),
+    "arrow csv, projected": ("csv", reader("csv", MODEL_COLUMNS)),
+    "parquet, projected": ("parquet", reader("parquet", MODEL_COLUMNS)),
+    "arrow ipc, projected": ("arrow", reader("arrow", MODEL_COLUMNS)),
+}
+
+
+def run_case(name, path, result):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    df = CASES[name][1](path)
+    seconds = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result.put((seconds, (peak - before) / 1024, df.shape))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {"csv": write_synthetic_csv(os.path.join(tmp, "orders.csv"), args.rows)}
+        table = pa.Table.from_pandas(pd.read_csv(paths["csv"]), preserve_index=False)
+        paths["parquet"] = os.path.join(tmp, "orders.parquet")
+        pq.write_table(table, paths["parquet"])
+        paths["arrow"] = os.path.join(tmp, "orders.arrow")
+        feather.write_feather(table, paths["arrow"], compression="uncompressed")
+        del table
+        for fmt, path in paths.items():
+            print(f"{fmt:>8}: {os.path.getsize(path) / 2**20:,.0f} MB")
+
+        print(f"{'reader':<36} {'seconds':>8} {'+RSS MB':>8}  shape")
+        for name, (fmt, _) in CASES.items():
+            result = ctx.Queue()
+            proc = ctx.Process(target=run_case, args=(name, paths[fmt], result))
+            proc.start()
+            seconds, rss, shape = result.get()
+            proc.join()
+            print(f"{name:<36} {seconds:>8.2f} {rss:>8.0f}  {shape}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# /predict latency under mixed load: a large /upload-csv in the API process vs the same
+# file handed to the background job queue (POST /jobs).
+# Run from the repository root: python -m benchmarks.bench_jobs [--rows 1000000]
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.bench_upload import serve
+from benchmarks.synthetic import synthetic_orders, write_synthetic_csv
+from preprocessing import CAT_COLS, NUM_COLS
+
+
+def probe_latency(base, record, stop):
+    samples = []
+    with httpx.Client(base_url=base, timeout=None) as client:
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            client.post("/predict?slim=true", json=record)
+            samples.append(time.perf_counter() - t0)
+            time.sleep(0.005)
+    return samples
+
+
+def measure(base, background, record):
+    stop = threading.Event()
+    samples = []
+    prober = threading.Thread(target=lambda: samples.extend(probe_latency(base, record, stop)))
+    prober.start()
+    t0 = time.perf_counter()
+    background()
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    prober.join()
+    p50, p99 = np.percentile(samples, [50, 99]) * 1e3
+    return elapsed, p50, p99, len(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    row = synthetic_orders(1).drop(columns=['order_date'])
+    row[['year', 'month', 'day', 'weekday']] = [2022, 8, 11, 3]
+    record = row[NUM_COLS + CAT_COLS].to_dict('records')[0]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = write_synthetic_csv(os.path.join(tmp, "orders.csv"), args.rows)
+        with serve(env={"SALES_JOB_DIR": os.path.join(tmp, "jobs")}) as (base, _):
+            client = httpx.Client(base_url=base, timeout=None)
+
+            def upload():
+                with open(csv_path, "rb") as f:
+                    client.post("/upload-csv", files={"file": ("orders.csv", f)}).raise_for_status()
+
+            def job():
+                with open(csv_path, "rb") as f:
+                    job_id = client.post("/jobs", files={"file": ("orders.csv", f)}).json()["job_id"]
+                while client.get(f"/jobs/{job_id}").json()["status"] not in ("done", "failed"):
+                    time.sleep(0.1)
+
+            print(f"{'background load':<20} {'seconds':>8} {'p50 ms':>8} {'p99 ms':>8} {'probes':>7}")
+            for name, background in [("idle", lambda: time.sleep(3)), ("/upload-csv", upload), ("POST /jobs", job)]:
+                elapsed, p50, p99, n = measure(base, background, record)
+                print(f"{name:<20} {elapsed:>8.1f} {p50:>8.2f} {p99:>8.2f} {n:>7}")
+
+
+if __name__ == "__main__":
+    main()
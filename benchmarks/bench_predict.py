@@ -0,0 +1,68 @@
+# p50/p99 latency of single-row scoring: old DataFrame path vs the /predict fast path.
+# Run from the repository root: python -m benchmarks.bench_predict [--target-p50-ms 1.0]
+import argparse
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+import main
+from benchmarks.bench_preprocess import legacy_preprocess
+from benchmarks.synthetic import synthetic_orders
+from preprocessing import CAT_COLS, NUM_COLS
+
+
+def percentiles(fn, records, warmup=50):
+    for record in records[:warmup]:
+        fn(record)
+    samples = []
+    for record in records:
+        t0 = time.perf_counter()
+        fn(record)
+        samples.append(time.perf_counter() - t0)
+    return np.percentile(samples, [50, 99]) * 1e3
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--target-p50-ms', type=float, default=1.0)
+    parser.add_argument('--target-p99-ms', type=float, default=5.0)
+    args = parser.parse_args()
+
+    df = synthetic_orders(args.requests).drop(columns=['order_date'])
+    df[['year', 'month', 'day', 'weekday']] = [2022, 8, 11, 3]
+    records = [main.SalesInput(**r).dict() for r in df[NUM_COLS + CAT_COLS].to_dict('records')]
+    client = TestClient(main.app)
+    model, encoder, scaler = main.state.booster, joblib.load("encoder.pkl"), joblib.load("scaler.pkl")
+
+    def legacy(record):
+        processed = legacy_preprocess(pd.DataFrame([record]), encoder, scaler, model)
+        return model.predict(processed.values)
+
+    current = main.state.current
+    trees = current.forest.num_trees()
+
+    def fast(record):
+        return main._predict_record(record, current, trees)
+
+    rows = [
+        ("legacy in-process", percentiles(legacy, records[:500])),
+        ("fast path in-process", percentiles(fast, records)),
+        ("POST /predict", percentiles(lambda r: client.post("/predict", json=r), records)),
+        ("POST /predict?slim=true", percentiles(lambda r: client.post("/predict?slim=true", json=r), records)),
+    ]
+    print(f"{'path':<26} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, (p50, p99) in rows:
+        print(f"{name:<26} {p50:>8.3f} {p99:>8.3f}")
+
+    p50, p99 = rows[1][1]
+    ok = p50 <= args.target_p50_ms and p99 <= args.target_p99_ms
+    print(f"fast path target p50<={args.target_p50_ms}ms p99<={args.target_p99_ms}ms: {'PASS' if ok else 'FAIL'}")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,61 @@
+# Rows/sec of the original DataFrame-based preprocess() vs the compiled PreprocessPlan.
+# Run from the repository root: python -m benchmarks.bench_preprocess [--rows 1 100 10000 1000000]
+import argparse
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import best_of, synthetic_orders
+from preprocessing import CAT_COLS, NUM_COLS, PreprocessPlan, booster_feature_name
+
+
+# Reference copy of the pre-plan implementation from main.py, with one fix: one-hot names go
+# through LightGBM's feature-name sanitization, as in PreprocessPlan (the original left the
+# multi-word categories at 0)
+def legacy_preprocess(df, encoder, scaler, model):
+    if 'order_date' in df.columns:
+        df['order_date'] = pd.to_datetime(df['order_date'])
+        df['year'] = df['order_date'].dt.year
+        df['month'] = df['order_date'].dt.month
+        df['day'] = df['order_date'].dt.day
+        df['weekday'] = df['order_date'].dt.weekday
+        df.drop(columns=['order_date'], inplace=True)
+    df.fillna({col: 0 for col in NUM_COLS[:10]}, inplace=True)
+    cat_encoded = encoder.transform(df[CAT_COLS])
+    cat_df = pd.DataFrame(cat_encoded.toarray(),
+                          columns=[booster_feature_name(name) for name in encoder.get_feature_names_out(CAT_COLS)])
+    num_df = pd.DataFrame(scaler.transform(df[NUM_COLS]), columns=NUM_COLS)
+    final_df = pd.concat([num_df, cat_df], axis=1)
+    expected_cols = model.feature_name()
+    for col in expected_cols:
+        if col not in final_df.columns:
+            final_df[col] = 0
+    return final_df[expected_cols]
+
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[1, 100, 10_000, 1_000_000])
+    parser.add_argument('--dtype', choices=['float64', 'float32'], default='float64')
+    args = parser.parse_args()
+
+    model = lgb.Booster(model_file="lightgbm_model.txt")
+    encoder = joblib.load("encoder.pkl")
+    scaler = joblib.load("scaler.pkl")
+    plan = PreprocessPlan.from_artifacts(encoder, scaler, model.feature_name(), dtype=args.dtype)
+
+    print(f"{'rows':>10} {'legacy rows/s':>15} {'plan rows/s':>15} {'speedup':>8}  max|diff|")
+    for n in args.rows:
+        df = synthetic_orders(n)
+        repeat = 20 if n <= 10_000 else 3
+        legacy = best_of(lambda: legacy_preprocess(df.copy(), encoder, scaler, model), repeat)
+        fused = best_of(lambda: plan.transform(df), repeat)
+        diff = np.abs(legacy_preprocess(df.copy(), encoder, scaler, model).values - plan.transform(df)).max()
+        print(f"{n:>10} {n / legacy:>15,.0f} {n / fused:>15,.0f} {legacy / fused:>7.1f}x  {diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
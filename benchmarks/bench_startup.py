@@ -0,0 +1,108 @@
+# Cold-start cost of the API and the Streamlit module imports.
+# Each case starts a fresh interpreter so nothing is already imported or cached:
+#   import main        time for `import main` alone
+#   port bound         uvicorn answers /health (liveness)
+#   first prediction   first successful POST /predict (readiness + scoring)
+# Cases cover SALES_STARTUP modes, with and without the precompiled bundle.
+# Run from the repository root: python -m benchmarks.bench_startup [--repeat 3]
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from artifacts import BUNDLE_FILE, build_bundle
+from benchmarks.bench_upload import free_port
+from benchmarks.synthetic import synthetic_orders
+from preprocessing import CAT_COLS, NUM_COLS
+
+
+# Imports at the top of streamlit_app.py before and after unused ones were dropped
+STREAMLIT_BEFORE = ("streamlit", "pandas", "lightgbm", "matplotlib.pyplot", "seaborn", "plotly.express",
+                    "plotly.graph_objects", "plotly.subplots", "numpy", "streamlit.components.v1", "PIL.Image",
+                    "base64", "time", "requests", "io", "scipy.stats", "ingest")
+STREAMLIT_AFTER = ("streamlit", "pandas", "plotly.express", "plotly.graph_objects", "plotly.subplots", "numpy",
+                   "streamlit.components.v1", "ingest")
+
+
+# Modules that are not installed are skipped rather than failing the run
+def import_seconds(modules, env=None):
+    code = ("import time; t0 = time.perf_counter()\n"
+            f"for name in {list(modules)!r}:\n"
+            "    try: __import__(name)\n"
+            "    except ImportError: pass\n"
+            "print(time.perf_counter() - t0)")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         env={**os.environ, **(env or {})})
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def wait_for(url, method="get", **kwargs):
+    while True:
+        try:
+            response = getattr(httpx, method)(url, timeout=30, **kwargs)
+            if response.status_code < 500:
+                response.raise_for_status()
+                return time.perf_counter()
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+
+
+def server_startup(env, record):
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    t0 = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+                               "--log-level", "warning"], env={**os.environ, **env})
+    try:
+        alive = wait_for(base + "/health") - t0
+        first = wait_for(base + "/predict?slim=true", method="post", json=record) - t0
+    finally:
+        server.terminate()
+        server.wait()
+    return alive, first
+
+
+def remove_bundle():
+    if os.path.exists(BUNDLE_FILE):
+        os.remove(BUNDLE_FILE)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    median = statistics.median
+    df = synthetic_orders(1)
+    df[['year', 'month', 'day', 'weekday']] = [2022, 8, 11, 3]
+    record = df[NUM_COLS + CAT_COLS].to_dict('records')[0]
+
+    print(f"{'case':<36} {'import main':>12} {'port bound':>11} {'first pred':>11}")
+    for mode in ("eager", "background", "lazy"):
+        for bundle in (False, True):
+            env = {"SALES_STARTUP": mode, "SALES_CACHE_SIZE": "0"}
+            imports, alive, first = [], [], []
+            for _ in range(args.repeat):
+                # the service writes the bundle itself on a miss, so rebuild state per run
+                build_bundle() if bundle else remove_bundle()
+                imports.append(import_seconds(["main"], env))
+                build_bundle() if bundle else remove_bundle()
+                a, f = server_startup(env, record)
+                alive.append(a)
+                first.append(f)
+            name = f"{mode}/{'bundle' if bundle else 'text model'}"
+            print(f"{name:<36} {median(imports) * 1e3:>10.0f}ms {median(alive) * 1e3:>9.0f}ms "
+                  f"{median(first) * 1e3:>9.0f}ms")
+    build_bundle()
+
+    before = median(import_seconds(STREAMLIT_BEFORE) for _ in range(args.repeat))
+    after = median(import_seconds(STREAMLIT_AFTER) for _ in range(args.repeat))
+    print(f"\nstreamlit_app imports: {before * 1e3:.0f}ms before, {after * 1e3:.0f}ms after")
+
+
+if __name__ == "__main__":
+    main()
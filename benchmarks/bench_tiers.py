@@ -0,0 +1,48 @@
+# Latency tiers: speedup vs error of scoring a tree prefix instead of all trees.
+# The tiers and their tree counts come from the IterationCurve the API builds (held-out
+# orders of the CSV); each is then timed with lgb.Booster.predict on synthetic batches, next
+# to its relative error on the held-out orders.
+# Run from the repository root: python -m benchmarks.bench_tiers [--rows 1 100 10000] [--tiers fast=0.01,preview=0.05]
+import argparse
+
+import numpy as np
+
+from artifacts import ModelState
+from benchmarks.synthetic import best_of, synthetic_orders
+from forecast import CATALOG_CSV
+from tiers import IterationCurve, parse_tiers
+
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[1, 100, 10_000])
+    parser.add_argument('--tiers', default=None)
+    args = parser.parse_args()
+
+    model = ModelState()
+    curve = IterationCurve.from_csv(CATALOG_CSV, model.plan, model.forest, parse_tiers(args.tiers))
+    print(f"curve over {curve.rows} held-out rows in {curve.seconds:.3f}s")
+    print(f"{'tier':<10} {'trees':>6} {'mean rel err':>13} {'p95 rel err':>12}")
+    for name in curve.tolerances:
+        tier = curve.tier(name)
+        print(f"{name:<10} {tier['num_iteration']:>6} {tier['relative_error']:>13.4f} "
+              f"{tier['p95_relative_error']:>12.4f}")
+
+    booster = model.booster
+    print(f"{'rows':>8} {'tier':<10} {'rows/s':>13} {'speedup':>8}")
+    for n in args.rows:
+        X = model.plan.transform(synthetic_orders(n))
+        repeat = 50 if n <= 1000 else 5
+        full = best_of(lambda: booster.predict(X), repeat)
+        for name, k in curve.iterations.items():
+            seconds = best_of(lambda: booster.predict(X, num_iteration=k), repeat)
+            print(f"{n:>8,} {name:<10} {n / seconds:>13,.0f} {full / seconds:>8.2f}")
+    # the curve's prefix sums are what the booster scores with num_iteration=k
+    k = curve.iterations[min(curve.iterations, key=curve.iterations.get)]
+    X = model.plan.transform(synthetic_orders(1_000))
+    diff = np.abs(booster.predict(X, num_iteration=k) - model.forest.tree_outputs(X)[:, :k].sum(axis=1)).max()
+    print(f"max|booster - tree prefix sum| at {k} trees: {diff:.2e}")
+
+if __name__ == "__main__":
+    main()
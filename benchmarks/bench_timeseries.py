@@ -0,0 +1,50 @@
+# Trend-tab work from raw orders vs from the pre-aggregated TimeSeriesStore.
+#   raw          sort + monthly groupby + resample('D') + rolling fill + seasonal_decompose
+#   store build  one-off aggregation of the raw orders into daily totals
+#   store query  monthly series + daily series + seasonal_decompose from the store
+#   append       folding 1% more orders into an existing store
+# Run from the repository root: python -m benchmarks.bench_timeseries [--rows 1000000]
+import argparse
+
+import pandas as pd
+from statsmodels.tsa.seasonal import seasonal_decompose
+
+from benchmarks.synthetic import best_of, synthetic_orders
+from timeseries_store import TimeSeriesStore
+
+
+def raw_path(df):
+    df_sorted = df.sort_values('order_date')
+    df_sorted.groupby(df_sorted['order_date'].dt.to_period('M'))['revenue'].sum()
+    daily = df_sorted.set_index('order_date')['revenue'].resample('D').sum()
+    daily = daily.fillna(daily.rolling(7, min_periods=1).mean())
+    seasonal_decompose(daily, model='additive', period=30)
+
+
+def store_path(store):
+    store._series.clear()
+    store.series('M')
+    seasonal_decompose(store.series('D'), model='additive', period=30)
+
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'raw':>8} {'store build':>12} {'store query':>12} {'append 1%':>10} {'daily rows':>11}")
+    for n in args.rows:
+        df = synthetic_orders(n)
+        df['order_date'] = pd.to_datetime(df['order_date'])
+        extra = synthetic_orders(max(1, n // 100), seed=1)
+        store = TimeSeriesStore.from_frame(df)
+        raw = best_of(lambda: raw_path(df))
+        build = best_of(lambda: TimeSeriesStore.from_frame(df))
+        query = best_of(lambda: store_path(store))
+        append = best_of(lambda: TimeSeriesStore(store.daily, store.rows).append(extra))
+        print(f"{n:>10,} {raw:>7.3f}s {build:>11.3f}s {query:>11.3f}s {append:>9.3f}s {len(store.daily):>11,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Retraining cost on synthetic order histories, each case in a fresh `python -m train`
+# process so peak RSS is per run:
+#   cold          full retrain, binary Dataset cache empty (read + encode + bin + train)
+#   cached        the same retrain again, Dataset loaded from the cache
+#   1 thread      cached retrain with num_threads=1
+#   continue 7d   init_model continuation on the last 7 days only
+# Reports wall-clock per stage and peak RSS from each version's training report.
+# Run from the repository root: python -m benchmarks.bench_train [--rows 100000 1000000] [--rounds 200]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+from benchmarks.synthetic import write_synthetic_csv
+from registry import ModelRegistry
+
+
+def run(registry, csv_path, version, cache_dir, *extra):
+    subprocess.run([sys.executable, "-m", "train", csv_path, "--registry", registry.root, "--version", version,
+                    "--cache-dir", cache_dir, *extra], check=True, stdout=subprocess.DEVNULL)
+    return registry.report(version)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'case':<12} {'threads':>7} {'data s':>8} {'train s':>8} {'total s':>8} {'peak MB':>8} "
+          f"{'trees':>6}")
+    with tempfile.TemporaryDirectory() as root:
+        registry = ModelRegistry(os.path.join(root, "registry"))
+        cache_dir = os.path.join(root, "cache")
+        for n in args.rows:
+            csv_path = write_synthetic_csv(os.path.join(root, f"orders-{n}.csv"), n)
+            last = pd.read_csv(csv_path, usecols=['order_date'])['order_date'].max()
+            since = str(pd.Timestamp(last).normalize() - pd.Timedelta(days=6))
+            rounds = ["--rounds", str(args.rounds)]
+            cases = [
+                ("cold", f"cold-{n}", rounds),
+                ("cached", f"cached-{n}", rounds),
+                ("1 thread", f"single-{n}", rounds + ["--threads", "1"]),
+                ("continue 7d", f"continue-{n}", ["--rounds", str(max(1, args.rounds // 10)),
+                                                  "--from-version", f"cold-{n}", "--since", since]),
+            ]
+            for name, version, extra in cases:
+                report = run(registry, csv_path, version, cache_dir, *extra)
+                stages = report["stages"]
+                print(f"{n:>10,} {name:<12} {report['params']['num_threads']:>7} {stages['data']['seconds']:>8.2f} "
+                      f"{stages['train']['seconds']:>8.2f} {report['wall_s']:>8.2f} {report['peak_rss_mb']:>8,.0f} "
+                      f"{report['trees']:>6}")
+            os.remove(csv_path)
+        print(json.dumps(registry.report(f"cold-{args.rows[-1]}")["data"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
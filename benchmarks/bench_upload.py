@@ -0,0 +1,89 @@
+# Wall time and server peak RSS of /upload-csv: buffered JSON vs streamed NDJSON/CSV.
+# Starts uvicorn in a subprocess, uploads a synthetic CSV straight from disk and discards
+# the response as it arrives, then reads the server's VmHWM (peak RSS) from /proc.
+# Run from the repository root: python -m benchmarks.bench_upload [--rows 10000000]
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+import httpx
+
+from benchmarks.synthetic import write_synthetic_csv
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def peak_rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+# Run uvicorn main:app in a subprocess, yield (base_url, pid) once the model is loaded
+@contextmanager
+def serve(*extra_args, env=None):
+    port = free_port()
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+                               "--log-level", "warning", *extra_args], env={**os.environ, **(env or {})})
+    try:
+        base = f"http://127.0.0.1:{port}"
+        for _ in range(600):
+            try:
+                if httpx.get(base + "/ready", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+        yield base, server.pid
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run_case(csv_path, query):
+    with serve() as (base, pid):
+        idle = peak_rss_mb(pid)
+        t0 = time.perf_counter()
+        received = 0
+        with open(csv_path, "rb") as f, httpx.Client(timeout=None) as client:
+            files = {"file": ("orders.csv", f, "text/csv")}
+            with client.stream("POST", base + "/upload-csv" + query, files=files) as response:
+                response.raise_for_status()
+                for block in response.iter_bytes():
+                    received += len(block)
+        return time.perf_counter() - t0, idle, peak_rss_mb(pid), received
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--chunksize', type=int, default=50_000)
+    parser.add_argument('--skip-buffered', action='store_true', help="skip the all-in-memory endpoint (slow at 10M rows)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = write_synthetic_csv(os.path.join(tmp, "orders.csv"), args.rows)
+        print(f"{args.rows:,} rows, {os.path.getsize(csv_path) / 2**20:,.0f} MB CSV")
+        cases = [("streamed ndjson", f"?stream=true&format=ndjson&chunksize={args.chunksize}"),
+                 ("streamed csv", f"?stream=true&format=csv&chunksize={args.chunksize}")]
+        if not args.skip_buffered:
+            cases.insert(0, ("buffered json", ""))
+        print(f"{'mode':<16} {'seconds':>8} {'rows/s':>10} {'idle MB':>8} {'peak MB':>8} {'resp MB':>8}")
+        for name, query in cases:
+            seconds, idle, peak, received = run_case(csv_path, query)
+            print(f"{name:<16} {seconds:>8.1f} {args.rows / seconds:>10,.0f} {idle:>8.0f} {peak:>8.0f} {received / 2**20:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
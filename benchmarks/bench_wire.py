@@ -0,0 +1,92 @@
+# End-to-end rows/sec of batch prediction by wire format, against a real uvicorn server:
+#   json rows      POST /predict-batch, one JSON object per row (pydantic per row)
+#   json columns   POST /predict-columns, one JSON array per field
+#   msgpack        POST /predict-columns, MessagePack columns in, raw float64 bin out
+#   arrow          POST /predict-columns, Arrow IPC stream in and out
+# Times include client-side encoding and decoding of the predictions. The prediction
+# cache is disabled so every request is scored.
+# Run from the repository root: python -m benchmarks.bench_wire [--rows 1000 10000 100000]
+import argparse
+import json
+import time
+
+import httpx
+import msgpack
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import wire
+from benchmarks.bench_upload import serve
+from benchmarks.synthetic import synthetic_orders
+
+
+def sales_inputs(n):
+    df = synthetic_orders(n)
+    dates = pd.to_datetime(df['order_date'])
+    df = df.assign(year=dates.dt.year, month=dates.dt.month, day=dates.dt.day, weekday=dates.dt.weekday)
+    return df[list(wire.FIELD_TYPES)]
+
+
+def arrow_bytes(df):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def cases(df):
+    columns = {col: df[col].tolist() for col in df.columns}
+
+    def json_rows(client):
+        body = json.dumps(df.to_dict('records'))
+        response = client.post("/predict-batch", content=body, headers={"content-type": wire.JSON})
+        return np.array(response.raise_for_status().json()["predictions"]), len(body)
+
+    def json_columns(client):
+        body = json.dumps(columns)
+        response = client.post("/predict-columns", content=body, headers={"content-type": wire.JSON})
+        return np.array(response.raise_for_status().json()["predictions"]), len(body)
+
+    def msgpack_columns(client):
+        body = msgpack.packb(columns)
+        response = client.post("/predict-columns", content=body,
+                               headers={"content-type": wire.MSGPACK, "accept": wire.MSGPACK})
+        return np.frombuffer(msgpack.unpackb(response.raise_for_status().content)["predictions"], '<f8'), len(body)
+
+    def arrow_columns(client):
+        body = arrow_bytes(df)
+        response = client.post("/predict-columns", content=body,
+                               headers={"content-type": wire.ARROW_STREAM, "accept": wire.ARROW_STREAM})
+        table = pa.ipc.open_stream(response.raise_for_status().content).read_all()
+        return table.column("prediction").to_numpy(), len(body)
+
+    return {"json rows": json_rows, "json columns": json_columns, "msgpack": msgpack_columns, "arrow": arrow_columns}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'format':<13} {'request MB':>11} {'seconds':>8} {'rows/s':>10} {'speedup':>8}")
+    with serve(env={"SALES_CACHE_SIZE": "0"}) as (base, _), httpx.Client(base_url=base, timeout=None) as client:
+        for n in args.rows:
+            df = sales_inputs(n)
+            reference = None
+            for name, run in cases(df).items():
+                best = float('inf')
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    prediction, size = run(client)
+                    best = min(best, time.perf_counter() - t0)
+                if reference is None:
+                    reference, baseline = prediction, best
+                assert np.allclose(prediction, reference), name
+                print(f"{n:>9,} {name:<13} {size / 1e6:>11.2f} {best:>8.3f} {n / best:>10,.0f} {baseline / best:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
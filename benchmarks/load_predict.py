@@ -0,0 +1,62 @@
+# Concurrent single-row /predict load test: per-request scoring vs the micro-batcher.
+# Starts uvicorn once per mode and drives it with --concurrency async clients.
+# Run from the repository root: python -m benchmarks.load_predict [--concurrency 64] [--seconds 10]
+import argparse
+import asyncio
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.bench_upload import serve
+from benchmarks.synthetic import synthetic_orders
+from preprocessing import CAT_COLS, NUM_COLS
+
+
+async def drive(base, records, concurrency, seconds):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, timeout=None, limits=limits) as client:
+        async def worker(offset):
+            i = offset
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                response = await client.post("/predict?slim=true", json=records[i % len(records)])
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - t0)
+                i += concurrency
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        stats = (await client.get("/predict/batcher")).json()
+    return latencies, stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--window-ms', type=float, default=2)
+    parser.add_argument('--max-batch', type=int, default=256)
+    args = parser.parse_args()
+
+    df = synthetic_orders(1000).drop(columns=['order_date'])
+    df[['year', 'month', 'day', 'weekday']] = [2022, 8, 11, 3]
+    records = df[NUM_COLS + CAT_COLS].to_dict('records')
+
+    modes = [("per-request", {"SALES_PREDICT_BATCHING": "0"}),
+             ("micro-batched", {"SALES_PREDICT_BATCHING": "1", "SALES_BATCH_WINDOW_MS": str(args.window_ms),
+                                "SALES_BATCH_MAX": str(args.max_batch)})]
+    print(f"{'mode':<14} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'mean batch':>11}")
+    for name, env in modes:
+        with serve(env=env) as (base, _):
+            latencies, stats = asyncio.run(drive(base, records, args.concurrency, args.seconds))
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+        mean_batch = stats["batch_size"]["mean"] if stats["enabled"] else 1.0
+        print(f"{name:<14} {len(latencies) / args.seconds:>8,.0f} {p50:>8.2f} {p99:>8.2f} {mean_batch:>11.1f}")
+        if stats["enabled"]:
+            print("  batch sizes:", stats["batch_size"]["buckets"])
+            print("  queue wait ms:", stats["queue_wait_ms"]["buckets"])
+
+
+if __name__ == "__main__":
+    main()
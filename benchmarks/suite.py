@@ -0,0 +1,187 @@
+# Benchmark suite for preprocessing, model scoring and the FastAPI routes.
+# Every case runs in-process (routes through FastAPI's TestClient) on synthetic orders
+# bootstrapped from the bundled CSV, and the results are written as JSON so runs can be
+# compared across pandas / scikit-learn / LightGBM upgrades.
+#
+# Run from the repository root:
+#   python -m benchmarks.suite --output bench.json
+#   python -m benchmarks.suite --output new.json --compare bench.json --threshold 0.15
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import threading
+import time
+from importlib import metadata
+
+# Route benchmarks must measure scoring, not cache hits
+os.environ.setdefault("SALES_CACHE_SIZE", "0")
+
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+
+import main
+from benchmarks.synthetic import synthetic_orders
+from preprocessing import CAT_COLS, NUM_COLS
+
+PACKAGES = ["numpy", "pandas", "scikit-learn", "lightgbm", "fastapi", "pydantic", "pyarrow"]
+
+
+def environment():
+    versions = {}
+    for name in PACKAGES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return {"python": sys.version.split()[0], "platform": platform.platform(), "cpus": os.cpu_count(),
+            "packages": versions}
+
+
+# Time fn() `repeat` times; every sample is one full call
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def summarize(name, params, rows, samples):
+    median = statistics.median(samples)
+    return {
+        "name": name,
+        "params": params,
+        "rows": rows,
+        "samples": len(samples),
+        "median_s": median,
+        "p99_s": float(np.percentile(samples, 99)),
+        "rows_per_s": rows / median if median else None,
+    }
+
+
+def records_for(n):
+    df = synthetic_orders(n)
+    dates = pd.to_datetime(df['order_date'])
+    df['year'], df['month'], df['day'], df['weekday'] = dates.dt.year, dates.dt.month, dates.dt.day, dates.dt.weekday
+    return df, df[NUM_COLS + CAT_COLS].to_dict('records')
+
+
+def timed_each(fn, payloads):
+    samples = []
+    for payload in payloads:
+        t0 = time.perf_counter()
+        fn(payload)
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+# Spread calls of fn over `concurrency` threads; returns per-call latencies and wall time
+def concurrent(fn, payloads, concurrency):
+    latencies, lock = [], threading.Lock()
+
+    def worker(part):
+        local = timed_each(fn, part)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(payloads[i::concurrency],)) for i in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, time.perf_counter() - t0
+
+
+def run(row_counts, concurrency_levels, quick):
+    client = TestClient(main.app)
+    results = []
+    for n in row_counts:
+        df, records = records_for(n)
+        repeat = 3 if n >= 100_000 else (5 if quick else 15)
+        results.append(summarize("preprocess.plan", {}, n, timed(lambda: main.state.plan.transform(df), repeat)))
+        results.append(summarize("preprocess.dataframe", {}, n, timed(lambda: main.preprocess(df), repeat)))
+        X = main.state.plan.transform(df)
+        results.append(summarize("model.predict", {}, n, timed(lambda: main.state.predictor.predict(X), repeat)))
+        if n <= 100_000:
+            results.append(summarize("POST /predict-batch", {}, n,
+                                     timed(lambda: client.post("/predict-batch", json=records).raise_for_status(), repeat)))
+        csv_bytes = df.drop(columns=['year', 'month', 'day', 'weekday']).to_csv(index=False).encode()
+        results.append(summarize("POST /upload-csv", {}, n, timed(
+            lambda: client.post("/upload-csv", files={"file": ("orders.csv", csv_bytes)}).raise_for_status(), repeat)))
+        results.append(summarize("POST /upload-csv?stream=true", {}, n, timed(
+            lambda: client.post("/upload-csv?stream=true", files={"file": ("orders.csv", csv_bytes)}).raise_for_status(),
+            repeat)))
+
+    _, records = records_for(200 if quick else 2000)
+    for concurrency in concurrency_levels:
+        clients = threading.local()
+
+        def call(record):
+            if not hasattr(clients, "client"):
+                clients.client = TestClient(main.app)
+            clients.client.post("/predict?slim=true", json=record).raise_for_status()
+
+        latencies, wall = concurrent(call, records, concurrency)
+        result = summarize("POST /predict", {"concurrency": concurrency}, 1, latencies)
+        result["requests_per_s"] = len(records) / wall
+        results.append(result)
+    return results
+
+
+def case_id(result):
+    return result["name"] + json.dumps(result["params"], sort_keys=True) + f"@{result['rows']}"
+
+
+# Compare median times against a baseline file; returns the list of regressions
+def compare(results, baseline, threshold):
+    base = {case_id(r): r for r in baseline["results"]}
+    regressions = []
+    print(f"\n{'case':<52} {'baseline':>10} {'current':>10} {'change':>8}")
+    for result in results:
+        old = base.get(case_id(result))
+        if old is None:
+            continue
+        change = result["median_s"] / old["median_s"] - 1
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{case_id(result):<52} {old['median_s'] * 1e3:>8.2f}ms {result['median_s'] * 1e3:>8.2f}ms {change:>+7.1%}{flag}")
+        if flag:
+            regressions.append(case_id(result))
+    return regressions
+
+
+def main_():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[1, 100, 10_000, 100_000])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--quick', action='store_true', help="fewer repeats, for smoke runs")
+    parser.add_argument('--output', default="bench.json")
+    parser.add_argument('--compare', help="baseline JSON from an earlier run")
+    parser.add_argument('--threshold', type=float, default=0.15, help="allowed slowdown before a case counts as a regression")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.concurrency, args.quick)
+    report = {"created_at": time.time(), "environment": environment(), "results": results}
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'case':<52} {'median ms':>10} {'p99 ms':>10} {'rows/s':>12}")
+    for r in results:
+        print(f"{case_id(r):<52} {r['median_s'] * 1e3:>10.2f} {r['p99_s'] * 1e3:>10.2f} {r['rows_per_s'] or 0:>12,.0f}")
+    print(f"wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}")
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main_()
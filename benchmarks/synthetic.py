@@ -0,0 +1,42 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+SOURCE_CSV = "Clean_Women_Ecommerce_Purchase_Data.csv"
+
+
+# Synthetic order data with the same schema and category mix as the bundled CSV.
+# Rows are bootstrapped from the source file, so categorical distributions and
+# category-level aggregates stay realistic; order dates are spread over a year.
+def synthetic_orders(n_rows, seed=0, source=SOURCE_CSV):
+    rng = np.random.default_rng(seed)
+    base = pd.read_csv(source)
+    df = base.iloc[rng.integers(0, len(base), n_rows)].reset_index(drop=True)
+    start = pd.Timestamp("2022-01-01")
+    offsets = rng.integers(0, 365 * 24 * 60, n_rows)
+    df['order_date'] = (start + pd.to_timedelta(offsets, unit='m')).strftime("%Y-%m-%d %H:%M:%S")
+    df['order_id'] = np.arange(n_rows)
+    return df
+
+
+# Write a large synthetic CSV in bounded-memory pieces
+def write_synthetic_csv(path, n_rows, chunk_rows=1_000_000, seed=0):
+    written = 0
+    while written < n_rows:
+        n = min(chunk_rows, n_rows - written)
+        df = synthetic_orders(n, seed=seed + written)
+        df['order_id'] += written
+        df.to_csv(path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += n
+    return path
+
+
+# Best wall time of repeat calls to fn, in seconds
+def best_of(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+from preprocessing import CAT_COLS, NUM_COLS
+
+
+# Canonical cache key for one SalesInput record: numerics as floats (so 5 and 5.0
+# collide), categoricals as given, in a fixed field order
+def record_key(record):
+    return tuple(float(record[col]) for col in NUM_COLS) + tuple(record[col] for col in CAT_COLS)
+
+
+def artifact_fingerprint(paths):
+    fingerprint = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            fingerprint.append((path, None, None))
+    return tuple(fingerprint)
+
+
+# One value per loaded model version, built on first use by build(model) and dropped with
+# the model after a swap. Builds run outside the shared lock, under a lock per model, so a
+# slow build neither blocks other models nor runs twice for the same one; a failed build
+# is retried on the next call.
+class ModelCache:
+    def __init__(self, build):
+        self.build = build
+        self._values = weakref.WeakKeyDictionary()
+        self._building = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self, model):
+        with self._lock:
+            if model in self._values:
+                return self._values[model]
+            building = self._building.setdefault(model, threading.Lock())
+        with building:
+            with self._lock:
+                if model in self._values:
+                    return self._values[model]
+            value = self.build(model)
+            with self._lock:
+                self._values[model] = value
+            return value
+
+
+# In-process LRU + TTL cache of predictions.
+# Bounded to max_entries (least recently used entries are evicted first); entries older
+# than ttl seconds are treated as misses. The whole cache is dropped when any of the
+# watched artifact files changes on disk (checked at most every check_interval seconds).
+class PredictionCache:
+    def __init__(self, max_entries=10_000, ttl=300.0, artifacts=(), check_interval=1.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.artifacts = tuple(artifacts)
+        self.check_interval = check_interval
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._fingerprint = artifact_fingerprint(self.artifacts)
+        self._checked_at = time.monotonic()
+
+    def _check_artifacts(self, now):
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        fingerprint = artifact_fingerprint(self.artifacts)
+        if fingerprint != self._fingerprint:
+            self._fingerprint = fingerprint
+            self._entries.clear()
+            self.invalidations += 1
+
+    # Watch another set of artifact files (after a model swap) and drop what was cached
+    def watch(self, artifacts):
+        with self._lock:
+            self.artifacts = tuple(artifacts)
+            self._fingerprint = artifact_fingerprint(self.artifacts)
+            self._entries.clear()
+            self.invalidations += 1
+
+    def _get(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, stored_at = entry
+        if now - stored_at > self.ttl:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _put(self, key, value, now):
+        self._entries[key] = (value, now)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key):
+        return self.get_many([key])[0]
+
+    def put(self, key, value):
+        self.put_many([key], [value])
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        with self._lock:
+            self._check_artifacts(now)
+            return [self._get(key, now) for key in keys]
+
+    def put_many(self, keys, values):
+        now = time.monotonic()
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._put(key, value, now)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
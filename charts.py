@@ -0,0 +1,59 @@
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from downsample import bin_counts, lttb, ols_line, sample
+
+# Figures for the dashboard with server-side data reduction.
+# Up to FULL_ROWS rows are sent to the browser as they are; above that, scatters are
+# uniformly sampled (the OLS trendline is still fitted on every row), line charts are
+# LTTB-downsampled and histograms are always pre-binned, so the payload stays a few
+# hundred KB however large the upload is. 2D scatters and lines render with WebGL.
+FULL_ROWS = 5_000
+MAX_SCATTER_POINTS = 5_000
+MAX_LINE_POINTS = 2_000
+
+
+def _subtitle(title, shown, total):
+    return title if shown == total else f"{title} ({shown:,} of {total:,} points)"
+
+
+def histogram(values, title, color, label, nbins='auto'):
+    left, width, counts = bin_counts(values, nbins)
+    fig = go.Figure(go.Bar(x=left + width / 2, y=counts, width=width, marker_color=color, name=label,
+                           hovertemplate=f"{label}: %{{x}}<br>count: %{{y}}<extra></extra>"))
+    fig.update_layout(title=title, xaxis_title=label, yaxis_title="count", bargap=0)
+    return fig
+
+
+def scatter(df, x, y, title, color, labels=None, trendline=True, max_points=MAX_SCATTER_POINTS):
+    rows = sample(len(df), max_points) if len(df) > FULL_ROWS else np.arange(len(df))
+    fig = px.scatter(df.iloc[rows], x=x, y=y, title=_subtitle(title, len(rows), len(df)), labels=labels,
+                     color_discrete_sequence=[color], render_mode='webgl')
+    line = ols_line(df[x], df[y]) if trendline else None
+    if line is not None:
+        slope, intercept = line
+        ends = np.array([np.nanmin(df[x].to_numpy(dtype=float)), np.nanmax(df[x].to_numpy(dtype=float))])
+        fig.add_trace(go.Scattergl(x=ends, y=slope * ends + intercept, mode='lines', name="OLS trend",
+                                   line=dict(color=color), showlegend=False,
+                                   hovertemplate=f"OLS trend<br>y = {slope:.4g} * x + {intercept:.4g}<extra></extra>"))
+    return fig
+
+
+def scatter_3d(df, x, y, z, color, title, max_points=MAX_SCATTER_POINTS):
+    rows = sample(len(df), max_points) if len(df) > FULL_ROWS else np.arange(len(df))
+    return px.scatter_3d(df.iloc[rows], x=x, y=y, z=z, color=color, title=_subtitle(title, len(rows), len(df)),
+                         color_continuous_scale='Viridis')
+
+
+# series: DataFrame sorted by its x column
+def line(series, x, y, title, color, max_points=MAX_LINE_POINTS):
+    rows = lttb(series[x].to_numpy(), series[y].to_numpy(), max_points) if len(series) > FULL_ROWS \
+        else np.arange(len(series))
+    return px.line(series.iloc[rows], x=x, y=y, title=_subtitle(title, len(rows), len(series)),
+                   color_discrete_sequence=[color], render_mode='webgl')
+
+
+# Data points carried by a figure (what the browser has to draw)
+def point_count(fig):
+    return sum(len(trace.x) if trace.x is not None else 0 for trace in fig.data)
@@ -0,0 +1,60 @@
+import numpy as np
+
+
+def _as_numeric(x):
+    x = np.asarray(x)
+    if x.dtype.kind == 'M':
+        return x.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+# Largest-Triangle-Three-Buckets: indices of n_out points that keep the visual shape of a
+# line. x must be sorted. The first and last points are always kept.
+def lttb(x, y, n_out):
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x, y = _as_numeric(x), np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # average of the next bucket (or the last point) is the third triangle vertex
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[end:next_end].mean(), y[end:next_end].mean()
+        area = np.abs((x[a] - cx) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (cy - y[a]))
+        a = start + int(np.nanargmax(area)) if np.isfinite(area).any() else start
+        selected[i + 1] = a
+    return selected
+
+
+# Deterministic uniform sample of row positions, in their original order
+def sample(n, n_out, seed=0):
+    if n_out >= n:
+        return np.arange(n)
+    return np.sort(np.random.default_rng(seed).choice(n, n_out, replace=False))
+
+
+# Histogram counts over finite values: (left edges, widths, counts)
+def bin_counts(values, bins='auto', max_bins=100):
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    if len(values) == 0:
+        return np.array([]), np.array([]), np.array([], dtype=np.int64)
+    edges = np.histogram_bin_edges(values, bins=bins)
+    if len(edges) - 1 > max_bins:
+        edges = np.histogram_bin_edges(values, bins=max_bins)
+    counts, edges = np.histogram(values, bins=edges)
+    return edges[:-1], np.diff(edges), counts
+
+
+# Ordinary least squares y = slope * x + intercept over finite pairs
+def ols_line(x, y):
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    keep = np.isfinite(x) & np.isfinite(y)
+    if keep.sum() < 2 or np.ptp(x[keep]) == 0:
+        return None
+    slope, intercept = np.polyfit(x[keep], y[keep], 1)
+    return slope, intercept
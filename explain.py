@@ -0,0 +1,50 @@
+import numpy as np
+
+from preprocessing import CAT_COLS, NUM_COLS
+
+# SalesInput fields, in request order
+FIELDS = NUM_COLS + CAT_COLS
+# TreeSHAP over 1000 trees costs ~1 ms per row, so a chunk is about a second of work
+EXPLAIN_CHUNK_ROWS = 1_000
+
+
+# Booster feature -> SalesInput field, as a (n_features + 1) x (len(FIELDS) + 1) 0/1 matrix.
+# Numeric features map to themselves, one-hot columns to their categorical field; the last
+# row/column carries the bias term pred_contrib appends.
+def field_matrix(feature_names):
+    matrix = np.zeros((len(feature_names) + 1, len(FIELDS) + 1))
+    for i, name in enumerate(feature_names):
+        if name in NUM_COLS:
+            field = name
+        else:
+            field = next((col for col in CAT_COLS if name.startswith(col + "_")), None)
+            if field is None:
+                raise ValueError(f"Feature {name} does not belong to any SalesInput field")
+        matrix[i, FIELDS.index(field)] = 1
+    matrix[-1, -1] = 1
+    return matrix
+
+
+# Per-field TreeSHAP contributions from LightGBM's pred_contrib.
+# explain(X) returns (n_rows, len(FIELDS) + 1): one column per field plus the base value;
+# each row sums to the raw prediction. Inputs are split into chunks of chunk_rows; with a
+# thread pool the chunks are scored in parallel (LightGBM releases the GIL), one OpenMP
+# thread each so the pool does not oversubscribe the cores. Only one chunk's 60-column
+# contribution matrix per thread exists before it is folded down to the fields.
+class Explainer:
+    def __init__(self, booster, pool=None, chunk_rows=EXPLAIN_CHUNK_ROWS):
+        self.booster = booster
+        self.matrix = field_matrix(booster.feature_name())
+        self.pool = pool
+        self.chunk_rows = chunk_rows
+
+    def _chunk(self, X, threads=0):
+        return self.booster.predict(X, pred_contrib=True, num_threads=threads) @ self.matrix
+
+    def explain(self, X):
+        chunks = [X[start:start + self.chunk_rows] for start in range(0, len(X), self.chunk_rows)]
+        if not chunks:
+            return np.empty((0, self.matrix.shape[1]))
+        if len(chunks) == 1 or self.pool is None:
+            return np.vstack([self._chunk(chunk) for chunk in chunks])
+        return np.vstack(list(self.pool.map(self._chunk, chunks, [1] * len(chunks))))
@@ -0,0 +1,168 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import UnknownCategory
+
+STORE_FEATURES = ['category_avg_price', 'category_total_revenue', 'category_popularity']
+# Order columns an update reads
+ORDER_COLUMNS = ['category_id', 'unit_price', 'revenue']
+SEED_CSV = "Clean_Women_Ecommerce_Purchase_Data.csv"
+
+
+# category_id values -> STORE_FEATURES columns, shape (len(STORE_FEATURES), n), NaN for ids
+# the table does not know. One np.take per feature on the transposed table; integer ids
+# (the usual case) skip numeric coercion.
+def lookup(table, category_ids):
+    ids = np.asarray(category_ids)
+    if ids.dtype.kind not in 'iu':
+        ids = pd.to_numeric(pd.Series(category_ids, copy=False), errors='coerce').to_numpy(dtype=np.float64)
+        ids = np.where(np.isfinite(ids), ids, -1).astype(np.int64)
+    valid = (ids >= 0) & (ids < len(table))
+    index = np.where(valid, ids, len(table)).astype(np.intp)
+    # trailing NaN row catches ids outside the table
+    columns = np.vstack([table, np.full((1, table.shape[1]), np.nan)]).T.copy()
+    return np.stack([np.take(column, index) for column in columns])
+
+
+# Fill missing STORE_FEATURES columns (or null values in them) from the table; overwrite=True
+# replaces every value. Returns a new frame, or the same one when nothing is missing.
+# Raises UnknownCategory for rows that need a value from a category_id the table lacks.
+def fill_frame(df, table, overwrite=False):
+    need = {}
+    for col in STORE_FEATURES:
+        if overwrite or col not in df.columns:
+            need[col] = np.ones(len(df), dtype=bool)
+        else:
+            missing = df[col].isna().to_numpy()
+            if missing.any():
+                need[col] = missing
+    if not need:
+        return df
+    values = lookup(table, df['category_id'])
+    rows = np.logical_or.reduce(list(need.values()))
+    unknown = rows & np.isnan(values[0])
+    if unknown.any():
+        raise UnknownCategory({'category_id': pd.unique(df['category_id'].to_numpy()[unknown]).tolist()})
+    filled = {}
+    for col, mask in need.items():
+        column = values[STORE_FEATURES.index(col)]
+        filled[col] = column if mask.all() else np.where(mask, column, pd.to_numeric(df[col]).to_numpy(np.float64))
+    return df.assign(**filled)
+
+
+# Per-category_id aggregates the model takes as inputs, served from one small array.
+# Seeded from the aggregate columns of the order CSV (the values the model was trained on)
+# and updated incrementally from ingested orders:
+#   category_avg_price      running mean of unit_price over the category's orders
+#   category_total_revenue  seed total plus the revenue of every ingested order
+#   category_popularity     seed popularity scaled by the growth of the category's order
+#                           count (new categories use the overall popularity per order)
+# `table` is rebuilt after every update and replaced in one assignment, so readers always
+# see a whole batch or none of it. With a path, updates are persisted to a .npz file.
+class CategoryFeatureStore:
+    def __init__(self, orders, price_sum, revenue, base_orders, base_popularity, path=None):
+        self.orders = np.asarray(orders, dtype=np.float64)
+        self.price_sum = np.asarray(price_sum, dtype=np.float64)
+        self.revenue = np.asarray(revenue, dtype=np.float64)
+        self.base_orders = np.asarray(base_orders, dtype=np.float64)
+        self.base_popularity = np.asarray(base_popularity, dtype=np.float64)
+        self.path = path
+        self.ingested = 0
+        self._lock = threading.Lock()
+        self.table = self._build()
+
+    @classmethod
+    def from_frame(cls, df):
+        ids = df['category_id'].to_numpy(dtype=np.int64)
+        n = int(ids.max()) + 1 if len(ids) else 0
+        orders = np.bincount(ids, minlength=n).astype(np.float64)
+        seed = np.zeros((n, len(STORE_FEATURES)))
+        first = df.groupby('category_id')[STORE_FEATURES].first()
+        seed[first.index.to_numpy(dtype=np.intp)] = first.to_numpy(dtype=np.float64)
+        return cls(orders, seed[:, 0] * orders, seed[:, 1], orders.copy(), seed[:, 2])
+
+    @classmethod
+    def from_csv(cls, path=SEED_CSV):
+        return cls.from_frame(pd.read_csv(path, usecols=['category_id'] + STORE_FEATURES))
+
+    # The persisted store at `path` if there is one, else seeded from the CSV (and persisted
+    # on the first update)
+    @classmethod
+    def open(cls, path=None, seed_csv=SEED_CSV):
+        if path and os.path.exists(path):
+            with np.load(path) as arrays:
+                store = cls(arrays['orders'], arrays['price_sum'], arrays['revenue'], arrays['base_orders'],
+                            arrays['base_popularity'])
+        else:
+            store = cls.from_csv(seed_csv)
+        store.path = path
+        return store
+
+    def _build(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_price = self.price_sum / self.orders
+            per_order = self.base_popularity.sum() / self.base_orders.sum()
+            popularity = np.where(self.base_orders > 0, self.base_popularity * self.orders / self.base_orders,
+                                  self.orders * per_order)
+        table = np.column_stack([avg_price, self.revenue, popularity])
+        table[self.orders == 0] = np.nan
+        return table
+
+    # Fold a batch of orders (category_id, unit_price, revenue) into the aggregates
+    def update(self, df):
+        missing = [col for col in ORDER_COLUMNS if col not in df.columns]
+        if missing:
+            raise ValueError(f"Orders are missing columns: {missing}")
+        df = df[ORDER_COLUMNS].apply(pd.to_numeric, errors='coerce').dropna()
+        ids = df['category_id'].to_numpy(dtype=np.int64)
+        if (ids < 0).any():
+            raise ValueError("category_id must be non-negative")
+        with self._lock:
+            n = max(len(self.orders), int(ids.max()) + 1 if len(ids) else 0)
+
+            def grow(values):
+                return np.pad(values, (0, n - len(values)))
+
+            self.orders = grow(self.orders) + np.bincount(ids, minlength=n)
+            self.price_sum = grow(self.price_sum) + np.bincount(ids, df['unit_price'].to_numpy(), minlength=n)
+            self.revenue = grow(self.revenue) + np.bincount(ids, df['revenue'].to_numpy(), minlength=n)
+            self.base_orders = grow(self.base_orders)
+            self.base_popularity = grow(self.base_popularity)
+            self.ingested += len(ids)
+            self.table = self._build()
+            if self.path:
+                self.save(self.path)
+        return len(ids)
+
+    def save(self, path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            np.savez(f, orders=self.orders, price_sum=self.price_sum, revenue=self.revenue,
+                     base_orders=self.base_orders, base_popularity=self.base_popularity)
+        os.replace(tmp, path)
+
+    def fill(self, df, overwrite=False):
+        return fill_frame(df, self.table, overwrite)
+
+    # Single SalesInput dict: None fields are filled from the table
+    def fill_record(self, record):
+        if all(record.get(col) is not None for col in STORE_FEATURES):
+            return record
+        table, category_id = self.table, record['category_id']
+        if not 0 <= category_id < len(table) or np.isnan(table[category_id, 0]):
+            raise UnknownCategory({'category_id': [category_id]})
+        row = table[category_id]
+        return {**record, **{col: float(row[j]) if record.get(col) is None else record[col]
+                             for j, col in enumerate(STORE_FEATURES)}}
+
+    def to_dict(self):
+        table = self.table
+        return {
+            "ingested_orders": self.ingested,
+            "categories": [{"category_id": i, "orders": int(self.orders[i]),
+                            **{col: float(table[i, j]) for j, col in enumerate(STORE_FEATURES)}}
+                           for i in range(len(table)) if self.orders[i] > 0],
+        }
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+
+# Row index for the dashboard filters, built once per upload.
+# Keeps the frame sorted by order_date (copied only if it is not already in date order), so
+# a date range is a contiguous slice found by binary search, plus the ascending row
+# positions of every category and SKU.
+# select() combines date range, category/SKU membership and a minimum revenue and returns
+# either a slice (zero-copy view) or an array of positions into the sorted frame.
+class FilterIndex:
+    def __init__(self, df, keys=('category', 'sku')):
+        dates = pd.to_datetime(df['order_date']).to_numpy(dtype='datetime64[ns]')
+        # NaT sorts last, so dated rows are exactly frame[:n_dated]
+        order = np.argsort(dates, kind='stable')
+        if (order == np.arange(len(order))).all():
+            self.frame, self.dates = df, dates
+        else:
+            self.frame, self.dates = df.iloc[order].reset_index(drop=True), dates[order]
+        self.n_dated = int(len(dates) - np.isnat(dates).sum())
+        self.revenue = self.frame['revenue'].to_numpy(dtype=np.float64) if 'revenue' in df.columns else None
+        # per key: the distinct values, a value code for every row and the ascending
+        # positions of every value
+        self.uniques, self.codes, self.positions = {}, {}, {}
+        for key in keys:
+            if key in df.columns:
+                self.uniques[key], self.codes[key], self.positions[key] = self._positions(self.frame[key])
+
+    @staticmethod
+    def _positions(column):
+        codes, uniques = pd.factorize(column, sort=True)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        return pd.Index(uniques), codes, {value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)}
+
+    def values(self, key):
+        return self.uniques[key].tolist() if key in self.uniques else []
+
+    # start/end are inclusive dates; None leaves that side open
+    def select(self, start=None, end=None, categories=None, skus=None, revenue_min=None):
+        lo, hi = 0, len(self.frame)
+        if start is not None or end is not None:
+            dated = self.dates[:self.n_dated]
+            hi = self.n_dated
+            if start is not None:
+                lo = int(np.searchsorted(dated, np.datetime64(pd.Timestamp(start).normalize(), 'ns'), 'left'))
+            if end is not None:
+                end = np.datetime64(pd.Timestamp(end).normalize() + pd.Timedelta(days=1), 'ns')
+                hi = int(np.searchsorted(dated, end, 'left'))
+        hi = max(lo, hi)
+
+        rows = None
+        wanted = {key: [value for value in values if value in self.positions[key]]
+                  for key, values in (('category', categories), ('sku', skus)) if values and key in self.positions}
+        if wanted:
+            # gather the positions of the most selective key, cut to the date slice with two
+            # binary searches per value, then check the other key by code
+            first = min(wanted, key=lambda key: sum(len(self.positions[key][value]) for value in wanted[key]))
+            parts = []
+            for value in wanted[first]:
+                members = self.positions[first][value]
+                parts.append(members[np.searchsorted(members, lo):np.searchsorted(members, hi)])
+            if len(parts) == 1:
+                rows = parts[0]
+            else:
+                rows = np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+            for key in wanted:
+                if key != first:
+                    codes = self.uniques[key].get_indexer(wanted[key])
+                    rows = rows[np.isin(self.codes[key][rows], codes)]
+
+        if revenue_min is not None and self.revenue is not None:
+            if rows is None:
+                rows = lo + np.flatnonzero(self.revenue[lo:hi] >= revenue_min)
+            else:
+                rows = rows[self.revenue[rows] >= revenue_min]
+        return slice(lo, hi) if rows is None else rows
+
+    def view(self, selection):
+        return self.frame.iloc[selection]
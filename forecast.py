@@ -0,0 +1,114 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import DATE_PARTS, NUM_COLS
+
+CATALOG_CSV = "Clean_Women_Ecommerce_Purchase_Data.csv"
+PRODUCT_KEYS = ['sku', 'color', 'size', 'category']
+# Order-level features are the median over a product's orders; category-level ones are constant
+ORDER_FEATURES = ['unit_price', 'quantity', 'age', 'discount', 'customer_rating', 'stock']
+CATEGORY_FEATURES = ['category_id', 'category_avg_price', 'category_total_revenue', 'category_popularity']
+DEFAULT_HOLIDAY = "No Holiday"
+FORECAST_BATCH_ROWS = 100_000
+
+
+# Products to forecast, derived from historical orders.
+# `products` has one row per (sku, color, size, category) that was actually ordered;
+# `skus` has one row per SKU (its most frequent category) so every SKU x color x size
+# combination can be crossed on demand.
+class ProductCatalog:
+    def __init__(self, products, skus):
+        self.products = products
+        self.skus = skus
+        self.colors = sorted(products['color'].unique().tolist())
+        self.sizes = sorted(products['size'].unique().tolist())
+
+    @classmethod
+    def from_frame(cls, df):
+        grouped = df.groupby(PRODUCT_KEYS, sort=True)
+        products = grouped[ORDER_FEATURES].median().join(grouped[CATEGORY_FEATURES].first()).reset_index()
+        modal = df.groupby(['sku', 'category']).size().reset_index(name='orders')
+        modal = modal.sort_values(['sku', 'orders'], ascending=[True, False]).drop_duplicates('sku')
+        per_sku = df.groupby('sku')[ORDER_FEATURES].median()
+        per_category = df.groupby('category')[CATEGORY_FEATURES].first()
+        skus = modal[['sku', 'category']].join(per_sku, on='sku').join(per_category, on='category')
+        return cls(products, skus.reset_index(drop=True))
+
+    @classmethod
+    def from_csv(cls, path=CATALOG_CSV):
+        return cls.from_frame(pd.read_csv(path, usecols=PRODUCT_KEYS + ORDER_FEATURES + CATEGORY_FEATURES))
+
+    # Products matching the filters (None = any). cross=True pairs every selected SKU with
+    # every selected color and size instead of only the combinations seen in the orders.
+    def select(self, skus=None, colors=None, sizes=None, categories=None, cross=False):
+        if not cross:
+            products = self.products
+            keep = np.ones(len(products), dtype=bool)
+            for col, values in (('sku', skus), ('color', colors), ('size', sizes), ('category', categories)):
+                if values:
+                    keep &= products[col].isin(values).to_numpy()
+            return products[keep].reset_index(drop=True)
+
+        base = self.skus
+        keep = np.ones(len(base), dtype=bool)
+        if skus:
+            keep &= base['sku'].isin(skus).to_numpy()
+        if categories:
+            keep &= base['category'].isin(categories).to_numpy()
+        base = base[keep]
+        colors = [c for c in self.colors if not colors or c in colors]
+        sizes = [s for s in self.sizes if not sizes or s in sizes]
+        n_variants = len(colors) * len(sizes)
+        products = base.iloc[np.repeat(np.arange(len(base)), n_variants)].reset_index(drop=True)
+        products['color'] = np.tile(np.repeat(colors, len(sizes)), len(base))
+        products['size'] = np.tile(sizes, len(colors) * len(base))
+        return products[PRODUCT_KEYS + ORDER_FEATURES + CATEGORY_FEATURES]
+
+
+# Scaled feature rows for the products, with the date parts left at 0
+def product_features(plan, products, holiday_type=DEFAULT_HOLIDAY, unknown=None):
+    return plan.transform(products.assign(holiday_type=holiday_type, **{part: 0 for part in DATE_PARTS}),
+                          unknown=unknown)
+
+
+# Feature matrix for every (date, product) pair, date-major: row d * n_products + p.
+# The products were transformed once; each date repeats those rows and only the scaled
+# year/month/day/weekday columns differ.
+def grid_features(plan, base, dates, out=None):
+    n_days, n_products = len(dates), len(base)
+    X = plan.empty(n_days * n_products) if out is None else out[:n_days * n_products]
+    grid = X.reshape(n_days, n_products, plan.n_features)
+    grid[:] = base
+    parts = {'year': dates.year, 'month': dates.month, 'day': dates.day, 'weekday': dates.weekday}
+    for i, col in enumerate(NUM_COLS):
+        pos = plan.num_pos[i]
+        if col in parts and pos >= 0:
+            grid[:, :, pos] = ((np.asarray(parts[col], dtype=np.float64) - plan.mean[i]) / plan.scale[i])[:, None]
+    return X
+
+
+# Score the grid in blocks of whole days (about batch_rows rows each) through one reused
+# buffer; yields (dates, predictions shaped days x products)
+def score_grid(plan, predictor, base, dates, batch_rows=FORECAST_BATCH_ROWS, num_iteration=None):
+    days_per_block = max(1, batch_rows // max(1, len(base)))
+    buffer = plan.empty(min(len(dates), days_per_block) * len(base))
+    for start in range(0, len(dates), days_per_block):
+        block = dates[start:start + days_per_block]
+        X = grid_features(plan, base, block, out=buffer)
+        yield block, predictor.predict(X, num_iteration=num_iteration).reshape(len(block), len(base))
+
+
+# Per-row detail lines for one block, in the /upload-csv stream formats
+def detail_lines(products, dates, predictions, fmt):
+    if fmt == "csv":
+        prefixes = [f"{row.sku},{row.color},{row.size},{row.category}," for row in products.itertuples()]
+        return "".join(f"{day},{prefix}{p!r}\n" for day, row in zip(dates.strftime("%Y-%m-%d"), predictions.tolist())
+                       for prefix, p in zip(prefixes, row))
+    prefixes = [f'"sku":{json.dumps(row.sku)},"color":{json.dumps(row.color)},'
+                f'"size":{json.dumps(row.size)},"category":{json.dumps(row.category)}'
+                for row in products.itertuples()]
+    return "".join(f'{{"date":"{day}",{prefix},"prediction":{p!r}}}\n'
+                   for day, row in zip(dates.strftime("%Y-%m-%d"), predictions.tolist())
+                   for prefix, p in zip(prefixes, row))
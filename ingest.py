@@ -0,0 +1,159 @@
+import csv
+import io
+import os
+
+import pandas as pd
+
+from preprocessing import CAT_COLS, NUM_COLS
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; CSV then falls back to pandas
+    pa = None
+
+# Columns the model needs (order_date is expanded into year/month/day/weekday)
+MODEL_COLUMNS = NUM_COLS + CAT_COLS + ['order_date']
+# Column the model predicts, read alongside MODEL_COLUMNS for training and evaluation
+TARGET = 'revenue'
+
+FORMATS = ('csv', 'parquet', 'arrow')
+EXTENSIONS = {'.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet',
+              '.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow', '.arrows': 'arrow'}
+CONTENT_TYPES = {'text/csv': 'csv', 'application/vnd.apache.parquet': 'parquet',
+                 'application/x-parquet': 'parquet', 'application/vnd.apache.arrow.file': 'arrow',
+                 'application/vnd.apache.arrow.stream': 'arrow'}
+
+
+# Pick the input format from the upload's file name, then its content type; default CSV
+def detect_format(filename=None, content_type=None):
+    ext = os.path.splitext(filename or '')[1].lower()
+    if ext in EXTENSIONS:
+        return EXTENSIONS[ext]
+    return CONTENT_TYPES.get((content_type or '').split(';')[0].strip(), 'csv')
+
+
+def _require_pyarrow(fmt):
+    if pa is None:
+        raise ValueError(f"Reading {fmt} input requires pyarrow")
+
+
+def _project(names, columns):
+    return None if columns is None else [c for c in names if c in columns]
+
+
+def _csv_header(source):
+    position = source.tell()
+    first_line = source.readline()
+    source.seek(position)
+    if isinstance(first_line, bytes):
+        first_line = first_line.decode('utf-8-sig')
+    return next(csv.reader([first_line]), [])
+
+
+# Arrow IPC comes in two flavours: the random-access file format (.arrow/.feather v2)
+# and the streaming format; try the file footer first.
+def _open_ipc(source):
+    position = source.tell()
+    try:
+        return pa.ipc.open_file(source)
+    except pa.ArrowInvalid:
+        source.seek(position)
+        return pa.ipc.open_stream(source)
+
+
+# Arrow table -> DataFrame with the `categorical` string columns dictionary-encoded, so they
+# arrive as pandas categoricals and preprocessing maps a few codes instead of every value
+def _to_pandas(table, categorical=None):
+    for name in categorical or ():
+        if name in table.column_names:
+            i = table.column_names.index(name)
+            if pa.types.is_string(table.schema.field(i).type) or pa.types.is_large_string(table.schema.field(i).type):
+                table = table.set_column(i, name, pc.dictionary_encode(table.column(i)))
+    return table.to_pandas()
+
+
+def _pandas_dtypes(names, categorical):
+    return {name: 'category' for name in names if name in (categorical or ())} or None
+
+
+# Read an upload (seekable binary file object) into a DataFrame.
+# `columns` limits parsing to the given names (those missing from the file are skipped);
+# `categorical` names columns to return as pandas categoricals (e.g. CAT_COLS for scoring).
+def read_table(source, fmt='csv', columns=None, categorical=None) -> pd.DataFrame:
+    if fmt == 'csv':
+        names = _csv_header(source)
+        include = _project(names, columns)
+        if pa is None:
+            return pd.read_csv(source, usecols=include, dtype=_pandas_dtypes(names, categorical))
+        # the CSV reader builds the dictionaries while parsing
+        types = {name: pa.dictionary(pa.int32(), pa.string()) for name in names if name in (categorical or ())}
+        table = pa_csv.read_csv(source, read_options=pa_csv.ReadOptions(use_threads=True),
+                                convert_options=pa_csv.ConvertOptions(include_columns=include, column_types=types))
+        return table.to_pandas()
+    if fmt == 'parquet':
+        _require_pyarrow(fmt)
+        parquet = pq.ParquetFile(source)
+        return _to_pandas(parquet.read(columns=_project(parquet.schema_arrow.names, columns)), categorical)
+    if fmt == 'arrow':
+        _require_pyarrow(fmt)
+        table = _open_ipc(source).read_all()
+        include = _project(table.column_names, columns)
+        return _to_pandas(table if include is None else table.select(include), categorical)
+    raise ValueError(f"Unsupported input format: {fmt}")
+
+
+# Iterate an upload as DataFrames of at most `chunksize` rows
+def iter_chunks(source, fmt='csv', chunksize=50_000, columns=None, categorical=None):
+    if fmt == 'csv':
+        names = _csv_header(source)
+        yield from pd.read_csv(source, chunksize=chunksize, usecols=_project(names, columns),
+                               dtype=_pandas_dtypes(names, categorical))
+        return
+    _require_pyarrow(fmt)
+    if fmt == 'parquet':
+        parquet = pq.ParquetFile(source)
+        batches = parquet.iter_batches(batch_size=chunksize, columns=_project(parquet.schema_arrow.names, columns))
+    elif fmt == 'arrow':
+        reader = _open_ipc(source)
+        include = _project(reader.schema.names, columns)
+        if isinstance(reader, pa.ipc.RecordBatchFileReader):
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        else:
+            batches = reader
+        if include is not None:
+            batches = (batch.select(include) for batch in batches)
+    else:
+        raise ValueError(f"Unsupported input format: {fmt}")
+    # Record batches can be larger than chunksize; slice them so memory stays bounded
+    for batch in batches:
+        for start in range(0, batch.num_rows, chunksize):
+            yield _to_pandas(pa.Table.from_batches([batch.slice(start, chunksize)]), categorical)
+
+
+# Read an in-memory upload (e.g. Streamlit's UploadedFile) without decoding it to str first
+def read_bytes(data, filename=None, content_type=None, columns=None, categorical=None) -> pd.DataFrame:
+    return read_table(io.BytesIO(data), detect_format(filename, content_type), columns=columns, categorical=categorical)
+
+
+# Orders from CSV, Parquet or Arrow files, with categoricals dictionary-encoded, in date order
+def load_orders(paths, target=TARGET):
+    frames = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            frames.append(read_table(f, detect_format(path), columns=MODEL_COLUMNS + [target], categorical=CAT_COLS))
+    df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+    df['order_date'] = pd.to_datetime(df['order_date'])
+    df = df.dropna(subset=['order_date', target])
+    return df.sort_values('order_date', kind='stable', ignore_index=True)
+
+
+# Rows of the last `valid_days` days (by order date) are held out for evaluation
+def split_holdout(df, valid_days):
+    if not valid_days:
+        return df, df.iloc[:0]
+    cutoff = df['order_date'].max().normalize() - pd.Timedelta(days=valid_days - 1)
+    split = int(df['order_date'].searchsorted(cutoff))
+    return df.iloc[:split], df.iloc[split:]
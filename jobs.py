@@ -0,0 +1,259 @@
+import io
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from artifacts import BUNDLE_FILE, ModelState
+from feature_store import fill_frame
+from preprocessing import CAT_COLS
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobNotFound(Exception):
+    pass
+
+
+# Worker-process state, loaded once per process by the pool initializer
+_worker = {}
+
+
+def _init_worker(model_file, encoder_file, scaler_file):
+    # the compiled bundle lives next to the model (the working directory or a registry version)
+    state = ModelState(mode="eager", files=(model_file, encoder_file, scaler_file),
+                       bundle_path=os.path.join(os.path.dirname(model_file), BUNDLE_FILE))
+    _worker['plan'] = state.plan
+    _worker['predictor'] = state.predictor
+
+
+# Parse and score one byte range of the spooled CSV inside a worker process.
+# Predictions are written to their own part file; the parent only concatenates parts.
+# Missing category aggregates are filled from the feature store table sent with the range.
+def _score_range(input_path, header, start, end, part_path, category_table=None):
+    with open(input_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    df = pd.read_csv(io.BytesIO(header + data), dtype={col: 'category' for col in CAT_COLS})
+    if category_table is not None:
+        df = fill_frame(df, category_table)
+    prediction = _worker['predictor'].predict(_worker['plan'].transform(df))
+    with open(part_path, 'w') as out:
+        out.writelines(f"{p!r}\n" for p in prediction.tolist())
+    return len(prediction)
+
+
+# Split a CSV into ~chunk_bytes ranges that end on line boundaries.
+# Assumes no quoted field spans several lines, which holds for order exports.
+def split_csv_ranges(path, chunk_bytes):
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, 'rb') as f:
+        header = f.readline()
+        start = f.tell()
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return header, ranges
+
+
+class Job:
+    def __init__(self, job_id, directory):
+        self.id = job_id
+        self.directory = directory
+        self.status = "queued"
+        self.error = None
+        self.chunks_total = 0
+        self.chunks_done = 0
+        self.rows = 0
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def input_path(self):
+        return os.path.join(self.directory, "input.csv")
+
+    @property
+    def result_path(self):
+        return os.path.join(self.directory, "result.csv")
+
+    @property
+    def status_path(self):
+        return os.path.join(self.directory, "status.json")
+
+    # Status is mirrored to the spool directory so any API worker process can answer for it
+    def save(self):
+        tmp = f"{self.status_path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, self.status_path)
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, "status.json")) as f:
+            state = json.load(f)
+        job = cls(state["job_id"], directory)
+        for field in ("status", "error", "chunks_total", "chunks_done", "rows", "created_at", "started_at", "finished_at"):
+            setattr(job, field, state[field])
+        return job
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": self.chunks_done / self.chunks_total if self.chunks_total else 0.0,
+            "chunks_done": self.chunks_done,
+            "chunks_total": self.chunks_total,
+            "rows": self.rows,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+# Background batch scoring.
+# Uploads are spooled to disk, queued in a bounded queue and run one job at a time by a
+# dispatcher thread that fans each job's byte ranges out to a process pool. Each worker
+# process loads the booster, encoder and scaler once, so the API process never holds the
+# GIL for parsing or scoring large inputs. Jobs submitted to another uvicorn worker are
+# looked up through their status file in the shared spool directory.
+class JobManager:
+    def __init__(self, spool_dir, artifacts, max_workers=None, max_queued=8,
+                 chunk_bytes=8 * 2**20, keep_finished=100, features=None):
+        self.spool_dir = spool_dir
+        self.artifacts = artifacts
+        self.features = features
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_bytes = chunk_bytes
+        self.keep_finished = keep_finished
+        self.jobs = {}
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_artifacts = None
+        self._dispatcher = None
+
+    def _start(self):
+        with self._lock:
+            if self._dispatcher is None:
+                os.makedirs(self.spool_dir, exist_ok=True)
+                self._pool = self._new_pool()
+                self._dispatcher = threading.Thread(target=self._run, name="job-dispatcher", daemon=True)
+                self._dispatcher.start()
+
+    def _new_pool(self):
+        self._pool_artifacts = self.artifacts
+        # spawn: forking a threaded server process is not safe
+        return ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker, initargs=self.artifacts)
+
+    # Score jobs that start from now on with other artifacts (after a model swap). The
+    # running job finishes on its pool; the pool is replaced before the next job starts.
+    def use_artifacts(self, artifacts):
+        with self._lock:
+            self.artifacts = tuple(artifacts)
+
+    def submit(self, fileobj):
+        if self._queue.full():
+            raise JobQueueFull(f"Job queue is full ({self._queue.maxsize} jobs pending)")
+        self._start()
+        job_id = uuid.uuid4().hex
+        job = Job(job_id, os.path.join(self.spool_dir, job_id))
+        os.makedirs(job.directory)
+        with open(job.input_path, 'wb') as out:
+            shutil.copyfileobj(fileobj, out, 2**20)
+        job.save()
+        with self._lock:
+            self.jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self.jobs[job.id]
+            shutil.rmtree(job.directory, ignore_errors=True)
+            raise JobQueueFull(f"Job queue is full ({self._queue.maxsize} jobs pending)")
+        return job
+
+    def get(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is not None:
+            return job
+        # job ids are uuid4 hex; anything else must not reach the filesystem
+        if len(job_id) != 32 or not all(c in "0123456789abcdef" for c in job_id):
+            raise JobNotFound(job_id)
+        try:
+            return Job.load(os.path.join(self.spool_dir, job_id))
+        except (OSError, ValueError, KeyError):
+            raise JobNotFound(job_id)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                if self._pool_artifacts != self.artifacts:
+                    self._pool.shutdown(wait=False)
+                    self._pool = self._new_pool()
+            try:
+                self._score(job)
+                job.status = "done"
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished_at = time.time()
+                job.save()
+                self._evict()
+
+    def _score(self, job):
+        job.status = "running"
+        job.started_at = time.time()
+        header, ranges = split_csv_ranges(job.input_path, self.chunk_bytes)
+        job.chunks_total = len(ranges)
+        job.save()
+        parts = [os.path.join(job.directory, f"part-{i:05d}.csv") for i in range(len(ranges))]
+        table = self.features.table if self.features is not None else None
+        futures = [self._pool.submit(_score_range, job.input_path, header, start, end, part, table)
+                   for (start, end), part in zip(ranges, parts)]
+        for future in futures:
+            job.rows += future.result()
+            job.chunks_done += 1
+            job.save()
+        with open(job.result_path, 'wb') as out:
+            out.write(b"prediction\n")
+            for part in parts:
+                with open(part, 'rb') as f:
+                    shutil.copyfileobj(f, out, 2**20)
+                os.remove(part)
+        os.remove(job.input_path)
+
+    # Drop the spool directories of the oldest finished jobs
+    def _evict(self):
+        with self._lock:
+            finished = [j for j in self.jobs.values() if j.finished_at is not None]
+            for job in sorted(finished, key=lambda j: j.finished_at)[:max(0, len(finished) - self.keep_finished)]:
+                shutil.rmtree(job.directory, ignore_errors=True)
+                del self.jobs[job.id]
+
+    def shutdown(self):
+        if self._dispatcher is not None:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                pass
+            self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,19 +1,88 @@
-from fastapi import FastAPI, HTTPException, File, UploadFile
+from fastapi import FastAPI, HTTPException, File, UploadFile, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 import pandas as pd
-import joblib
-import lightgbm as lgb
-import io
+import os
+import threading
+from registry import REGISTRY_DIR, ModelHost, ModelRegistry, SwapInProgress, UnknownVersion
+from jobs import JobManager, JobNotFound, JobQueueFull
+from batcher import MicroBatcher
+from ingest import MODEL_COLUMNS, detect_format, iter_chunks, read_table
+from cache import ModelCache, PredictionCache, record_key
+from preprocessing import CAT_COLS, UnknownCategory
+from feature_store import CategoryFeatureStore
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
+import time
+import metrics
+from profiler import SamplingProfiler
+from forecast import CATALOG_CSV
 
-# Load model and preprocessing artifacts
-model = lgb.Booster(model_file="lightgbm_model.txt")
-encoder = joblib.load("encoder.pkl")
-scaler = joblib.load("scaler.pkl")
+# Model and preprocessing artifacts.
+# Startup: "background" loads in a thread so the port binds immediately (see /ready),
+# "eager" loads at import, "lazy" on first request.
+# Versions come from the model registry (SALES_REGISTRY_DIR): SALES_MODEL_VERSION, else the
+# newest published one, else the artifacts in the working directory ("local"). Other
+# versions are swapped in at runtime through /admin/model/activate (Route 8). Handlers read
+# `state.current` once so each request is scored by a single version.
+CANARY_ROWS = 256
+registry = ModelRegistry(os.getenv("SALES_REGISTRY_DIR", REGISTRY_DIR))
+
+# Warm-up batch for a version being swapped in: the first orders of the catalog CSV
+def canary_batch():
+    return pd.read_csv(os.getenv("SALES_CATALOG_CSV", CATALOG_CSV), nrows=CANARY_ROWS,
+                       usecols=lambda col: col in MODEL_COLUMNS)
+
+# Called once the new version is active
+def model_swapped(model):
+    for watched in (cache, explain_cache):
+        if watched is not None:
+            watched.watch(model.files)
+    jobs.use_artifacts(model.files)
+    _precompute_curve(model)
+
+state = ModelHost(registry, version=os.getenv("SALES_MODEL_VERSION") or registry.latest(),
+                  mode=os.getenv("SALES_STARTUP", "background"), canary=canary_batch, on_swap=model_swapped)
+# Categorical values the encoder never saw: "ignore" scores them with an all-zero one-hot
+# block (the encoder's own behaviour), "error" rejects the request with 422
+UNKNOWN_CATEGORIES = os.getenv("SALES_UNKNOWN_CATEGORIES", "ignore")
+# Per-category_id aggregates filled in when requests omit them (Route 9), seeded from the
+# catalog CSV and persisted to SALES_FEATURE_STORE when set
+feature_store = CategoryFeatureStore.open(os.getenv("SALES_FEATURE_STORE"),
+                                          os.getenv("SALES_CATALOG_CSV", CATALOG_CSV))
 
 # App
 app = FastAPI(title="Sales Forecast API", version="1.0")
 
+# Request metrics: latency by route template, error counts, body sizes.
+# The route template is resolved up front so per-stage timings inside handlers can be labelled.
+# Requests matching no route share one label so unknown paths cannot grow the series count.
+UNMATCHED_ROUTE = "<unmatched>"
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    route = UNMATCHED_ROUTE
+    for candidate in app.router.routes:
+        if candidate.matches(request.scope)[0] == Match.FULL:
+            route = candidate.path
+            break
+    metrics.current_route.set(route)
+    metrics.request_started.set(started)
+    if request.headers.get("content-length"):
+        metrics.request_bytes.observe(route, value=int(request.headers["content-length"]))
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        metrics.request_duration.observe(request.method, route, status, value=time.perf_counter() - started)
+        if status >= 400:
+            metrics.errors.inc(route, status)
+
 # Input schema for single/batch prediction
 class SalesInput(BaseModel):
     unit_price: float
@@ -23,9 +92,9 @@ class SalesInput(BaseModel):
     customer_rating: float
     stock: int
     category_id: int
-    category_avg_price: float
-    category_total_revenue: float
-    category_popularity: int
+    category_avg_price: Optional[float] = None
+    category_total_revenue: Optional[float] = None
+    category_popularity: Optional[int] = None
     year: int
     month: int
     day: int
@@ -35,105 +104,680 @@ class SalesInput(BaseModel):
     category: str
     holiday_type: str
 
+# Reusable 1-row feature buffer per worker thread for the /predict fast path
+# (reallocated when a model swap changes the plan)
+_row_buffers = threading.local()
+
+def _row_buffer(plan):
+    if getattr(_row_buffers, 'plan', None) is not plan:
+        _row_buffers.x = plan.empty(1)
+        _row_buffers.plan = plan
+    return _row_buffers.x
+
+def _predict_record(features: dict, model, num_iteration: int) -> float:
+    with metrics.stage("preprocess"):
+        processed = model.plan.transform_record(features, out=_row_buffer(model.plan), unknown=UNKNOWN_CATEGORIES)
+    with metrics.stage("predict"):
+        return float(model.predictor.predict(processed, num_iteration=num_iteration)[0])
+
+# Opt-in request coalescing for /predict; rows are grouped by the version that preprocessed
+# them and the number of trees they are scored with
+batcher = None
+if os.getenv("SALES_PREDICT_BATCHING", "0") == "1":
+    batcher = MicroBatcher(lambda X, group: group[0].predictor.predict(X, num_iteration=group[1]),
+                           max_batch=int(os.getenv("SALES_BATCH_MAX", "256")),
+                           window_ms=float(os.getenv("SALES_BATCH_WINDOW_MS", "2")))
+
+# Prediction cache keyed by model version, tree count and canonicalized SalesInput, dropped when any
+# artifact changes on disk or another version is activated
+cache = None
+if int(os.getenv("SALES_CACHE_SIZE", "10000")) > 0:
+    cache = PredictionCache(max_entries=int(os.getenv("SALES_CACHE_SIZE", "10000")),
+                            ttl=float(os.getenv("SALES_CACHE_TTL", "300")),
+                            artifacts=state.files)
+
+def cache_key(model, record, num_iteration=None):
+    return (model.version, num_iteration, record_key(record))
+
 # Reusable preprocessing
 def preprocess(df: pd.DataFrame):
-    # Auto-handle date column if present
-    if 'order_date' in df.columns:
-        df['order_date'] = pd.to_datetime(df['order_date'])
-        df['year'] = df['order_date'].dt.year
-        df['month'] = df['order_date'].dt.month
-        df['day'] = df['order_date'].dt.day
-        df['weekday'] = df['order_date'].dt.weekday
-        df.drop(columns=['order_date'], inplace=True)
-    # Handle missing values
-    df.fillna({
-        'unit_price': 0,
-        'quantity': 0,
-        'age': 0,
-        'discount': 0,
-        'customer_rating': 0,
-        'stock': 0,
-        'category_id': 0,
-        'category_avg_price': 0,
-        'category_total_revenue': 0,
-        'category_popularity': 0
-    }, inplace=True)
-    # Convert categorical columns to string if not already
-
-    cat_cols = ['color', 'size', 'category', 'holiday_type']
-    num_cols = ['unit_price', 'quantity', 'age', 'discount', 'customer_rating','stock', 'category_id', 'category_avg_price', 'category_total_revenue',
-                'category_popularity', 'year', 'month', 'day', 'weekday']
-
-    # Transform
-    cat_encoded = encoder.transform(df[cat_cols])
-    cat_df = pd.DataFrame(cat_encoded.toarray(), columns=encoder.get_feature_names_out(cat_cols))
-
-    num_scaled = scaler.transform(df[num_cols])
-    num_df = pd.DataFrame(num_scaled, columns=num_cols)
-
-    final_df = pd.concat([num_df, cat_df], axis=1)
-
-    # Add missing columns (if any)
-    expected_cols = model.feature_name()
-    for col in expected_cols:
-        if col not in final_df.columns:
-            final_df[col] = 0
-
-    # Align column order
-    return final_df[expected_cols]
+    plan = state.current.plan
+    return pd.DataFrame(plan.transform(df), columns=plan.feature_names)
 
 # Route 1: Welcome message
 @app.get("/")
 def home():
     return {"message": "✅ Sales Prediction API is live! Visit /docs to try it out."}
 
+# Liveness: the process is up and serving HTTP
+@app.get("/health")
+def health():
+    return {"status": "alive"}
+
+# Readiness: artifacts are loaded and requests will be scored without waiting
+@app.get("/ready")
+def ready():
+    model = state.current
+    body = {"ready": model.ready, "version": model.version, "startup": model.mode,
+            "pid": os.getpid(), "timings": model.timings, "error": model.error}
+    if not model.ready:
+        return JSONResponse(body, status_code=503)
+    return body
+
 # Route 2: Single prediction
 @app.post("/predict")
-def predict(data: SalesInput):
+async def predict(data: SalesInput, slim: bool = False, tier: Optional[str] = None,
+                  num_iteration: Optional[int] = None):
+    metrics.observe_validation()
+    metrics.request_rows.observe(metrics.current_route.get(), value=1)
+    model = state.current
+    k = await run_in_threadpool(resolve_iterations, model, tier, num_iteration)
     try:
-        df = pd.DataFrame([data.dict()])
-        processed = preprocess(df)
-        prediction = model.predict(processed.values)
+        features = feature_store.fill_record(data.dict())
+        key = cache_key(model, features, k) if cache is not None else None
+        prediction = cache.get(key) if cache is not None else None
+        if prediction is None:
+            if batcher is not None:
+                with metrics.stage("batched_predict"):
+                    row = model.plan.transform_record(features, unknown=UNKNOWN_CATEGORIES)
+                    prediction = await batcher.submit(row, (model, k))
+            else:
+                prediction = await run_in_threadpool(_predict_record, features, model, k)
+            metrics.rows_scored.inc(metrics.current_route.get())
+            if cache is not None:
+                cache.put(key, prediction)
+        if slim:
+            return {"status": "success", "prediction": prediction, "currency": "USD", "num_iteration": k}
         return {
             "status": "success",
-            "prediction": float(prediction[0]),
+            "prediction": prediction,
             "currency": "USD",
-            "input_features": data.dict(),
-            "model_features_used": processed.columns.tolist()
+            "input_features": features,
+            "model_features_used": model.plan.feature_names,
+            "model_version": model.version,
+            "num_iteration": k
         }
+    except UnknownCategory as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/predict/batcher")
+def batcher_stats():
+    if batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
+
+@app.get("/cache/stats")
+def cache_stats():
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
 # Route 3: Batch prediction
 @app.post("/predict-batch")
-def predict_batch(data: List[SalesInput]):
+def predict_batch(data: List[SalesInput], tier: Optional[str] = None, num_iteration: Optional[int] = None):
+    metrics.observe_validation()
+    metrics.request_rows.observe(metrics.current_route.get(), value=len(data))
+    model = state.current
+    k = resolve_iterations(model, tier, num_iteration)
     try:
-        df = pd.DataFrame([item.dict() for item in data])
-        processed = preprocess(df)
-        prediction = model.predict(processed.values)
+        records = [feature_store.fill_record(item.dict()) for item in data]
+        prediction = np.empty(len(records))
+        # Serve what we can from the cache and only score the misses
+        keys = [cache_key(model, r, k) for r in records] if cache is not None else None
+        cached = cache.get_many(keys) if cache is not None else [None] * len(records)
+        misses = [i for i, value in enumerate(cached) if value is None]
+        for i, value in enumerate(cached):
+            if value is not None:
+                prediction[i] = value
+        if misses:
+            with metrics.stage("frame_build"):
+                df = pd.DataFrame([records[i] for i in misses])
+            processed = model.plan.transform(df, observe=metrics.observe_stage, unknown=UNKNOWN_CATEGORIES)
+            with metrics.stage("predict"):
+                prediction[misses] = model.predictor.predict(processed, num_iteration=k)
+            metrics.rows_scored.inc(metrics.current_route.get(), amount=len(misses))
+            if cache is not None:
+                cache.put_many([keys[i] for i in misses], prediction[misses].tolist())
         return {
             "status": "success",
             "predictions": prediction.tolist(),
-            "records": len(prediction)
+            "records": len(prediction),
+            "cache_hits": len(records) - len(misses),
+            "num_iteration": k
         }
+    except UnknownCategory as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# Route 4: CSV upload
-from fastapi.responses import FileResponse
+# Route 3b: Columnar batch prediction
+# The body encoding follows Content-Type (columnar JSON, Arrow IPC or MessagePack) and the
+# response follows Accept (JSON, Arrow IPC, MessagePack or raw little-endian float64).
+# Fields are validated as whole columns instead of one pydantic model per row.
+# The number of trees used is returned in the X-Num-Iteration header.
+import wire
+from fastapi.responses import Response
+
+def _score_columns(body: bytes, content_type: str, accept: str, model, num_iteration: int):
+    with metrics.stage("decode"):
+        columns = wire.decode(body, content_type)
+    with metrics.stage("validation"):
+        df = feature_store.fill(wire.validate(columns))
+    prediction = np.empty(0)
+    if len(df):
+        processed = model.plan.transform(df, observe=metrics.observe_stage, unknown=UNKNOWN_CATEGORIES)
+        with metrics.stage("predict"):
+            prediction = model.predictor.predict(processed, num_iteration=num_iteration)
+    metrics.record_rows(len(prediction))
+    with metrics.stage("encode"):
+        return wire.encode(prediction, wire.negotiate(accept))
+
+@app.post("/predict-columns")
+async def predict_columns(request: Request, tier: Optional[str] = None, num_iteration: Optional[int] = None):
+    body = await request.body()
+    model = state.current
+    k = await run_in_threadpool(resolve_iterations, model, tier, num_iteration)
+    try:
+        content, media_type = await run_in_threadpool(
+            _score_columns, body, request.headers.get("content-type"), request.headers.get("accept"), model, k)
+    except wire.NotAcceptable as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    except wire.UnsupportedMediaType as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except wire.SchemaError as e:
+        raise HTTPException(status_code=422, detail=e.errors)
+    except UnknownCategory as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except wire.MalformedBody as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return Response(content, media_type=media_type, headers={"X-Num-Iteration": str(k)})
+
+# Route 4: File upload (CSV, Parquet or Arrow IPC)
+from fastapi.responses import FileResponse, StreamingResponse
+import json
 import tempfile
 
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+MAX_CHUNKSIZE = 1_000_000
+
+# Score DataFrame chunks into one reusable feature buffer,
+# yielding encoded result lines so peak memory is bounded by chunksize
+def stream_predictions(chunks, chunksize: int, fmt: str, model, num_iteration: int):
+    plan, predictor = model.plan, model.predictor
+    buffer = plan.empty(chunksize)
+    header = "row,prediction\n" if fmt == "csv" else ""
+    start = 0
+    for chunk in chunks:
+        chunk = feature_store.fill(chunk)
+        processed = plan.transform(chunk, out=buffer, observe=metrics.observe_stage, unknown=UNKNOWN_CATEGORIES)
+        with metrics.stage("predict"):
+            prediction = predictor.predict(processed, num_iteration=num_iteration)
+        metrics.record_rows(len(prediction))
+        rows = range(start, start + len(prediction))
+        if fmt == "csv":
+            yield header + "".join(f"{i},{p!r}\n" for i, p in zip(rows, prediction.tolist()))
+        else:
+            yield "".join(f'{{"row":{i},"prediction":{p!r}}}\n' for i, p in zip(rows, prediction.tolist()))
+        header = ""
+        start += len(prediction)
+    if header:
+        yield header
+
+# Last line of a stream that failed after the 200 status went out, so clients can tell
+# a broken upload from a complete one: {"error": ...} in NDJSON, an "error" row in CSV
+def stream_error(fmt: str, message: str):
+    if fmt == "csv":
+        return 'error,"' + message.replace('"', '""') + '"\n'
+    return json.dumps({"error": message}) + "\n"
+
 @app.post("/upload-csv")
-def upload_csv(file: UploadFile = File(...)):
+def upload_csv(file: UploadFile = File(...), stream: bool = False, format: str = "ndjson", chunksize: int = 50_000,
+               tier: Optional[str] = None, num_iteration: Optional[int] = None):
+    input_format = detect_format(file.filename, file.content_type)
+    model = state.current
+    k = resolve_iterations(model, tier, num_iteration)
+    if stream:
+        if format not in STREAM_FORMATS:
+            raise HTTPException(status_code=400, detail=f"format must be one of {list(STREAM_FORMATS)}")
+        if not 1 <= chunksize <= MAX_CHUNKSIZE:
+            raise HTTPException(status_code=400, detail=f"chunksize must be between 1 and {MAX_CHUNKSIZE}")
+        chunks = None
+        try:
+            file.file.seek(0)
+            chunks = iter_chunks(file.file, input_format, chunksize, columns=MODEL_COLUMNS, categorical=CAT_COLS)
+            lines = stream_predictions(chunks, chunksize, format, model, k)
+            # Score the first chunk eagerly so bad input still fails with a 500 instead of a truncated stream
+            first = next(lines, "")
+        except UnknownCategory as e:
+            if chunks is not None:
+                chunks.close()
+            raise HTTPException(status_code=422, detail=str(e))
+        except Exception as e:
+            if chunks is not None:
+                chunks.close()
+            raise HTTPException(status_code=500, detail=str(e))
+
+        def body():
+            yield first
+            try:
+                yield from lines
+            except Exception as e:
+                chunks.close()
+                yield stream_error(format, str(e))
+        return StreamingResponse(body(), media_type=STREAM_FORMATS[format], headers={"X-Num-Iteration": str(k)})
+
     try:
-        content = file.file.read()
-        df = pd.read_csv(io.BytesIO(content))
-        processed = preprocess(df)
-        prediction = model.predict(processed.values)
+        with metrics.stage("parse"):
+            df = feature_store.fill(read_table(file.file, input_format, columns=MODEL_COLUMNS, categorical=CAT_COLS))
+        processed = model.plan.transform(df, observe=metrics.observe_stage, unknown=UNKNOWN_CATEGORIES)
+        with metrics.stage("predict"):
+            prediction = model.predictor.predict(processed, num_iteration=k)
+        metrics.record_rows(len(prediction))
         return {
             "status": "success",
             "rows": len(df),
-            "predictions": prediction.tolist()
+            "predictions": prediction.tolist(),
+            "num_iteration": k
         }
+    except UnknownCategory as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Route 5: Background jobs for large batch scoring
+jobs = JobManager(
+    spool_dir=os.getenv("SALES_JOB_DIR", os.path.join(tempfile.gettempdir(), "sales-jobs")),
+    artifacts=state.files,
+    max_workers=int(os.getenv("SALES_JOB_WORKERS", "0")) or None,
+    max_queued=int(os.getenv("SALES_JOB_QUEUE", "8")),
+    features=feature_store,
+)
+
+@app.on_event("shutdown")
+def shutdown_jobs():
+    jobs.shutdown()
+
+@app.post("/jobs", status_code=202)
+def create_job(file: UploadFile = File(...)):
+    try:
+        job = jobs.submit(file.file)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    try:
+        return jobs.get(job_id).to_dict()
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+
+@app.get("/jobs/{job_id}/result")
+def job_result(job_id: str):
+    try:
+        job = jobs.get(job_id)
+    except JobNotFound:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=job.error)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return FileResponse(job.result_path, media_type="text/csv", filename=f"{job_id}.csv")
+
+
+# Route 6: Observability
+from fastapi.responses import PlainTextResponse
+
+# Scrape-time view of the cache, batcher and job queue
+def _service_metrics():
+    out = []
+    if cache is not None:
+        stats = cache.stats()
+        events = ["hits", "misses", "evictions", "expirations", "invalidations"]
+        out.append(("sales_cache_events_total", "Prediction cache events", "counter",
+                    [({"event": e}, stats[e]) for e in events]))
+        out.append(("sales_cache_entries", "Entries in the prediction cache", "gauge", [({}, stats["entries"])]))
+    if batcher is not None:
+        stats = batcher.stats()
+        out.append(("sales_batcher_batches_total", "Micro-batches scored", "counter", [({}, stats["batches"])]))
+        out.append(("sales_batcher_queued", "Requests waiting for a micro-batch", "gauge", [({}, stats["queued"])]))
+    by_status = {}
+    for job in list(jobs.jobs.values()):
+        by_status[job.status] = by_status.get(job.status, 0) + 1
+    out.append(("sales_jobs", "Background jobs by status", "gauge",
+                [({"status": status}, n) for status, n in sorted(by_status.items())]))
+    return out
+
+metrics.registry.collectors.append(_service_metrics)
+
+@app.get("/metrics")
+def prometheus_metrics():
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+# Opt-in sampling profiler: GET /debug/profile?seconds=10 returns collapsed stacks for flamegraphs
+profiler = SamplingProfiler() if os.getenv("SALES_PROFILER", "0") == "1" else None
+
+@app.get("/debug/profile")
+async def debug_profile(seconds: float = 10, interval_ms: float = 5):
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profiler is disabled (set SALES_PROFILER=1)")
+    if not 0 < seconds <= 300 or not 1 <= interval_ms <= 1000:
+        raise HTTPException(status_code=400, detail="seconds must be in (0, 300] and interval_ms in [1, 1000]")
+    try:
+        samples, stacks = await run_in_threadpool(profiler.profile, seconds, interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(stacks, headers={"X-Profile-Samples": str(samples)})
+
+# Route 7: Forecast grids
+# Date x product grids are built and scored server-side: the catalog comes from the
+# historical orders (SALES_CATALOG_CSV), products are preprocessed once and each block
+# of days only rewrites the date columns before a batched booster call.
+from datetime import date, timedelta
+from forecast import DEFAULT_HOLIDAY, ProductCatalog, detail_lines, product_features, score_grid
+
+MAX_HORIZON = 366
+MAX_FORECAST_ROWS = 5_000_000
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def product_catalog():
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = ProductCatalog.from_csv(os.getenv("SALES_CATALOG_CSV", CATALOG_CSV))
+        return _catalog
+
+class ForecastRequest(BaseModel):
+    horizon: int = 90
+    start: Optional[date] = None
+    skus: Optional[List[int]] = None
+    colors: Optional[List[str]] = None
+    sizes: Optional[List[str]] = None
+    categories: Optional[List[str]] = None
+    cross: bool = False
+    holiday_type: str = DEFAULT_HOLIDAY
+
+@app.post("/forecast")
+def forecast(request: ForecastRequest, stream: bool = False, format: str = "ndjson", tier: Optional[str] = None,
+             num_iteration: Optional[int] = None):
+    if not 1 <= request.horizon <= MAX_HORIZON:
+        raise HTTPException(status_code=400, detail=f"horizon must be between 1 and {MAX_HORIZON} days")
+    if stream and format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {list(STREAM_FORMATS)}")
+    products = product_catalog().select(request.skus, request.colors, request.sizes,
+                                        request.categories, cross=request.cross)
+    if len(products) == 0:
+        raise HTTPException(status_code=404, detail="No products match the filter")
+    rows = len(products) * request.horizon
+    if rows > MAX_FORECAST_ROWS:
+        raise HTTPException(status_code=400, detail=f"{rows:,} grid rows exceed the limit of {MAX_FORECAST_ROWS:,}")
+    start = request.start or date.today() + timedelta(days=1)
+    dates = pd.date_range(start, periods=request.horizon, freq="D")
+    model = state.current
+    k = resolve_iterations(model, tier, num_iteration)
+    plan, predictor = model.plan, model.predictor
+    try:
+        # category aggregates as of the latest ingested orders
+        products = feature_store.fill(products, overwrite=True)
+        with metrics.stage("preprocess"):
+            base = product_features(plan, products, request.holiday_type, unknown=UNKNOWN_CATEGORIES)
+    except UnknownCategory as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    route = metrics.current_route.get()
+    metrics.request_rows.observe(route, value=rows)
+
+    if stream:
+        def body():
+            if format == "csv":
+                yield "date,sku,color,size,category,prediction\n"
+            for block, prediction in score_grid(plan, predictor, base, dates, num_iteration=k):
+                metrics.rows_scored.inc(route, amount=prediction.size)
+                yield detail_lines(products, block, prediction, format)
+        return StreamingResponse(body(), media_type=STREAM_FORMATS[format], headers={"X-Num-Iteration": str(k)})
+
+    # Daily totals per category: one (days x products) @ (products x categories) product per block
+    codes, categories = pd.factorize(products['category'], sort=True)
+    membership = np.zeros((len(products), len(categories)))
+    membership[np.arange(len(products)), codes] = 1
+    by_category = []
+    with metrics.stage("predict"):
+        for _, prediction in score_grid(plan, predictor, base, dates, num_iteration=k):
+            by_category.append(prediction @ membership)
+    by_category = np.vstack(by_category)
+    metrics.rows_scored.inc(route, amount=rows)
+    return {
+        "status": "success",
+        "start": dates[0].date().isoformat(),
+        "horizon": request.horizon,
+        "products": len(products),
+        "rows": rows,
+        "num_iteration": k,
+        "dates": dates.strftime("%Y-%m-%d").tolist(),
+        "total": by_category.sum(axis=1).tolist(),
+        "by_category": {category: by_category[:, i].tolist() for i, category in enumerate(categories)},
+    }
+
+# Route 8: Model registry admin
+# Reports the active version with its load and warm-up timings, lists published versions
+# and starts a background swap. With SALES_ADMIN_TOKEN set, requests must send it in the
+# X-Admin-Token header.
+from fastapi import Header
+
+class ActivateRequest(BaseModel):
+    version: str
+
+def _check_admin(token):
+    expected = os.getenv("SALES_ADMIN_TOKEN")
+    if expected and token != expected:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/model")
+def admin_model(x_admin_token: Optional[str] = Header(None)):
+    _check_admin(x_admin_token)
+    return {"registry": registry.root, **state.status()}
+
+@app.get("/admin/model/versions")
+def admin_model_versions(x_admin_token: Optional[str] = Header(None)):
+    _check_admin(x_admin_token)
+    active = state.current.version
+    versions = []
+    for version in registry.versions():
+        manifest = registry.manifest(version)
+        versions.append({"version": version, "created_at": manifest["created_at"], "trees": manifest["trees"],
+                         "fingerprint": manifest["fingerprint"], "active": version == active})
+    return {"active": active, "versions": versions}
+
+@app.post("/admin/model/activate", status_code=202)
+def admin_activate(request: ActivateRequest, x_admin_token: Optional[str] = Header(None)):
+    _check_admin(x_admin_token)
+    if request.version == state.current.version:
+        raise HTTPException(status_code=409, detail=f"Version {request.version} is already active")
+    try:
+        return {"status": "loading", **state.activate(request.version)}
+    except UnknownVersion:
+        raise HTTPException(status_code=404, detail=f"Unknown model version: {request.version}")
+    except SwapInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+# Route 9: Category feature store
+# category_avg_price, category_total_revenue and category_popularity may be omitted from
+# prediction requests; they are looked up by category_id. POST /orders folds actual orders
+# (category_id, unit_price, revenue) into the aggregates. Each uvicorn worker keeps its own
+# store; with SALES_FEATURE_STORE set, updates are persisted and picked up on restart.
+from feature_store import ORDER_COLUMNS
+
+@app.get("/features/categories")
+def category_features():
+    return feature_store.to_dict()
+
+@app.post("/orders")
+def ingest_orders(file: UploadFile = File(...)):
+    try:
+        with metrics.stage("parse"):
+            df = read_table(file.file, detect_format(file.filename, file.content_type), columns=ORDER_COLUMNS)
+        rows = feature_store.update(df)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", "orders": rows, **feature_store.to_dict()}
+
+# Route 10: Explanations
+# TreeSHAP contributions from the LightGBM booster that serves /predict,
+# summed from the 59 booster features back onto the 18 SalesInput fields. Batches are
+# scored in chunks on a thread pool (SALES_EXPLAIN_THREADS, default all cores) and
+# explanations are cached like predictions, by model version and filled-in record.
+from concurrent.futures import ThreadPoolExecutor
+from explain import FIELDS, Explainer
+
+MAX_EXPLAIN_ROWS = 100_000
+explain_pool = ThreadPoolExecutor(int(os.getenv("SALES_EXPLAIN_THREADS", "0")) or os.cpu_count() or 1,
+                                  thread_name_prefix="explain")
+# One Explainer per loaded model version, dropped with it after a swap
+_explainers = ModelCache(lambda model: Explainer(model.booster, explain_pool))
+
+explain_cache = None
+if int(os.getenv("SALES_EXPLAIN_CACHE_SIZE", "10000")) > 0:
+    explain_cache = PredictionCache(max_entries=int(os.getenv("SALES_EXPLAIN_CACHE_SIZE", "10000")),
+                                    ttl=float(os.getenv("SALES_CACHE_TTL", "300")),
+                                    artifacts=state.files)
+
+def explainer(model):
+    return _explainers.get(model)
+
+# Records -> (contributions (n, len(FIELDS) + 1) with the base value last, cache hits)
+def _explain_records(records, model):
+    contributions = np.empty((len(records), len(FIELDS) + 1))
+    keys = [cache_key(model, r) for r in records] if explain_cache is not None else None
+    cached = explain_cache.get_many(keys) if explain_cache is not None else [None] * len(records)
+    misses = [i for i, value in enumerate(cached) if value is None]
+    for i, value in enumerate(cached):
+        if value is not None:
+            contributions[i] = value
+    if misses:
+        # TreeSHAP is ~50x the cost of a prediction: score repeated records once
+        unique = list({keys[i]: i for i in reversed(misses)}.values()) if keys is not None else misses
+        with metrics.stage("frame_build"):
+            df = pd.DataFrame([records[i] for i in unique])
+        processed = model.plan.transform(df, observe=metrics.observe_stage, unknown=UNKNOWN_CATEGORIES)
+        with metrics.stage("explain"):
+            contributions[unique] = explainer(model).explain(processed)
+        metrics.rows_scored.inc(metrics.current_route.get(), amount=len(unique))
+        if explain_cache is not None:
+            explain_cache.put_many([keys[i] for i in unique], list(contributions[unique]))
+            first = {keys[i]: i for i in unique}
+            for i in misses:
+                contributions[i] = contributions[first[keys[i]]]
+    return contributions, len(records) - len(misses)
+
+@app.post("/explain")
+def explain(data: SalesInput):
+    metrics.observe_validation()
+    metrics.request_rows.observe(metrics.current_route.get(), value=1)
+    model = state.current
+    try:
+        contributions, _ = _explain_records([feature_store.fill_record(data.dict())], model)
+    except UnknownCategory as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    row = contributions[0]
+    return {
+        "status": "success",
+        "prediction": float(row.sum()),
+        "base_value": float(row[-1]),
+        "contributions": dict(zip(FIELDS, row[:-1].tolist())),
+        "model_version": model.version
+    }
+
+@app.post("/explain-batch")
+def explain_batch(data: List[SalesInput]):
+    metrics.observe_validation()
+    metrics.request_rows.observe(metrics.current_route.get(), value=len(data))
+    if len(data) > MAX_EXPLAIN_ROWS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_EXPLAIN_ROWS:,} rows per request")
+    model = state.current
+    try:
+        records = [feature_store.fill_record(item.dict()) for item in data]
+        contributions, hits = _explain_records(records, model)
+    except UnknownCategory as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "status": "success",
+        "fields": FIELDS,
+        "base_value": float(contributions[0, -1]) if len(contributions) else None,
+        "contributions": contributions[:, :-1].tolist(),
+        "predictions": contributions.sum(axis=1).tolist(),
+        "records": len(contributions),
+        "cache_hits": hits,
+        "model_version": model.version
+    }
+
+# Route 11: Latency tiers
+# Prediction routes take ?tier=<name> or ?num_iteration=<trees> and score with only the
+# first trees of the model, reporting the count used as "num_iteration" (X-Num-Iteration on
+# binary and streamed responses). Each tier has a tolerance on the mean relative deviation
+# from the full model (SALES_TIERS, default "fast=0.01,preview=0.05"; "full" always scores
+# every tree); its tree count is the shortest prefix within tolerance on held-out orders of
+# the catalog CSV. The curve is computed once per model version, in the background at
+# startup and after a swap. Requests without either use SALES_DEFAULT_TIER (default "full").
+from tiers import IterationCurve, parse_tiers
+
+TIERS = parse_tiers(os.getenv("SALES_TIERS"))
+DEFAULT_TIER = os.getenv("SALES_DEFAULT_TIER", "full")
+if DEFAULT_TIER not in TIERS:
+    raise ValueError(f"SALES_DEFAULT_TIER {DEFAULT_TIER} is not one of {list(TIERS)}")
+# One IterationCurve per loaded model version, dropped with it after a swap
+_curves = ModelCache(lambda model: IterationCurve.from_csv(os.getenv("SALES_CATALOG_CSV", CATALOG_CSV), model.plan,
+                                                          model.forest, TIERS, model.predictor))
+
+def iteration_curve(model):
+    return _curves.get(model)
+
+def _compute_curve_quietly(model):
+    try:
+        iteration_curve(model)
+    except Exception:
+        pass  # tier requests report the error with 503
+
+def _precompute_curve(model):
+    threading.Thread(target=_compute_curve_quietly, args=(model,), name="iteration-curve", daemon=True).start()
+
+@app.on_event("startup")
+def precompute_curve():
+    # lazy startup defers the model, and with it the curve, to the first request
+    if state.current.mode != "lazy":
+        _precompute_curve(state.current)
+
+# tier / num_iteration query parameters -> number of trees to score with
+def resolve_iterations(model, tier=None, num_iteration=None):
+    trees = model.forest.num_trees()
+    if tier is not None and num_iteration is not None:
+        raise HTTPException(status_code=400, detail="Pass either tier or num_iteration, not both")
+    if num_iteration is not None:
+        if not 1 <= num_iteration <= trees:
+            raise HTTPException(status_code=400, detail=f"num_iteration must be between 1 and {trees}")
+        return num_iteration
+    tier = tier or DEFAULT_TIER
+    if tier not in TIERS:
+        raise HTTPException(status_code=400, detail=f"tier must be one of {list(TIERS)}")
+    if TIERS[tier] == 0:
+        return trees
+    try:
+        return iteration_curve(model).iterations[tier]
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Latency tiers are unavailable: {e}")
+
+@app.get("/predict/tiers")
+def predict_tiers():
+    model = state.current
+    try:
+        curve = iteration_curve(model)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=503, detail=f"Latency tiers are unavailable: {e}")
+    return {"model_version": model.version, "default": DEFAULT_TIER, **curve.to_dict()}
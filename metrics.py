@@ -0,0 +1,138 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+ROW_BUCKETS = [1, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+BYTE_BUCKETS = [2**10, 2**14, 2**17, 2**20, 2**23, 2**26, 2**30]
+
+# Route template of the request being served and its arrival time, set by the HTTP middleware
+current_route = contextvars.ContextVar("current_route", default="")
+request_started = contextvars.ContextVar("request_started", default=None)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                     for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.kind = "counter"
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, _labels(self.labels, k), v) for k, v in sorted(self._values.items())]
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.kind = "histogram"
+        self.buckets = list(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, *labels, value):
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][bisect.bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        out = []
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets + [float("inf")], counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    out.append((self.name + "_bucket", _labels(self.labels + ("le",), key + (le,)), cumulative))
+                out.append((self.name + "_sum", _labels(self.labels, key), total))
+                out.append((self.name + "_count", _labels(self.labels, key), count))
+        return out
+
+
+# Metrics served from /metrics in Prometheus text exposition format.
+# Collectors are callables returning (name, help, kind, [(labels dict, value)]) tuples for
+# state that lives elsewhere (cache, batcher, job queue) and is read at scrape time.
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, name, help, labels=()):
+        metric = Counter(name, help, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{labels} {value}" for name, labels, value in metric.samples())
+        for collect in self.collectors:
+            for name, help, kind, values in collect():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{name}{_labels(tuple(l), tuple(l.values()))} {v}" for l, v in values)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+request_duration = registry.histogram(
+    "sales_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"))
+stage_duration = registry.histogram(
+    "sales_stage_duration_seconds", "Time spent per scoring stage", ("route", "stage"))
+rows_scored = registry.counter("sales_rows_scored_total", "Rows scored by the model", ("route",))
+request_rows = registry.histogram("sales_request_rows", "Rows per scoring request", ("route",), ROW_BUCKETS)
+request_bytes = registry.histogram("sales_request_bytes", "Request body size", ("route",), BYTE_BUCKETS)
+errors = registry.counter("sales_errors_total", "Requests that ended with an error status", ("route", "status"))
+
+
+def observe_stage(stage, seconds):
+    stage_duration.observe(current_route.get(), stage, value=seconds)
+
+
+# Time a block as one stage of the current route
+@contextmanager
+def stage(name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(name, time.perf_counter() - t0)
+
+
+# Request parsing + pydantic validation: everything between arrival and the handler body
+def observe_validation():
+    started = request_started.get()
+    if started is not None:
+        observe_stage("validation", time.perf_counter() - started)
+
+
+def record_rows(n):
+    route = current_route.get()
+    rows_scored.inc(route, amount=n)
+    request_rows.observe(route, value=n)
@@ -0,0 +1,217 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+# Column layout shared by the API, the dashboard and the benchmarks
+CAT_COLS = ['color', 'size', 'category', 'holiday_type']
+NUM_COLS = ['unit_price', 'quantity', 'age', 'discount', 'customer_rating', 'stock', 'category_id', 'category_avg_price',
+            'category_total_revenue', 'category_popularity', 'year', 'month', 'day', 'weekday']
+DATE_PARTS = ['year', 'month', 'day', 'weekday']
+# Numeric columns whose missing values are treated as 0 (dates stay NaN)
+FILL_ZERO_COLS = NUM_COLS[:10]
+# Categorical values the encoder never saw: "ignore" leaves their one-hot block all zero
+# (OneHotEncoder(handle_unknown='ignore')), "error" raises UnknownCategory
+UNKNOWN_POLICIES = ('ignore', 'error')
+
+
+# Categorical values outside the encoder's categories, by column
+class UnknownCategory(ValueError):
+    def __init__(self, unknown):
+        self.unknown = unknown
+        super().__init__("Unknown categories: " + "; ".join(
+            f"{col}={values[:10]}" for col, values in unknown.items()))
+
+
+# Feature name as a LightGBM booster stores it: spaces become "_" ("color_Dark Blue" -> "color_Dark_Blue")
+def booster_feature_name(name):
+    return name.replace(' ', '_')
+
+
+def _lap(observe, stage, t0):
+    now = time.perf_counter()
+    observe(stage, now - t0)
+    return now
+
+
+def _as_float(column):
+    values = column.to_numpy()
+    if values.dtype.kind in 'biuf':
+        return values.astype(np.float64, copy=False)
+    return pd.to_numeric(column).to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+# Compiled preprocessing plan
+# Reads the encoder categories, the scaler mean/scale and the booster feature order once,
+# then writes every request straight into a preallocated matrix in booster column order
+# (or a CSR matrix holding only the numeric and set one-hot values).
+# Columns are matched by name, one-hot names through LightGBM's feature-name sanitization
+# (the original DataFrame-based preprocess() compared the raw names, so multi-word
+# categories never reached the booster); booster features with no matching encoder/scaler
+# output stay 0.
+class PreprocessPlan:
+    def __init__(self, feature_names, mean, scale, categories, dtype=np.float64, unknown='ignore'):
+        if unknown not in UNKNOWN_POLICIES:
+            raise ValueError(f"unknown must be one of {UNKNOWN_POLICIES}")
+        self.unknown = unknown
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+        self.dtype = np.dtype(dtype)
+        position = {booster_feature_name(name): i for i, name in enumerate(self.feature_names)}
+
+        # Numeric columns: output position (or -1 when the booster does not use it)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.num_pos = np.array([position.get(col, -1) for col in NUM_COLS], dtype=np.intp)
+
+        # Categorical columns: category index -> output position (or -1)
+        self.categories = {}
+        self.cat_pos = {}
+        self.cat_lookup = {}
+        for col, cats in zip(CAT_COLS, categories):
+            cats = pd.Index(cats)
+            pos = np.array([position.get(booster_feature_name(f"{col}_{value}"), -1) for value in cats],
+                           dtype=np.intp)
+            self.categories[col] = cats
+            self.cat_pos[col] = pos
+            self.cat_lookup[col] = {value: int(p) for value, p in zip(cats, pos) if p >= 0}
+
+        # Flat slots for the single-record path: (column, position, mean, scale, fill_zero)
+        self.num_slots = [(col, int(p), float(m), float(s), col in FILL_ZERO_COLS)
+                          for col, p, m, s in zip(NUM_COLS, self.num_pos, self.mean, self.scale) if p >= 0]
+
+    @classmethod
+    def from_artifacts(cls, encoder, scaler, feature_names, dtype=np.float64):
+        scaler_cols = list(getattr(scaler, 'feature_names_in_', NUM_COLS))
+        if scaler_cols != NUM_COLS:
+            raise ValueError(f"Scaler was fitted on {scaler_cols}, expected {NUM_COLS}")
+        return cls(feature_names, scaler.mean_, scaler.scale_, encoder.categories_, dtype=dtype)
+
+    def empty(self, n_rows):
+        return np.zeros((n_rows, self.n_features), dtype=self.dtype)
+
+    # Output column for every row of one categorical column (-1: none) and its unknown values.
+    # The category -> column index is applied to the distinct values only: a pandas
+    # categorical (dictionary-encoded input) already carries codes, anything else is
+    # factorized once. Nulls count as unknown.
+    def _cat_positions(self, col, values):
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, uniques = pd.factorize(values)
+        index = self.categories[col].get_indexer(uniques)
+        # trailing -1 so null codes (-1) map to "no column"
+        positions = np.append(np.where(index >= 0, self.cat_pos[col][index], -1), -1)
+        unknown = []
+        if (index < 0).any() or (codes < 0).any():
+            present = np.bincount(codes[codes >= 0], minlength=len(uniques)) > 0
+            unknown = uniques[(index < 0) & present].tolist() + ([None] if (codes < 0).any() else [])
+        return positions[codes], unknown
+
+    # Shared column pass: [(position, scaled values)] for numeric features and
+    # [row -> position] for categorical ones
+    def _columns(self, df, observe, unknown):
+        t0 = time.perf_counter() if observe else 0.0
+        missing = [col for col in NUM_COLS + CAT_COLS
+                   if col not in df.columns and not (col in DATE_PARTS and 'order_date' in df.columns)]
+        if missing:
+            raise KeyError(f"{missing} not in index")
+
+        # Auto-handle date column if present
+        date_parts = {}
+        if 'order_date' in df.columns:
+            dates = pd.DatetimeIndex(pd.to_datetime(df['order_date']))
+            date_parts = {'year': dates.year, 'month': dates.month,
+                          'day': dates.day, 'weekday': dates.weekday}
+        if observe:
+            t0 = _lap(observe, 'dates', t0)
+
+        numeric = []
+        for i, col in enumerate(NUM_COLS):
+            pos = self.num_pos[i]
+            if pos < 0:
+                continue
+            values = _as_float(date_parts[col] if col in date_parts else df[col])
+            if col in FILL_ZERO_COLS:
+                values = np.where(np.isnan(values), 0.0, values)
+            numeric.append((pos, (values - self.mean[i]) / self.scale[i]))
+        if observe:
+            t0 = _lap(observe, 'numeric', t0)
+
+        categorical, unknowns = [], {}
+        for col in CAT_COLS:
+            positions, values = self._cat_positions(col, df[col])
+            categorical.append(positions)
+            if values:
+                unknowns[col] = values
+        if unknowns and (unknown or self.unknown) == 'error':
+            raise UnknownCategory(unknowns)
+        if observe:
+            _lap(observe, 'categorical', t0)
+        return numeric, categorical
+
+    # DataFrame -> feature matrix (rows x booster features).
+    # `observe(stage, seconds)` is called per stage (dates, numeric, categorical) when given;
+    # `unknown` overrides the plan's unknown-category policy.
+    def transform(self, df: pd.DataFrame, out=None, observe=None, unknown=None):
+        n = len(df)
+        numeric, categorical = self._columns(df, observe, unknown)
+        if out is None:
+            X = self.empty(n)
+        else:
+            X = out[:n]
+            X.fill(0)
+        for pos, values in numeric:
+            X[:, pos] = values
+        rows = np.arange(n)
+        for positions in categorical:
+            hit = positions >= 0
+            X[rows[hit], positions[hit]] = 1
+        return X
+
+    # Same features as a scipy CSR matrix: the used numeric columns plus at most one
+    # column per categorical, ~15 stored values per row instead of n_features
+    def transform_csr(self, df: pd.DataFrame, observe=None, unknown=None):
+        from scipy import sparse
+
+        n = len(df)
+        numeric, categorical = self._columns(df, observe, unknown)
+        width = len(numeric) + len(categorical)
+        indices = np.empty((n, width), dtype=np.int32)
+        data = np.ones((n, width), dtype=self.dtype)
+        for j, (pos, values) in enumerate(numeric):
+            indices[:, j] = pos
+            data[:, j] = values
+        for j, positions in enumerate(categorical, start=len(numeric)):
+            indices[:, j] = positions
+        stored = indices >= 0
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(stored.sum(axis=1), out=indptr[1:])
+        X = sparse.csr_matrix((data[stored], indices[stored], indptr), shape=(n, self.n_features))
+        X.sort_indices()
+        return X
+
+    # Single record (dict of SalesInput fields) -> 1 x n_features matrix, no pandas involved.
+    # Pass a reusable `out` buffer to avoid allocating on every call.
+    def transform_record(self, record, out=None, unknown=None):
+        if out is None:
+            x = self.empty(1)
+        else:
+            x = out
+            x.fill(0)
+        row = x[0]
+        for col, pos, mean, scale, fill_zero in self.num_slots:
+            value = record[col]
+            if value is None:
+                value = 0.0 if fill_zero else np.nan
+            row[pos] = (value - mean) / scale
+        unknowns = {}
+        for col in CAT_COLS:
+            pos = self.cat_lookup[col].get(record[col])
+            if pos is not None:
+                row[pos] = 1
+            elif record[col] not in self.categories[col]:
+                unknowns[col] = [record[col]]
+        if unknowns and (unknown or self.unknown) == 'error':
+            raise UnknownCategory(unknowns)
+        return x
@@ -0,0 +1,49 @@
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def _frame_stack(frame):
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+# Wall-clock sampling profiler over all Python threads.
+# Every `interval` seconds it snapshots sys._current_frames() and counts identical stacks.
+# The result is in the collapsed "frame;frame;frame count" format that flamegraph.pl,
+# speedscope and inferno read directly.
+class SamplingProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.running = False
+
+    def profile(self, seconds, interval=0.005):
+        with self._lock:
+            if self.running:
+                raise RuntimeError("A profile is already being captured")
+            self.running = True
+        try:
+            return self._sample(seconds, interval)
+        finally:
+            self.running = False
+
+    def _sample(self, seconds, interval):
+        me = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        stacks = Counter()
+        samples = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stacks[f"{names.get(ident, ident)};{_frame_stack(frame)}"] += 1
+            samples += 1
+            time.sleep(interval)
+        lines = [f"{stack} {count}" for stack, count in stacks.most_common()]
+        return samples, "\n".join(lines) + "\n"
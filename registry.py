@@ -0,0 +1,239 @@
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import weakref
+
+import numpy as np
+
+from artifacts import ARTIFACT_FILES, BUNDLE_FILE, ModelState, build_bundle, fingerprint
+
+REGISTRY_DIR = "model_registry"
+MANIFEST_FILE = "manifest.json"
+TRAINING_REPORT = "training_report.json"
+# Version id for the artifacts in the working directory when the registry is not used
+LOCAL_VERSION = "local"
+
+
+# Default version name: creation time
+def new_version():
+    return time.strftime("v%Y%m%d-%H%M%S")
+
+
+class UnknownVersion(KeyError):
+    pass
+
+
+class SwapInProgress(RuntimeError):
+    pass
+
+
+# Version names are single directory names inside the registry: no separators, no dot files
+def valid_version(version):
+    return (isinstance(version, str) and bool(version) and not version.startswith('.')
+            and not any(sep and sep in version for sep in (os.path.sep, os.path.altsep)))
+
+
+# Versioned model bundles on local disk.
+# Each version is a directory with the booster, encoder and scaler, the compiled
+# model_bundle.bin, a manifest (fingerprint, feature order, creation time) and, for versions
+# built by train.py, the training report. publish()
+# builds the version in a temporary directory and renames it into place, so readers never
+# see a half-written version.
+class ModelRegistry:
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+
+    def path(self, version):
+        if not valid_version(version):
+            raise UnknownVersion(version)
+        return os.path.join(self.root, version)
+
+    def files(self, version):
+        return tuple(os.path.join(self.path(version), name) for name in ARTIFACT_FILES)
+
+    def bundle_path(self, version):
+        return os.path.join(self.path(version), BUNDLE_FILE)
+
+    def report(self, version):
+        try:
+            with open(os.path.join(self.path(version), TRAINING_REPORT)) as f:
+                return json.load(f)
+        except OSError:
+            return None
+
+    def manifest(self, version):
+        try:
+            with open(os.path.join(self.path(version), MANIFEST_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            raise UnknownVersion(version)
+
+    # Published versions, oldest first
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        manifests = []
+        for name in os.listdir(self.root):
+            if not name.startswith('.') and os.path.exists(os.path.join(self.root, name, MANIFEST_FILE)):
+                manifests.append(self.manifest(name))
+        return [m["version"] for m in sorted(manifests, key=lambda m: (m["created_at"], m["version"]))]
+
+    def latest(self):
+        versions = self.versions()
+        return versions[-1] if versions else None
+
+    def publish(self, files=ARTIFACT_FILES, version=None, report=None):
+        version = version or new_version()
+        if not valid_version(version) or version == LOCAL_VERSION:
+            raise ValueError(f"Invalid version name: {version}")
+        if os.path.exists(self.path(version)):
+            raise ValueError(f"Version {version} already exists")
+        os.makedirs(self.root, exist_ok=True)
+        tmp = os.path.join(self.root, f".{version}.{os.getpid()}.tmp")
+        os.makedirs(tmp)
+        try:
+            copies = tuple(os.path.join(tmp, name) for name in ARTIFACT_FILES)
+            for source, target in zip(files, copies):
+                shutil.copyfile(source, target)
+            # compiling also checks that the three artifacts fit together
+            plan, forest = build_bundle(os.path.join(tmp, BUNDLE_FILE), copies)
+            manifest = {
+                "version": version,
+                "created_at": time.time(),
+                "fingerprint": fingerprint(copies),
+                "feature_names": plan.feature_names,
+                "trees": len(forest.roots),
+                "sources": [os.path.abspath(path) for path in files],
+            }
+            with open(os.path.join(tmp, MANIFEST_FILE), 'w') as f:
+                json.dump(manifest, f, indent=2)
+            if report is not None:
+                with open(os.path.join(tmp, TRAINING_REPORT), 'w') as f:
+                    json.dump(report, f, indent=2)
+            os.rename(tmp, self.path(version))
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        return manifest
+
+
+# The serving model, swappable without a restart.
+# `current` is a loaded ModelState. Request handlers read it once and use that version for
+# the whole request, so a swap never mixes two versions inside one request. activate()
+# loads the new version in a background thread, warms it with a canary batch and then
+# replaces `current` in a single assignment. The replaced version stays alive only while
+# in-flight requests still reference it (reported as draining) and is then freed.
+# Attribute access (plan, predictor, ready, timings, ...) falls through to `current`.
+class ModelHost:
+    def __init__(self, registry, version=None, mode="background", canary=None, on_swap=None):
+        self.registry = registry
+        self.canary = canary
+        self.on_swap = on_swap
+        self.loading = None
+        self.last_error = None
+        self.history = []
+        self._retired = []
+        self._lock = threading.Lock()
+        self.current = self._state(version, mode)
+
+    def _state(self, version, mode):
+        if version is None:
+            return ModelState(mode=mode, version=LOCAL_VERSION)
+        self.registry.manifest(version)
+        return ModelState(mode=mode, files=self.registry.files(version),
+                          bundle_path=self.registry.bundle_path(version), version=version)
+
+    def __getattr__(self, name):
+        return getattr(self.__dict__['current'], name)
+
+    def activate(self, version):
+        self.registry.manifest(version)
+        with self._lock:
+            if self.loading is not None:
+                raise SwapInProgress(f"Version {self.loading['version']} is still loading")
+            loading = self.loading = {"version": version, "started_at": time.time()}
+        threading.Thread(target=self._activate, args=(version,), name="model-swap", daemon=True).start()
+        return loading
+
+    def _activate(self, version):
+        timings = {}
+        try:
+            t0 = time.perf_counter()
+            state = self._state(version, "eager")
+            timings["load_s"] = time.perf_counter() - t0
+            timings["warmup"] = self._warm(state)
+            with self._lock:
+                previous = self.current
+                self.current = state
+                self._retired.append((previous.version, weakref.ref(previous)))
+                self.history.append({"version": version, "activated_at": time.time(), "replaced": previous.version,
+                                     **timings})
+                self.last_error = None
+            del previous
+            if self.on_swap is not None:
+                self.on_swap(state)
+        except Exception as e:
+            with self._lock:
+                self.last_error = {"version": version, "error": f"{type(e).__name__}: {e}", "at": time.time()}
+        finally:
+            with self._lock:
+                self.loading = None
+
+    # Score the canary batch once so the first real requests do not pay for lazy
+    # initialisation; compare with the active version to catch a broken model early
+    def _warm(self, state):
+        if self.canary is None:
+            return None
+        frame = self.canary()
+        t0 = time.perf_counter()
+        prediction = state.predictor.predict(state.plan.transform(frame))
+        warmup = {"rows": len(frame), "seconds": time.perf_counter() - t0}
+        if not np.isfinite(prediction).all():
+            raise ValueError("Canary batch produced non-finite predictions")
+        current = self.current
+        if current.ready:
+            reference = current.predictor.predict(current.plan.transform(frame))
+            warmup["mean_abs_change"] = float(np.abs(prediction - reference).mean())
+        return warmup
+
+    # Versions replaced by a swap that in-flight requests still hold
+    def draining(self):
+        with self._lock:
+            self._retired = [(version, ref) for version, ref in self._retired if ref() is not None]
+            return [version for version, _ in self._retired]
+
+    def status(self):
+        current = self.current
+        return {
+            "active": {"version": current.version, "ready": current.ready, "timings": current.timings, "error": current.error},
+            "loading": self.loading,
+            "draining": self.draining(),
+            "last_error": self.last_error,
+            "history": self.history[-10:],
+        }
+
+
+if __name__ == "__main__":
+    # python -m registry publish [--version NAME] [model encoder scaler]
+    # python -m registry list
+    args = sys.argv[1:]
+    registry = ModelRegistry(os.getenv("SALES_REGISTRY_DIR", REGISTRY_DIR))
+    if args[:1] == ["list"]:
+        for version in registry.versions():
+            manifest = registry.manifest(version)
+            print(f"{version}  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(manifest['created_at']))}  "
+                  f"{manifest['trees']} trees  {manifest['fingerprint'][:12]}")
+    elif args[:1] == ["publish"]:
+        args = args[1:]
+        version = None
+        if args[:1] == ["--version"]:
+            version, args = args[1], args[2:]
+        if len(args) not in (0, 3):
+            raise SystemExit("usage: python -m registry publish [--version NAME] [model encoder scaler]")
+        manifest = registry.publish(tuple(args) or ARTIFACT_FILES, version)
+        print(f"published {manifest['version']} to {registry.path(manifest['version'])}")
+    else:
+        raise SystemExit("usage: python -m registry publish [--version NAME] [model encoder scaler] | list")
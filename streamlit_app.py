@@ -1,19 +1,18 @@
+import hashlib
+import os
+import time
 import streamlit as st
 import pandas as pd
-import lightgbm as lgb
-import matplotlib.pyplot as plt
-import seaborn as sns
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 from streamlit.components.v1 import html
-from PIL import Image
-import base64
-import time
-import requests
-import io
-from scipy import stats
+import charts
+from filter_index import FilterIndex
+from ingest import MODEL_COLUMNS, read_bytes
+from preprocessing import CAT_COLS, DATE_PARTS, NUM_COLS
+from timeseries_store import TimeSeriesStore
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -422,6 +421,284 @@ def create_particle_animation():
     """
 
 
+# Cached computations keyed by the upload's content hash.
+# Streamlit reruns this script on every widget change; the parsed frame and everything
+# derived from it are computed once per file (and per set of sidebar filters, via the
+# view key) and evicted least-recently-used. Arguments with a leading underscore are
+# not hashed, so large frames are never re-hashed.
+UPLOAD_CACHE_ENTRIES = 2
+STORE_DIR = os.getenv("SALES_STORE_DIR", ".sales_store")
+DERIVED_CACHE_ENTRIES = 32
+
+
+def upload_digest(uploaded_file):
+    # hash once per uploaded file instead of on every rerun
+    digests = st.session_state.setdefault("upload_digests", {})
+    key = (uploaded_file.file_id, uploaded_file.size)
+    if key not in digests:
+        digests.clear()
+        digests[key] = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    return digests[key]
+
+
+# The frame is shared by every rerun and session: treat it as read-only
+@st.cache_resource(max_entries=UPLOAD_CACHE_ENTRIES, show_spinner="Parsing upload...")
+def load_upload(digest, _data, name, content_type):
+    df = read_bytes(_data, name, content_type)
+    if 'order_date' in df.columns:
+        try:
+            df['order_date'] = pd.to_datetime(df['order_date'])
+        except (ValueError, TypeError):
+            pass  # reported by the trend tab
+        else:
+            # keep a single date-ordered copy, so date filters are plain slices of it
+            df = df.sort_values('order_date', kind='stable', ignore_index=True)
+    return df
+
+
+# Binary-searchable date order and per-category/SKU row positions for the sidebar filters
+@st.cache_resource(max_entries=UPLOAD_CACHE_ENTRIES, show_spinner="Indexing upload...")
+def upload_index(digest, _df):
+    return FilterIndex(_df)
+
+
+# The sidebar filters that narrow the data, as a dict of hashable values (empty: no filter)
+def active_filters(date_range, revenue_threshold, categories, skus):
+    filters = {}
+    if len(date_range) > 0:
+        filters['start'] = date_range[0]
+    if len(date_range) > 1:
+        filters['end'] = date_range[1]
+    if categories:
+        filters['categories'] = tuple(categories)
+    if skus:
+        filters['skus'] = tuple(skus)
+    if revenue_threshold > 0:
+        filters['revenue_min'] = revenue_threshold
+    return filters
+
+
+# Filtered rows of the upload and the cache key for everything derived from them.
+# A date range alone is a slice of the sorted frame (no copy); category, SKU and revenue
+# filters gather the matching positions.
+def filtered_view(digest, index, filters):
+    if not filters:
+        return index.frame, digest
+    selection = index.select(filters.get('start'), filters.get('end'), filters.get('categories'),
+                             filters.get('skus'), filters.get('revenue_min'))
+    key = hashlib.sha1(repr(sorted(filters.items())).encode()).hexdigest()[:16]
+    return index.view(selection), f"{digest}:{key}"
+
+
+@st.cache_data(max_entries=DERIVED_CACHE_ENTRIES, show_spinner=False)
+def frame_summary(view_key, _df):
+    return list(_df.select_dtypes(include=[np.number]).columns), int(_df.isnull().sum().sum())
+
+
+@st.cache_data(max_entries=DERIVED_CACHE_ENTRIES, show_spinner=False)
+def column_stats(view_key, _df, column):
+    values = _df[column]
+    return {"sum": values.sum(), "mean": values.mean(), "min": values.min(), "max": values.max()}
+
+
+@st.cache_data(max_entries=DERIVED_CACHE_ENTRIES, show_spinner=False)
+def revenue_by_category(view_key, _df, column):
+    return _df.groupby('category')[column].sum().sort_values(ascending=False)
+
+
+@st.cache_data(max_entries=DERIVED_CACHE_ENTRIES, show_spinner=False)
+def correlation_matrix(view_key, _df, columns):
+    return _df[list(columns)].corr()
+
+
+# Daily/weekly/monthly revenue per category and SKU, built once per upload and persisted
+# under SALES_STORE_DIR so a reopened file skips the raw-order aggregation entirely
+@st.cache_resource(max_entries=UPLOAD_CACHE_ENTRIES, show_spinner="Aggregating revenue by day...")
+def revenue_store(digest, _df):
+    path = os.path.join(STORE_DIR, f"{digest}.parquet")
+    try:
+        return TimeSeriesStore.load(path)
+    except (OSError, ValueError, ImportError):
+        pass
+    store = TimeSeriesStore.from_frame(_df)
+    try:
+        os.makedirs(STORE_DIR, exist_ok=True)
+        store.save(path)
+    except (OSError, ImportError):
+        pass  # read-only disk or no pyarrow: keep the in-memory store
+    return store
+
+
+# Trend store for a category/SKU/revenue-filtered view: aggregated in memory, not persisted
+@st.cache_resource(max_entries=4, show_spinner="Aggregating revenue by day...")
+def filtered_store(view_key, _df):
+    return TimeSeriesStore.from_frame(_df)
+
+
+# Figures are built once per (file, selection); plotly figures are not mutated after this.
+# charts.py reduces large uploads server-side (sampling, LTTB, pre-binning).
+@st.cache_resource(max_entries=DERIVED_CACHE_ENTRIES, show_spinner=False)
+def revenue_histogram(view_key, _df, column):
+    fig = charts.histogram(_df[column], f"Revenue Distribution - {column}", '#3B82F6', column)
+    fig.update_layout(template="plotly_white")
+    return fig
+
+
+@st.cache_resource(max_entries=DERIVED_CACHE_ENTRIES, show_spinner=False)
+def scatter_3d(view_key, _df, x, y, z, color):
+    return charts.scatter_3d(_df, x, y, z, color, f"3D Revenue Analysis: {x} vs {y} vs {z}")
+
+
+@st.cache_resource(max_entries=DERIVED_CACHE_ENTRIES, show_spinner=False)
+def relationship_scatter(view_key, _df, x, y):
+    return charts.scatter(_df, x, y, f"Relationship: {x} vs {y}", '#10B981')
+
+
+@st.cache_resource(max_entries=DERIVED_CACHE_ENTRIES, show_spinner=False)
+def revenue_trend(view_key, _store, category, sku, start, end):
+    daily = _store.series('D', category, sku, start=start, end=end).reset_index()
+    fig = charts.line(daily, 'date', 'revenue', "Daily Revenue Trend", '#3B82F6')
+    fig.update_layout(template="plotly_white")
+    return fig
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def prediction_figures(key, _df):
+    actual = None
+    if 'revenue' in _df.columns:
+        actual = charts.scatter(_df, 'revenue', 'Predicted_Revenue', "Actual vs Predicted Revenue", '#636EFA',
+                                labels={'revenue': 'Actual Revenue', 'Predicted_Revenue': 'Predicted Revenue'})
+    forecast = charts.histogram(_df['Next_Month_Revenue'], "Distribution of Next Month Revenue Predictions",
+                                '#636EFA', 'Next_Month_Revenue', nbins=30)
+    return actual, forecast
+
+
+# st.plotly_chart plus, when enabled in the sidebar, what the chart costs to send
+def show_chart(fig):
+    t0 = time.perf_counter()
+    st.plotly_chart(fig, use_container_width=True)
+    if show_chart_stats:
+        elapsed = time.perf_counter() - t0
+        st.caption(f"{charts.point_count(fig):,} points, {len(fig.to_json()) / 1024:,.0f} KB payload, "
+                   f"serialized in {elapsed * 1e3:,.0f} ms")
+
+
+@st.cache_data(max_entries=DERIVED_CACHE_ENTRIES, show_spinner="Decomposing time series...")
+def decompose_daily_revenue(view_key, _store, category, sku, start, end):
+    from statsmodels.tsa.seasonal import seasonal_decompose
+
+    # Daily totals from the store; days without orders are already 0
+    daily_revenue = _store.series('D', category, sku, start=start, end=end)
+
+    # Decompose the time series
+    result = seasonal_decompose(daily_revenue, model='additive', period=30)
+    return daily_revenue, result.trend, result.seasonal, result.resid
+
+
+# Model scoring for the Predictions tab: in-process with the same compiled preprocessing
+# as the API, or through the FastAPI /predict-batch route over pooled HTTP connections.
+# Date parts are derived from order_date, which also drives the next-month forecast
+SCORING_COLUMNS = [col for col in MODEL_COLUMNS if col not in DATE_PARTS]
+PREDICTION_CHUNK_ROWS = 50_000
+API_CHUNK_ROWS = 5_000
+API_CONCURRENCY = 4
+
+
+@st.cache_resource(show_spinner="Loading model...")
+def load_model():
+    from artifacts import ModelState
+    return ModelState(mode="eager")
+
+
+@st.cache_resource(show_spinner=False)
+def api_session(base_url):
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=API_CONCURRENCY)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# Same rows with order_date moved one calendar month ahead (for the next-month forecast)
+def shift_one_month(frame):
+    shifted = frame.copy()
+    shifted['order_date'] = pd.to_datetime(shifted['order_date']) + pd.DateOffset(months=1)
+    return shifted
+
+
+def score_in_process(frame, progress):
+    model = load_model()
+    plan, predictor = model.plan, model.predictor
+    chunk_rows = min(PREDICTION_CHUNK_ROWS, max(len(frame), 1))
+    buffer = plan.empty(chunk_rows)
+    prediction = np.empty(len(frame))
+    for start in range(0, len(frame), chunk_rows):
+        chunk = frame.iloc[start:start + chunk_rows]
+        prediction[start:start + len(chunk)] = predictor.predict(plan.transform(chunk, out=buffer))
+        progress((start + len(chunk)) / len(frame))
+    return prediction
+
+
+def score_via_api(frame, base_url, progress):
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    records = frame[[col for col in NUM_COLS if col not in DATE_PARTS] + CAT_COLS].copy()
+    dates = pd.DatetimeIndex(pd.to_datetime(frame['order_date']))
+    records['year'], records['month'], records['day'], records['weekday'] = (
+        dates.year, dates.month, dates.day, dates.weekday)
+    records = records.astype(object).where(records.notna(), None)
+    session = api_session(base_url)
+
+    def post(start):
+        payload = records.iloc[start:start + API_CHUNK_ROWS].to_dict('records')
+        response = session.post(base_url.rstrip('/') + "/predict-batch", json=payload, timeout=300)
+        if response.status_code != 200:
+            raise RuntimeError(f"/predict-batch returned {response.status_code}: {response.text[:300]}")
+        return start, response.json()["predictions"]
+
+    prediction = np.empty(len(frame))
+    done = 0
+    with ThreadPoolExecutor(API_CONCURRENCY) as pool:
+        for future in as_completed([pool.submit(post, start) for start in range(0, len(frame), API_CHUNK_ROWS)]):
+            start, values = future.result()
+            prediction[start:start + len(values)] = values
+            done += len(values)
+            progress(done / len(frame))
+    return prediction
+
+
+# Current and next-month predictions for an upload, kept per session for the latest file
+def predict_upload(view_key, df, backend, api_url):
+    key = (view_key, backend, api_url if backend == "api" else None)
+    stored = st.session_state.get("predictions")
+    if stored is not None and stored[0] == key:
+        return stored[1]
+    bar = st.progress(0.0, text="Scoring uploaded orders...")
+    frame = df[SCORING_COLUMNS]
+    steps = [frame, shift_one_month(frame)]
+    results = []
+    for i, rows in enumerate(steps):
+        def progress(fraction, i=i):
+            bar.progress((i + fraction) / len(steps),
+                         text=f"Scoring {'next month' if i else 'uploaded orders'}... {fraction:.0%}")
+        if backend == "api":
+            results.append(score_via_api(rows, api_url, progress))
+        else:
+            results.append(score_in_process(rows, progress))
+    bar.empty()
+    predictions = pd.DataFrame({"Predicted_Revenue": results[0], "Next_Month_Revenue": results[1]}, index=df.index)
+    st.session_state["predictions"] = (key, predictions)
+    return predictions
+
+
+@st.cache_data(max_entries=2, show_spinner="Preparing download...")
+def predictions_csv(view_key, backend, api_url, _df):
+    return _df.to_csv(index=False).encode('utf-8')
+
+
 # Sidebar configuration
 with st.sidebar:
     st.markdown("## 🎛️ Dashboard Controls")
@@ -437,11 +714,13 @@ with st.sidebar:
     st.markdown("### 📊 Visualization Options")
     show_animations = st.checkbox("Enable Animations", value=True)
     chart_theme = st.selectbox("Chart Theme", ["Default", "Dark", "Colorful"])
+    show_chart_stats = st.checkbox("Show chart payload stats", value=False)
 
     # Advanced filters
     st.markdown("### 🔍 Advanced Filters")
     date_range = st.date_input("Date Range", value=[])
-    revenue_threshold = st.slider("Revenue Threshold", 0, 10000, 1000)
+    revenue_threshold = st.slider("Revenue Threshold", 0, 10000, 0,
+                                  help="Only include orders with at least this much revenue")
 
 # Main dashboard header
 st.markdown("""
@@ -497,12 +776,30 @@ if show_animations:
         html(create_particle_animation(), height=250)
 
 # File upload section
-uploaded_file = st.file_uploader("📂 Upload Your Sales Data (CSV)", type="csv")
+uploaded_file = st.file_uploader("📂 Upload Your Sales Data (CSV, Parquet or Arrow)",
+                                 type=["csv", "parquet", "arrow", "feather"])
 
 if uploaded_file is not None:
     try:
         # Load and display data
-        df = pd.read_csv(io.StringIO(uploaded_file.getvalue().decode("utf-8")))
+        digest = upload_digest(uploaded_file)
+        full_df = load_upload(digest, uploaded_file.getvalue(),
+                              uploaded_file.name, uploaded_file.type)
+
+        # Sidebar filters apply to every tab through one filtered view of the upload
+        df, view_key, filters = full_df, digest, {}
+        if 'order_date' in full_df.columns and pd.api.types.is_datetime64_any_dtype(full_df['order_date']):
+            index = upload_index(digest, full_df)
+            with st.sidebar:
+                categories = st.multiselect("Categories", index.values('category'), key="filter_categories")
+                skus = st.multiselect("SKUs", index.values('sku'), key="filter_skus")
+            filters = active_filters(date_range, revenue_threshold, categories, skus)
+            df, view_key = filtered_view(digest, index, filters)
+            if filters:
+                st.sidebar.caption(f"Showing {len(df):,} of {len(full_df):,} orders")
+        else:
+            st.sidebar.caption("Filters need a parseable order_date column")
+        numeric_cols, missing_data = frame_summary(view_key, df)
 
         # Check for required columns
         required_columns = ['order_id', 'order_date', 'sku', 'color', 'size', 'unit_price',
@@ -541,7 +838,6 @@ if uploaded_file is not None:
             """, unsafe_allow_html=True)
 
         with col3:
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
             st.markdown(f"""
             <div class="metric-card" style="background: linear-gradient(135deg, #8B5CF6 0%, #A855F7 100%);">
                 <h3>Numeric Columns</h3>
@@ -550,7 +846,6 @@ if uploaded_file is not None:
             """, unsafe_allow_html=True)
 
         with col4:
-            missing_data = df.isnull().sum().sum()
             st.markdown(f"""
             <div class="metric-card" style="background: linear-gradient(135deg, #EF4444 0%, #F87171 100%);">
                 <h3>Missing Values</h3>
@@ -578,11 +873,8 @@ if uploaded_file is not None:
                         "Select Revenue Column", revenue_cols)
 
                     # Revenue distribution
-                    fig = px.histogram(df, x=selected_revenue_col,
-                                       title=f"Revenue Distribution - {selected_revenue_col}",
-                                       color_discrete_sequence=['#3B82F6'])
-                    fig.update_layout(template="plotly_white")
-                    st.plotly_chart(fig, use_container_width=True)
+                    fig = revenue_histogram(view_key, df, selected_revenue_col)
+                    show_chart(fig)
 
                     # 3D Scatter Plot
                     st.markdown("### 3D Revenue Analysis")
@@ -595,20 +887,18 @@ if uploaded_file is not None:
                     with col3:
                         z_axis = st.selectbox("Z-Axis", numeric_cols, index=2)
 
-                    fig_3d = px.scatter_3d(df, x=x_axis, y=y_axis, z=z_axis,
-                                           color=selected_revenue_col,
-                                           title=f"3D Revenue Analysis: {x_axis} vs {y_axis} vs {z_axis}",
-                                           color_continuous_scale='Viridis')
-                    st.plotly_chart(fig_3d, use_container_width=True)
+                    fig_3d = scatter_3d(view_key, df, x_axis, y_axis, z_axis, selected_revenue_col)
+                    show_chart(fig_3d)
 
                     # Top revenue insights
                     col1, col2 = st.columns(2)
 
                     with col1:
                         st.markdown("#### 💰 Revenue Insights")
-                        total_revenue = df[selected_revenue_col].sum()
-                        avg_revenue = df[selected_revenue_col].mean()
-                        max_revenue = df[selected_revenue_col].max()
+                        revenue_stats = column_stats(view_key, df, selected_revenue_col)
+                        total_revenue = revenue_stats["sum"]
+                        avg_revenue = revenue_stats["mean"]
+                        max_revenue = revenue_stats["max"]
 
                         st.markdown(f"""
                         <div class="insight-card">
@@ -616,21 +906,20 @@ if uploaded_file is not None:
                             <p><strong>Total Revenue:</strong> ${total_revenue:,.2f}</p>
                             <p><strong>Average Revenue:</strong> ${avg_revenue:.2f}</p>
                             <p><strong>Maximum Revenue:</strong> ${max_revenue:.2f}</p>
-                            <p><strong>Revenue Range:</strong> ${df[selected_revenue_col].min():.2f} - ${max_revenue:.2f}</p>
+                            <p><strong>Revenue Range:</strong> ${revenue_stats['min']:.2f} - ${max_revenue:.2f}</p>
                         </div>
                         """, unsafe_allow_html=True)
 
                     with col2:
                         # Revenue by category
                         if 'category' in df.columns:
-                            revenue_by_cat = df.groupby(
-                                'category')[selected_revenue_col].sum().sort_values(ascending=False)
+                            revenue_by_cat = revenue_by_category(view_key, df, selected_revenue_col)
 
                             fig = px.bar(x=revenue_by_cat.index, y=revenue_by_cat.values,
                                          title=f"Revenue by Category",
                                          color=revenue_by_cat.values,
                                          color_continuous_scale='Viridis')
-                            st.plotly_chart(fig, use_container_width=True)
+                            show_chart(fig)
 
                 else:
                     st.warning("No revenue columns detected in the dataset.")
@@ -641,20 +930,18 @@ if uploaded_file is not None:
             st.markdown(
                 '<div class="dashboard-section correlation-matrix">', unsafe_allow_html=True)
 
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-
             if len(numeric_cols) > 1:
                 st.markdown("#### 🔗 Feature Correlation Analysis")
 
                 # Correlation matrix
-                corr_data = df[numeric_cols].corr()
+                corr_data = correlation_matrix(view_key, df, tuple(numeric_cols))
 
                 fig = px.imshow(corr_data,
                                 title="Feature Correlation Matrix",
                                 color_continuous_scale='RdBu',
                                 aspect="auto")
                 fig.update_layout(template="plotly_white")
-                st.plotly_chart(fig, use_container_width=True)
+                show_chart(fig)
 
                 # Feature relationships
                 st.markdown("#### 📈 Feature Relationships")
@@ -669,14 +956,11 @@ if uploaded_file is not None:
                         "Select Feature 2", numeric_cols, key="feat2")
 
                 if feature1 != feature2:
-                    fig = px.scatter(df, x=feature1, y=feature2,
-                                     title=f"Relationship: {feature1} vs {feature2}",
-                                     trendline="ols",
-                                     color_discrete_sequence=['#10B981'])
-                    st.plotly_chart(fig, use_container_width=True)
-
-                    # Calculate correlation coefficient
-                    correlation = df[feature1].corr(df[feature2])
+                    fig = relationship_scatter(view_key, df, feature1, feature2)
+                    show_chart(fig)
+
+                    # Correlation coefficient, read from the cached matrix
+                    correlation = corr_data.loc[feature1, feature2]
                     st.markdown(f"""
                     <div class="insight-card">
                         <h4>Correlation Insight</h4>
@@ -698,45 +982,42 @@ if uploaded_file is not None:
                 st.markdown("#### 📈 Time Series Trend Analysis")
 
                 try:
-                    df['order_date'] = pd.to_datetime(df['order_date'])
-
                     if 'revenue' in df.columns:
-                        # Time series plot
-                        df_sorted = df.sort_values('order_date')
+                        # a date range alone slices the persisted per-upload store
+                        if set(filters) <= {'start', 'end'}:
+                            store = revenue_store(digest, full_df)
+                            start, end = filters.get('start'), filters.get('end')
+                        else:
+                            store = filtered_store(view_key, df)
+                            start = end = None
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            category = st.selectbox("Category", ["All categories"] + store.categories(),
+                                                    key="trend_category")
+                            category = None if category == "All categories" else category
+                        with col2:
+                            sku = st.selectbox("SKU", ["All SKUs"] + store.skus(category), key="trend_sku")
+                            sku = None if sku == "All SKUs" else sku
 
-                        fig = px.line(df_sorted, x='order_date', y='revenue',
-                                      title="Revenue Trend Over Time",
-                                      color_discrete_sequence=['#3B82F6'])
-                        fig.update_layout(template="plotly_white")
-                        st.plotly_chart(fig, use_container_width=True)
+                        # Time series plot
+                        fig = revenue_trend(view_key, store, category, sku, start, end)
+                        show_chart(fig)
 
                         # Trend analysis
-                        monthly_revenue = df_sorted.groupby(
-                            df_sorted['order_date'].dt.to_period('M'))['revenue'].sum()
+                        monthly = store.series('M', category, sku, start=start, end=end)
+                        monthly = monthly.set_axis(monthly.index.to_period('M'))
 
-                        fig = px.bar(x=monthly_revenue.index.astype(str), y=monthly_revenue.values,
+                        fig = px.bar(x=monthly.index.astype(str), y=monthly.values,
                                      title="Monthly Revenue Trend",
-                                     color=monthly_revenue.values,
+                                     color=monthly.values,
                                      color_continuous_scale='Viridis')
-                        st.plotly_chart(fig, use_container_width=True)
+                        show_chart(fig)
 
                         # Interactive time series decomposition
                         st.markdown("#### 🕰️ Time Series Decomposition")
 
                         if st.button("Analyze Time Series Components"):
-                            from statsmodels.tsa.seasonal import seasonal_decompose
-
-                            # Resample to daily data
-                            daily_revenue = df_sorted.set_index(
-                                'order_date')['revenue'].resample('D').sum()
-
-                            # Fill any missing values
-                            daily_revenue = daily_revenue.fillna(
-                                daily_revenue.rolling(7, min_periods=1).mean())
-
-                            # Decompose the time series
-                            result = seasonal_decompose(
-                                daily_revenue, model='additive', period=30)
+                            daily_revenue, trend, seasonal, resid = decompose_daily_revenue(view_key, store, category, sku, start, end)
 
                             # Plot decomposition
                             fig = make_subplots(
@@ -745,15 +1026,15 @@ if uploaded_file is not None:
                             fig.add_trace(go.Scatter(
                                 x=daily_revenue.index, y=daily_revenue, name='Observed'), row=1, col=1)
                             fig.add_trace(go.Scatter(
-                                x=result.trend.index, y=result.trend, name='Trend'), row=2, col=1)
+                                x=trend.index, y=trend, name='Trend'), row=2, col=1)
                             fig.add_trace(go.Scatter(
-                                x=result.seasonal.index, y=result.seasonal, name='Seasonal'), row=3, col=1)
+                                x=seasonal.index, y=seasonal, name='Seasonal'), row=3, col=1)
                             fig.add_trace(go.Scatter(
-                                x=result.resid.index, y=result.resid, name='Residual'), row=4, col=1)
+                                x=resid.index, y=resid, name='Residual'), row=4, col=1)
 
                             fig.update_layout(
                                 height=800, title_text="Time Series Decomposition")
-                            st.plotly_chart(fig, use_container_width=True)
+                            show_chart(fig)
 
                 except Exception as e:
                     st.error(f"Error processing date column: {e}")
@@ -768,62 +1049,65 @@ if uploaded_file is not None:
                         unsafe_allow_html=True)
             st.markdown("#### 🎯 AI‑Powered Predictions")
 
-            if st.button("🔄 Generate Predictions", key="local_pred"):
-                with st.spinner('Analyzing data and generating predictions...'):
-                    try:
-                        # Simulate prediction (in a real app, you'd use your actual model)
-                        if 'revenue' in df.columns:
-                            # Create some simulated predictions
-                            np.random.seed(42)
-                            df["Predicted_Revenue"] = df['revenue'] * \
-                                (1 + np.random.normal(0, 0.1, len(df)))
-                            df["Next_Month_Revenue"] = df['revenue'] * \
-                                (1 + np.random.normal(0.05, 0.15, len(df)))
-
-                            st.success("✅ Predictions generated successfully!")
-
-                            # Show prediction results
-                            st.markdown("### 📊 Prediction Results")
-
-                            col1, col2 = st.columns(2)
-
-                            with col1:
-                                st.markdown("#### Actual vs Predicted Revenue")
-                                fig = px.scatter(df, x='revenue', y='Predicted_Revenue',
-                                                 trendline="ols",
-                                                 title="Actual vs Predicted Revenue",
-                                                 labels={'revenue': 'Actual Revenue', 'Predicted_Revenue': 'Predicted Revenue'})
-                                st.plotly_chart(fig, use_container_width=True)
-
-                            with col2:
-                                st.markdown("#### Next Month Revenue Forecast")
-                                fig = px.histogram(df, x='Next_Month_Revenue',
-                                                   title="Distribution of Next Month Revenue Predictions",
-                                                   nbins=30)
-                                st.plotly_chart(fig, use_container_width=True)
-
-                            # Show top predictions
-                            st.markdown("### 🏆 Top Predictions")
-                            top_predictions = df.nlargest(10, 'Next_Month_Revenue')[
-                                ['order_id', 'category', 'revenue', 'Next_Month_Revenue']]
-                            st.dataframe(top_predictions.style.format({
-                                'revenue': '${:,.2f}',
-                                'Next_Month_Revenue': '${:,.2f}'
-                            }))
-
-                            # Download predictions
-                            csv = df.to_csv(index=False).encode('utf-8')
-                            st.download_button(
-                                label="📥 Download Predictions",
-                                data=csv,
-                                file_name='sales_predictions.csv',
-                                mime='text/csv'
-                            )
-                        else:
-                            st.error(
-                                "Revenue column not found - cannot generate predictions")
-                    except Exception as e:
-                        st.error(f"Prediction failed: {e}")
+            backend_label = st.radio("Scoring backend", ["In-process model", "FastAPI service"],
+                                     horizontal=True, key="pred_backend")
+            backend = "api" if backend_label == "FastAPI service" else "local"
+            api_url = None
+            if backend == "api":
+                api_url = st.text_input("API base URL", os.getenv("SALES_API_URL", "http://localhost:8000"),
+                                        key="pred_api_url")
+
+            stored = st.session_state.get("predictions")
+            already_scored = stored is not None and stored[0] == (view_key, backend, api_url)
+            if st.button("🔄 Generate Predictions", key="local_pred") or already_scored:
+                try:
+                    missing_model_columns = [col for col in SCORING_COLUMNS if col not in df.columns]
+                    if missing_model_columns:
+                        st.error("Cannot generate predictions - missing model columns: " +
+                                 ", ".join(missing_model_columns))
+                    else:
+                        # The uploaded frame is cached and shared; add prediction columns to a copy
+                        df = df.join(predict_upload(view_key, df, backend, api_url))
+
+                        st.success("✅ Predictions generated successfully!")
+
+                        # Show prediction results
+                        st.markdown("### 📊 Prediction Results")
+
+                        col1, col2 = st.columns(2)
+
+                        with col1:
+                            st.markdown("#### Actual vs Predicted Revenue")
+                            actual_fig, forecast_fig = prediction_figures((view_key, backend, api_url), df)
+                            if actual_fig is not None:
+                                show_chart(actual_fig)
+                            else:
+                                st.info("No revenue column to compare against.")
+
+                        with col2:
+                            st.markdown("#### Next Month Revenue Forecast")
+                            show_chart(forecast_fig)
+
+                        # Show top predictions
+                        st.markdown("### 🏆 Top Predictions")
+                        shown = [col for col in ['order_id', 'category', 'revenue', 'Predicted_Revenue',
+                                                 'Next_Month_Revenue'] if col in df.columns]
+                        top_predictions = df.nlargest(10, 'Next_Month_Revenue')[shown]
+                        st.dataframe(top_predictions.style.format({
+                            col: '${:,.2f}' for col in ['revenue', 'Predicted_Revenue', 'Next_Month_Revenue']
+                            if col in shown
+                        }))
+
+                        # Download predictions
+                        csv = predictions_csv(view_key, backend, api_url, df)
+                        st.download_button(
+                            label="📥 Download Predictions",
+                            data=csv,
+                            file_name='sales_predictions.csv',
+                            mime='text/csv'
+                        )
+                except Exception as e:
+                    st.error(f"Prediction failed: {e}")
             else:
                 st.markdown("""
                 <div class="feature-showcase">
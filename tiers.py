@@ -0,0 +1,102 @@
+import time
+
+import numpy as np
+
+from ingest import TARGET, load_orders, split_holdout
+
+# Latency tiers: name -> tolerated mean relative deviation from the full model's prediction.
+# "full" scores every tree; the others use the shortest tree prefix within their tolerance.
+DEFAULT_TIERS = {"full": 0.0, "fast": 0.01, "preview": 0.05}
+# Curve rows: orders of the last CURVE_DAYS days of the CSV, at most CURVE_ROWS of them
+CURVE_DAYS = 30
+CURVE_ROWS = 2_000
+# Prefix lengths reported by to_dict()
+CURVE_POINTS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+# "fast=0.01,preview=0.05" -> {"full": 0.0, "fast": 0.01, "preview": 0.05}
+def parse_tiers(spec):
+    tiers = {"full": 0.0}
+    if not spec:
+        return {**tiers, **DEFAULT_TIERS}
+    for item in spec.split(","):
+        name, sep, tolerance = item.partition("=")
+        name = name.strip()
+        if not name or not sep:
+            raise ValueError(f"Expected name=tolerance in SALES_TIERS, got {item!r}")
+        tolerance = float(tolerance)
+        if not 0 <= tolerance < 1:
+            raise ValueError(f"Tier {name} tolerance must be in [0, 1), got {tolerance}")
+        tiers[name] = tolerance
+    return tiers
+
+
+# Held-out orders with their actual revenue
+def holdout_orders(path, days=CURVE_DAYS, max_rows=CURVE_ROWS):
+    _, holdout = split_holdout(load_orders([path]), days)
+    return holdout.iloc[-max_rows:]
+
+
+def _best_time(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+# Accuracy vs number of trees on held-out rows, and the tree prefix each tier scores with.
+# Every prefix comes from one pass: per-tree outputs (rows x trees) from the compiled forest,
+# cumulatively summed along the trees. For a prefix of k trees:
+#   relative_error  mean |prefix - full| / mean |full|   (what tier tolerances apply to)
+#   rmse            against the actual revenue of the rows
+# A tier gets the smallest k whose error, and the error of every longer prefix, is within
+# its tolerance, so a noisy dip early in the curve is never picked. The predictor (the
+# booster that serves requests) is timed on the same rows for each tier.
+class IterationCurve:
+    def __init__(self, forest, X, y=None, tiers=DEFAULT_TIERS, predictor=None):
+        t0 = time.perf_counter()
+        staged = np.cumsum(forest.tree_outputs(X), axis=1)
+        full = staged[:, -1:]
+        scale = max(np.abs(full).mean(), np.finfo(np.float64).tiny)
+        deviation = np.abs(staged - full)
+        self.trees = staged.shape[1]
+        self.rows = len(X)
+        self.relative_error = deviation.mean(axis=0) / scale
+        self.p95_relative_error = np.percentile(deviation, 95, axis=0) / scale
+        self.rmse = None if y is None else np.sqrt(((staged - np.asarray(y)[:, None]) ** 2).mean(axis=0))
+        # worst error of any prefix at least this long
+        worst = np.maximum.accumulate(self.relative_error[::-1])[::-1]
+        self.tolerances = dict(tiers)
+        self.iterations = {name: int(np.argmax(worst <= tolerance)) + 1 for name, tolerance in tiers.items()}
+        self.seconds = time.perf_counter() - t0
+        self.timings = {}
+        if predictor is not None:
+            for name, k in self.iterations.items():
+                self.timings[name] = _best_time(lambda: predictor.predict(X, num_iteration=k))
+
+    @classmethod
+    def from_csv(cls, path, plan, forest, tiers=DEFAULT_TIERS, predictor=None):
+        orders = holdout_orders(path)
+        return cls(forest, plan.transform(orders), orders[TARGET].to_numpy(dtype=np.float64), tiers, predictor)
+
+    def tier(self, name):
+        return {"tolerance": self.tolerances[name], "num_iteration": self.iterations[name],
+                "relative_error": float(self.relative_error[self.iterations[name] - 1]),
+                "p95_relative_error": float(self.p95_relative_error[self.iterations[name] - 1]),
+                **({"speedup": self.timings["full"] / self.timings[name]}
+                   if "full" in self.timings and self.timings[name] > 0 else {})}
+
+    def to_dict(self):
+        points = sorted({k for k in CURVE_POINTS if k < self.trees} | {self.trees})
+        return {
+            "rows": self.rows,
+            "trees": self.trees,
+            "tiers": {name: self.tier(name) for name in self.tolerances},
+            "curve": [{"num_iteration": k, "relative_error": float(self.relative_error[k - 1]),
+                       "p95_relative_error": float(self.p95_relative_error[k - 1]),
+                       **({"rmse": float(self.rmse[k - 1])} if self.rmse is not None else {})}
+                      for k in points],
+            "seconds": self.seconds,
+        }
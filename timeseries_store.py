@@ -0,0 +1,129 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+KEYS = ['date', 'category', 'sku']
+FREQUENCIES = {'D': 'D', 'W': 'W-SUN', 'M': 'MS'}
+STORE_FORMAT = 1
+
+
+# One row per (day, category, sku) with summed revenue/quantity and the order count
+def aggregate_daily(df):
+    dates = pd.to_datetime(df['order_date'])
+    n = len(df)
+    frame = pd.DataFrame({
+        'date': dates.dt.normalize(),
+        'category': df['category'] if 'category' in df.columns else np.full(n, "All"),
+        'sku': df['sku'] if 'sku' in df.columns else np.full(n, "All"),
+        'revenue': df['revenue'].astype(np.float64),
+        'quantity': df['quantity'].astype(np.float64) if 'quantity' in df.columns else np.zeros(n),
+        'orders': np.ones(n, dtype=np.int64),
+    })
+    frame = frame[frame['date'].notna()]
+    return frame.groupby(KEYS, sort=True, dropna=False).sum().reset_index()
+
+
+# Pre-aggregated revenue time series for trend charts and decomposition.
+# Raw orders are reduced once to daily totals per category and SKU; weekly and monthly
+# series are resampled from the daily table, so queries touch a few hundred points.
+# append() folds new orders into the existing totals without revisiting old rows, and
+# save()/load() persist the daily table as Parquet.
+class TimeSeriesStore:
+    def __init__(self, daily=None, rows=0):
+        self.daily = daily if daily is not None else pd.DataFrame(
+            {'date': pd.Series(dtype='datetime64[ns]'), 'category': [], 'sku': [],
+             'revenue': [], 'quantity': [], 'orders': pd.Series(dtype=np.int64)})
+        self.rows = rows
+        self._series = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(aggregate_daily(df), len(df))
+
+    def append(self, df):
+        if len(df) == 0:
+            return self
+        combined = pd.concat([self.daily, aggregate_daily(df)], ignore_index=True)
+        self.daily = combined.groupby(KEYS, sort=True, dropna=False).sum().reset_index()
+        self.rows += len(df)
+        self._series.clear()
+        return self
+
+    def categories(self):
+        return sorted(self.daily['category'].dropna().unique().tolist())
+
+    def skus(self, category=None):
+        daily = self.daily if category is None else self.daily[self.daily['category'] == category]
+        return sorted(daily['sku'].dropna().unique().tolist())
+
+    # Totals per period (freq 'D', 'W' or 'M'); days without orders count as 0.
+    # start/end (inclusive dates) restrict the daily totals before resampling
+    def series(self, freq='D', category=None, sku=None, measure='revenue', start=None, end=None):
+        key = (freq, category, sku, measure, start, end)
+        cached = self._series.get(key)
+        if cached is not None:
+            return cached
+        daily = self.daily
+        if category is not None:
+            daily = daily[daily['category'] == category]
+        if sku is not None:
+            daily = daily[daily['sku'] == sku]
+        totals = daily.groupby('date')[measure].sum()
+        if len(self.daily):
+            days = pd.date_range(self.daily['date'].min(), self.daily['date'].max(), freq='D')
+            totals = totals.reindex(days, fill_value=0)
+        if start is not None or end is not None:
+            totals = totals.loc[pd.Timestamp(start) if start is not None else None:
+                                pd.Timestamp(end) if end is not None else None]
+        if freq != 'D':
+            totals = totals.resample(FREQUENCIES[freq]).sum()
+        totals.index.name = 'date'
+        self._series[key] = totals
+        return totals
+
+    # Periods x categories table of totals
+    def by_category(self, freq='M', measure='revenue'):
+        return pd.DataFrame({category: self.series(freq, category, measure=measure) for category in self.categories()})
+
+    def save(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(self.daily, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                               b"sales_store_format": str(STORE_FORMAT).encode(),
+                                               b"sales_store_rows": str(self.rows).encode()})
+        tmp = f"{path}.{os.getpid()}.tmp"
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path)
+        metadata = table.schema.metadata or {}
+        if metadata.get(b"sales_store_format") != str(STORE_FORMAT).encode():
+            raise ValueError(f"{path} is not a format {STORE_FORMAT} time-series store")
+        daily = table.to_pandas()
+        daily['date'] = pd.to_datetime(daily['date'])
+        return cls(daily, int(metadata[b"sales_store_rows"]))
+
+
+if __name__ == "__main__":
+    # python -m timeseries_store build orders.csv store.parquet
+    # python -m timeseries_store append new_orders.csv store.parquet
+    from ingest import detect_format, iter_chunks
+
+    if len(sys.argv) != 4 or sys.argv[1] not in ("build", "append"):
+        raise SystemExit("usage: python -m timeseries_store build|append <orders file> <store.parquet>")
+    command, source, path = sys.argv[1:]
+    store = TimeSeriesStore() if command == "build" else TimeSeriesStore.load(path)
+    columns = ['order_date', 'category', 'sku', 'revenue', 'quantity']
+    with open(source, 'rb') as f:
+        for chunk in iter_chunks(f, detect_format(source, None), 1_000_000, columns):
+            store.append(chunk)
+    store.save(path)
+    print(f"{path}: {store.rows:,} orders in {len(store.daily):,} daily rows")
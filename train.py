@@ -0,0 +1,253 @@
+import argparse
+import hashlib
+import json
+import os
+import resource
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from artifacts import ARTIFACT_FILES, ENCODER_FILE, MODEL_FILE, SCALER_FILE, fingerprint
+from ingest import TARGET, load_orders, split_holdout
+from preprocessing import CAT_COLS, DATE_PARTS, FILL_ZERO_COLS, NUM_COLS, PreprocessPlan
+from registry import LOCAL_VERSION, REGISTRY_DIR, ModelRegistry, UnknownVersion, new_version
+
+TRAIN_CSV = "Clean_Women_Ecommerce_Purchase_Data.csv"
+CACHE_DIR = ".train_cache"
+# Hyperparameters of the shipped lightgbm_model.txt
+PARAMS = {
+    "objective": "regression", "metric": "l1", "learning_rate": 0.138956, "num_leaves": 219, "max_depth": 4,
+    "min_data_in_leaf": 43, "bagging_fraction": 0.843, "bagging_freq": 7, "feature_fraction": 0.667,
+    "lambda_l1": 0.000403675, "lambda_l2": 0.501454, "verbose": -1,
+}
+# Parameters that shape the binned Dataset, so they are part of its cache key.
+# feature_pre_filter is off so a cached Dataset stays valid when min_data_in_leaf changes.
+DATASET_PARAMS = {"max_bin": 255, "bin_construct_sample_cnt": 200_000, "data_random_seed": 1,
+                  "feature_pre_filter": False, "verbose": -1}
+# Bumped when the cached Dataset layout changes
+CACHE_FORMAT = 3
+
+
+# Wall-clock time and peak RSS per training stage. Peak RSS (not tracemalloc) so LightGBM's
+# native allocations are counted; it is the process high-water mark after each stage.
+class TrainingClock:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        yield
+        self.stages[name] = {"seconds": round(time.perf_counter() - t0, 3), "peak_rss_mb": peak_rss_mb()}
+
+    def summary(self):
+        return {"wall_s": round(time.perf_counter() - self.started, 3), "peak_rss_mb": peak_rss_mb(),
+                "stages": self.stages}
+
+
+def peak_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+# Numeric columns exactly as PreprocessPlan sees them (date parts derived, fill-zero columns filled)
+def numeric_frame(df):
+    dates = pd.DatetimeIndex(df['order_date'])
+    parts = {'year': dates.year, 'month': dates.month, 'day': dates.day, 'weekday': dates.weekday}
+    frame = pd.DataFrame({col: parts[col] if col in DATE_PARTS else pd.to_numeric(df[col]) for col in NUM_COLS})
+    frame[FILL_ZERO_COLS] = frame[FILL_ZERO_COLS].fillna(0)
+    return frame
+
+
+def fit_preprocessing(df):
+    encoder = OneHotEncoder(handle_unknown='ignore').fit(df[CAT_COLS].astype(object))
+    scaler = StandardScaler().fit(numeric_frame(df))
+    return encoder, scaler
+
+
+# Booster column order: scaled numerics, then one-hot columns. LightGBM stores multi-word
+# names with "_" for spaces, which PreprocessPlan maps back to the encoder's categories.
+def feature_names(encoder):
+    return NUM_COLS + [f"{col}_{value}" for col, values in zip(CAT_COLS, encoder.categories_) for value in values]
+
+
+# Features go through the serving PreprocessPlan, as a CSR matrix: ~18 stored values per row
+# instead of 59 dense columns
+def build_dataset(plan, df, target, reference=None, free_raw_data=True):
+    X = plan.transform_csr(df)
+    return lgb.Dataset(X, label=df[target].to_numpy(dtype=np.float64), feature_name=plan.feature_names,
+                       params=DATASET_PARAMS, reference=reference, free_raw_data=free_raw_data)
+
+
+def cache_key(paths, target, valid_days):
+    spec = {"data": fingerprint(paths), "target": target, "valid_days": valid_days, "dataset": DATASET_PARAMS,
+            "lightgbm": lgb.__version__, "format": CACHE_FORMAT}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:24]
+
+
+# Training data for a full retrain: LightGBM binary Datasets, plus the fitted encoder and
+# scaler written to encoder_file and scaler_file. Everything is cached by the content of the
+# input files; a hit skips reading, encoding and binning the orders and copies the cached
+# pickles byte for byte, so the published version keeps the same fingerprint.
+def full_datasets(paths, target, valid_days, cache_dir, encoder_file, scaler_file):
+    entry = os.path.join(cache_dir, cache_key(paths, target, valid_days)) if cache_dir else None
+    if entry and os.path.exists(os.path.join(entry, "meta.json")):
+        with open(os.path.join(entry, "meta.json")) as f:
+            meta = json.load(f)
+        shutil.copyfile(os.path.join(entry, ENCODER_FILE), encoder_file)
+        shutil.copyfile(os.path.join(entry, SCALER_FILE), scaler_file)
+        train = lgb.Dataset(os.path.join(entry, "train.bin"), params=DATASET_PARAMS)
+        valid = (lgb.Dataset(os.path.join(entry, "valid.bin"), reference=train, params=DATASET_PARAMS)
+                 if meta["valid_rows"] else None)
+        return train, valid, {**meta, "dataset_cache": "hit"}
+
+    df = load_orders(paths, target)
+    train_df, valid_df = split_holdout(df, valid_days)
+    encoder, scaler = fit_preprocessing(train_df)
+    joblib.dump(encoder, encoder_file)
+    joblib.dump(scaler, scaler_file)
+    plan = PreprocessPlan.from_artifacts(encoder, scaler, feature_names(encoder))
+    train = build_dataset(plan, train_df, target).construct()
+    valid = build_dataset(plan, valid_df, target, reference=train).construct() if len(valid_df) else None
+    meta = {"rows": len(train_df), "valid_rows": len(valid_df),
+            "first_date": str(train_df['order_date'].min()), "last_date": str(train_df['order_date'].max())}
+    if entry:
+        tmp = f"{entry}.{os.getpid()}.tmp"
+        os.makedirs(tmp)
+        train.save_binary(os.path.join(tmp, "train.bin"))
+        if valid is not None:
+            valid.save_binary(os.path.join(tmp, "valid.bin"))
+        shutil.copyfile(encoder_file, os.path.join(tmp, ENCODER_FILE))
+        shutil.copyfile(scaler_file, os.path.join(tmp, SCALER_FILE))
+        with open(os.path.join(tmp, "meta.json"), 'w') as f:
+            json.dump(meta, f)
+        shutil.rmtree(entry, ignore_errors=True)
+        os.rename(tmp, entry)
+    return train, valid, {**meta, "dataset_cache": "miss" if entry else "disabled"}
+
+
+# Training data for continued training: only orders after `since`, encoded with the base
+# version's encoder and scaler (copied to encoder_file and scaler_file unchanged) in the base
+# booster's feature order. These Datasets are not cached: LightGBM computes the base model's
+# init scores from the raw features, which a Dataset loaded from its binary file no longer has.
+def appended_datasets(paths, target, valid_days, base_files, since, encoder_file, scaler_file):
+    shutil.copyfile(base_files[1], encoder_file)
+    shutil.copyfile(base_files[2], scaler_file)
+    encoder, scaler = joblib.load(base_files[1]), joblib.load(base_files[2])
+    plan = PreprocessPlan.from_artifacts(encoder, scaler, lgb.Booster(model_file=base_files[0]).feature_name())
+    df = load_orders(paths, target)
+    df = df.iloc[int(df['order_date'].searchsorted(pd.Timestamp(since), side='right')):]
+    if df.empty:
+        raise ValueError(f"No orders after {since} to continue training on")
+    train_df, valid_df = split_holdout(df, valid_days)
+    train = build_dataset(plan, train_df, target, free_raw_data=False)
+    valid = build_dataset(plan, valid_df, target, reference=train, free_raw_data=False) if len(valid_df) else None
+    meta = {"rows": len(train_df), "valid_rows": len(valid_df), "since": str(since),
+            "first_date": str(train_df['order_date'].min()), "last_date": str(train_df['order_date'].max()),
+            "dataset_cache": "disabled"}
+    return train, valid, meta
+
+
+def train(paths=(TRAIN_CSV,), target=TARGET, version=None, registry=None, rounds=None, threads=0, seed=0,
+          valid_days=0, early_stopping=0, cache_dir=CACHE_DIR, base_version=None, since=None, params=None):
+    registry = registry or ModelRegistry(os.getenv("SALES_REGISTRY_DIR", REGISTRY_DIR))
+    clock = TrainingClock()
+    base_files = None
+    if base_version is not None:
+        base_files = ARTIFACT_FILES if base_version == LOCAL_VERSION else registry.files(base_version)
+        if since is None:
+            base_report = None if base_version == LOCAL_VERSION else registry.report(base_version)
+            if base_report is None:
+                raise ValueError(f"Version {base_version} has no training report; pass --since")
+            since = base_report["data"]["last_date"]
+
+    version = version or new_version()
+    with tempfile.TemporaryDirectory() as tmp:
+        files = tuple(os.path.join(tmp, name) for name in (MODEL_FILE, ENCODER_FILE, SCALER_FILE))
+        with clock.stage("data"):
+            if base_files is None:
+                train_set, valid_set, data = full_datasets(paths, target, valid_days, cache_dir, *files[1:])
+            else:
+                train_set, valid_set, data = appended_datasets(paths, target, valid_days, base_files, since,
+                                                               *files[1:])
+
+        # all cores; deterministic + force_col_wise make reruns on the same data bit-identical
+        params = {**PARAMS, **(params or {}), "num_threads": threads or os.cpu_count() or 1, "seed": seed,
+                  "deterministic": True, "force_col_wise": True}
+        rounds = rounds or (100 if base_files else 1000)
+        evals = {}
+        callbacks = [lgb.record_evaluation(evals)]
+        if early_stopping and valid_set is not None:
+            callbacks.append(lgb.early_stopping(early_stopping, verbose=False))
+        valid_sets, valid_names = [train_set], ["train"]
+        if valid_set is not None:
+            valid_sets, valid_names = [train_set, valid_set], ["train", "valid"]
+        with clock.stage("train"):
+            booster = lgb.train(params, train_set, num_boost_round=rounds, valid_sets=valid_sets,
+                                valid_names=valid_names, callbacks=callbacks,
+                                init_model=base_files[0] if base_files else None)
+
+        with clock.stage("save"):
+            booster.save_model(files[0], num_iteration=booster.best_iteration or None)
+        metric = params["metric"]
+        report = {
+            "version": version,
+            "mode": "continued" if base_files else "full",
+            "base_version": base_version,
+            "data": {"paths": [os.path.abspath(path) for path in paths], "fingerprint": fingerprint(paths),
+                     "target": target, **data},
+            "params": params,
+            "rounds": rounds,
+            "best_iteration": booster.best_iteration or None,
+            "trees": booster.num_trees(),
+            "metrics": {f"{name}_{metric}": values[metric][(booster.best_iteration or len(values[metric])) - 1]
+                        for name, values in evals.items()},
+            "lightgbm": lgb.__version__,
+            **clock.summary(),
+        }
+        registry.publish(files, version, report=report)
+    return report
+
+
+if __name__ == "__main__":
+    # python -m train [orders.csv ...] [--version v3] [--valid-days 14]
+    # python -m train new_orders.csv --from-version v3 --rounds 50     (continued training)
+    parser = argparse.ArgumentParser(description="Train the sales model and publish it to the model registry")
+    parser.add_argument('paths', nargs='*', default=[TRAIN_CSV], help="order files (CSV, Parquet or Arrow)")
+    parser.add_argument('--target', default=TARGET)
+    parser.add_argument('--version', help="registry version name (default: timestamp)")
+    parser.add_argument('--registry', default=os.getenv("SALES_REGISTRY_DIR", REGISTRY_DIR))
+    parser.add_argument('--rounds', type=int, help="boosting rounds (default 1000, 100 when continuing)")
+    parser.add_argument('--threads', type=int, default=0, help="LightGBM threads (default: all cores)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--valid-days', type=int, default=0, help="hold out the last N days for evaluation")
+    parser.add_argument('--early-stopping', type=int, default=0, help="stop after N rounds without improvement")
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help="binary Dataset cache ('' disables)")
+    parser.add_argument('--from-version', help=f"continue training this registry version ('{LOCAL_VERSION}': "
+                                               "the artifacts in the working directory)")
+    parser.add_argument('--since', help="continue on orders after this date (default: the base version's "
+                                        "last training date)")
+    args = parser.parse_args()
+
+    try:
+        report = train(args.paths, args.target, args.version, ModelRegistry(args.registry), args.rounds,
+                       args.threads, args.seed, args.valid_days, args.early_stopping, args.cache_dir or None,
+                       args.from_version, args.since)
+    except UnknownVersion as e:
+        raise SystemExit(f"error: unknown model version {e.args[0]}")
+    except ValueError as e:
+        raise SystemExit(f"error: {e}")
+    print(f"published {report['version']}: {report['trees']} trees on {report['data']['rows']:,} rows "
+          f"({report['mode']}, dataset cache {report['data']['dataset_cache']})")
+    for name, value in report["metrics"].items():
+        print(f"  {name} {value:.4f}")
+    for name, stage in report["stages"].items():
+        print(f"  {name:<8} {stage['seconds']:>8.2f} s  peak RSS {stage['peak_rss_mb']:>8,.0f} MB")
+    print(f"  {'total':<8} {report['wall_s']:>8.2f} s  peak RSS {report['peak_rss_mb']:>8,.0f} MB")
@@ -0,0 +1,223 @@
+import numpy as np
+
+# LightGBM decision_type bits (see include/LightGBM/tree.h)
+CATEGORICAL_MASK = 1
+DEFAULT_LEFT_MASK = 2
+MISSING_ZERO = 1
+MISSING_NAN = 2
+ZERO_THRESHOLD = 1e-35
+
+ARRAY_FIELDS = ('roots', 'split_feature', 'threshold', 'left_child', 'right_child',
+                'default_left', 'missing_type', 'leaf_value', 'tree_leaf_offset')
+
+# Objectives whose raw score is the prediction (no output transform)
+IDENTITY_OBJECTIVES = {'regression', 'regression_l2', 'regression_l1', 'huber', 'fair', 'quantile', 'mape'}
+
+
+# Parse a LightGBM text model into one dict of key -> raw string per tree
+def _read_model_text(text):
+    header, trees, section = {}, [], None
+    for line in text.splitlines():
+        line = line.strip()
+        if line == 'end of trees':
+            break
+        if not line or '=' not in line:
+            continue
+        key, value = line.split('=', 1)
+        if key == 'Tree':
+            section = {}
+            trees.append(section)
+        elif section is None:
+            header[key] = value
+        else:
+            section[key] = value
+    return header, trees
+
+
+def _floats(value):
+    return np.array(value.split(), dtype=np.float64)
+
+
+def _ints(value):
+    return np.array(value.split(), dtype=np.int64)
+
+
+# Numpy tree-evaluation tables for a LightGBM text model.
+# The model is stored as flat node arrays (child links are global node indices, leaves are
+# ~leaf_index). For evaluation every tree is padded to a complete binary tree of the model's
+# max depth: per level, a (trees x 2**level) table of split feature and threshold, and a
+# (trees x 2**max_depth) leaf table in which a leaf above the last level fills all of its
+# descendant slots. A batch then takes exactly max_depth gather steps over a (rows x trees)
+# matrix of heap positions, with no per-level compaction.
+# tree_outputs() returns every tree's output per row; tier curves sum its prefixes.
+class CompiledForest:
+    def __init__(self, feature_names, roots, split_feature, threshold, left_child, right_child,
+                 default_left, missing_type, leaf_value, tree_leaf_offset):
+        self.feature_names = list(feature_names)
+        self.roots = roots
+        self.split_feature = split_feature
+        self.threshold = threshold
+        self.left_child = left_child
+        self.right_child = right_child
+        self.default_left = default_left
+        self.missing_type = missing_type
+        self.leaf_value = leaf_value
+        self.tree_leaf_offset = tree_leaf_offset
+        self.has_missing = bool((missing_type != 0).any())
+        self._build_levels()
+
+    # Padded per-level tables, built level by level for all trees at once
+    def _build_levels(self):
+        n_trees = len(self.roots)
+        tree = np.arange(n_trees, dtype=np.intp)
+        node = np.asarray(self.roots, dtype=np.int64)
+        pos = np.zeros(n_trees, dtype=np.intp)
+        levels = []
+        while True:
+            internal = node >= 0
+            levels.append((tree, pos, node))
+            if not internal.any():
+                break
+            tree, pos, node = (np.concatenate([tree[internal]] * 2),
+                               np.concatenate([2 * pos[internal], 2 * pos[internal] + 1]),
+                               np.concatenate([self.left_child[node[internal]], self.right_child[node[internal]]]))
+        self.max_depth = len(levels) - 1
+        self.level_feature, self.level_threshold, self.level_missing, self.level_default_left = [], [], [], []
+        leaves = np.zeros((n_trees, 2 ** self.max_depth))
+        for depth, (tree, pos, node) in enumerate(levels):
+            width = 2 ** depth
+            internal = node >= 0
+            if depth < self.max_depth:
+                # padding below a leaf: any split works, every slot it reaches holds that leaf
+                feature, threshold = np.zeros((n_trees, width), np.intp), np.full((n_trees, width), np.inf)
+                missing, default_left = np.zeros((n_trees, width), np.int8), np.ones((n_trees, width), bool)
+                t, p, n = tree[internal], pos[internal], node[internal]
+                feature[t, p], threshold[t, p] = self.split_feature[n], self.threshold[n]
+                missing[t, p], default_left[t, p] = self.missing_type[n], self.default_left[n]
+                self.level_feature.append(feature.ravel())
+                self.level_threshold.append(threshold.ravel())
+                self.level_missing.append(missing.ravel())
+                self.level_default_left.append(default_left.ravel())
+            span = 2 ** (self.max_depth - depth)
+            t, p, n = tree[~internal], pos[~internal], node[~internal]
+            slots = (p * span)[:, None] + np.arange(span)
+            leaves[t[:, None], slots] = self.leaf_value[~n][:, None]
+        self.level_leaf = leaves.ravel()
+        # start of each tree's row in the level tables
+        self.level_base = [np.arange(n_trees, dtype=np.intp) * 2 ** depth for depth in range(self.max_depth + 1)]
+
+    @classmethod
+    def from_model_file(cls, path):
+        with open(path) as f:
+            return cls.from_model_string(f.read())
+
+    @classmethod
+    def from_model_string(cls, text):
+        header, trees = _read_model_text(text)
+        objective = header.get('objective', 'regression').split()[0]
+        if objective not in IDENTITY_OBJECTIVES:
+            raise ValueError(f"Unsupported objective for compiled engine: {objective}")
+        if int(header.get('num_tree_per_iteration', 1)) != 1:
+            raise ValueError("Compiled engine only supports single-output models")
+
+        roots, features, thresholds, lefts, rights, decisions, leaves, leaf_offsets = [], [], [], [], [], [], [], []
+        n_nodes = n_leaves = 0
+        for tree in trees:
+            if int(tree.get('num_cat', 0)) > 0:
+                raise ValueError("Compiled engine does not support categorical splits")
+            if int(tree.get('is_linear', 0)):
+                raise ValueError("Compiled engine does not support linear trees")
+            leaf_value = _floats(tree['leaf_value'])
+            leaf_offsets.append(n_leaves)
+            leaves.append(leaf_value)
+            if int(tree['num_leaves']) == 1:
+                roots.append(~n_leaves)
+            else:
+                left = _ints(tree['left_child'])
+                right = _ints(tree['right_child'])
+                # Internal children -> global node index, leaf children (~i) -> ~(global leaf index)
+                lefts.append(np.where(left >= 0, left + n_nodes, left - n_leaves))
+                rights.append(np.where(right >= 0, right + n_nodes, right - n_leaves))
+                features.append(_ints(tree['split_feature']))
+                thresholds.append(_floats(tree['threshold']))
+                decisions.append(_ints(tree['decision_type']))
+                roots.append(n_nodes)
+                n_nodes += len(left)
+            n_leaves += len(leaf_value)
+
+        decision = np.concatenate(decisions) if decisions else np.zeros(0, dtype=np.int64)
+        if (decision & CATEGORICAL_MASK).any():
+            raise ValueError("Compiled engine does not support categorical splits")
+        cat = lambda parts, dtype: np.concatenate(parts).astype(dtype) if parts else np.zeros(0, dtype=dtype)
+        return cls(
+            feature_names=header.get('feature_names', '').split(),
+            roots=np.array(roots, dtype=np.int32),
+            split_feature=cat(features, np.intp),
+            threshold=cat(thresholds, np.float64),
+            left_child=cat(lefts, np.int32),
+            right_child=cat(rights, np.int32),
+            default_left=(decision & DEFAULT_LEFT_MASK).astype(bool),
+            missing_type=((decision >> 2) & 3).astype(np.int8),
+            leaf_value=np.concatenate(leaves),
+            tree_leaf_offset=np.array(leaf_offsets, dtype=np.int64),
+        )
+
+    # Flat tables, e.g. for saving to / loading from the model bundle
+    def arrays(self):
+        return {name: getattr(self, name) for name in ARRAY_FIELDS}
+
+    @classmethod
+    def from_arrays(cls, feature_names, arrays):
+        return cls(feature_names, **{name: arrays[name] for name in ARRAY_FIELDS})
+
+    def num_trees(self):
+        return len(self.roots)
+
+    def feature_name(self):
+        return self.feature_names
+
+    # Output of every tree for every row, (rows x trees). Row sums are the Booster's raw
+    # prediction; cumulative sums along the trees are the predictions of every tree prefix.
+    # Large batches are split so the (rows x trees) working arrays stay near chunk_cells.
+    def tree_outputs(self, X, chunk_cells=4_000_000):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(self.feature_names):
+            raise ValueError(f"Expected a 2D array with {len(self.feature_names)} features, got shape {X.shape}")
+        step = max(1, chunk_cells // max(1, len(self.roots)))
+        if len(X) <= step:
+            return self._leaf_values(X)
+        return np.vstack([self._leaf_values(X[start:start + step]) for start in range(0, len(X), step)])
+
+    def _leaf_values(self, X):
+        n_rows, n_features = X.shape
+        X = np.ascontiguousarray(X)
+        flat = X.ravel()
+        check_missing = self.has_missing or np.isnan(flat).any()
+        row_offset = np.arange(0, n_rows * n_features, n_features, dtype=np.intp)[:, None]
+        pos = np.zeros((n_rows, len(self.roots)), dtype=np.intp)
+        index = np.empty_like(pos)
+        for depth in range(self.max_depth):
+            np.add(pos, self.level_base[depth], out=index)
+            feature = self.level_feature[depth].take(index)
+            feature += row_offset
+            value = flat.take(feature)
+            threshold = self.level_threshold[depth].take(index)
+            go_right = value > threshold
+            if check_missing:
+                go_right = ~self._route_missing(value, threshold, self.level_missing[depth].take(index),
+                                                self.level_default_left[depth].take(index), ~go_right)
+            pos <<= 1
+            pos += go_right
+        np.add(pos, self.level_base[self.max_depth], out=index)
+        return self.level_leaf.take(index)
+
+    # Mirrors Tree::NumericalDecision for missing_type Zero / NaN
+    @staticmethod
+    def _route_missing(value, threshold, missing_type, default_left, go_left):
+        is_nan = np.isnan(value)
+        # NaN is treated as 0 unless the split has a dedicated NaN branch
+        value = np.where(is_nan & (missing_type != MISSING_NAN), 0.0, value)
+        go_left = np.where(is_nan & (missing_type != MISSING_NAN), 0.0 <= threshold, go_left)
+        missing = ((missing_type == MISSING_ZERO) & (np.abs(value) <= ZERO_THRESHOLD)) | \
+                  ((missing_type == MISSING_NAN) & is_nan)
+        return np.where(missing, default_left, go_left)
@@ -0,0 +1,206 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow is optional; Arrow bodies are then rejected with 415
+    pa = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; MessagePack bodies are then rejected with 415
+    msgpack = None
+
+# Field types of SalesInput, checked column by column instead of per row
+FIELD_TYPES = {
+    'unit_price': float, 'quantity': int, 'age': int, 'discount': float, 'customer_rating': float,
+    'stock': int, 'category_id': int, 'category_avg_price': float, 'category_total_revenue': float,
+    'category_popularity': int, 'year': int, 'month': int, 'day': int, 'weekday': int,
+    'color': str, 'size': str, 'category': str, 'holiday_type': str,
+}
+# Fields the service fills from its category feature store when absent or null
+OPTIONAL_FIELDS = ('category_avg_price', 'category_total_revenue', 'category_popularity')
+
+JSON = "application/json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+ARROW_FILE = "application/vnd.apache.arrow.file"
+MSGPACK = "application/msgpack"
+OCTET_STREAM = "application/octet-stream"
+MEDIA_ALIASES = {"application/x-msgpack": MSGPACK, "application/vnd.msgpack": MSGPACK}
+REQUEST_TYPES = (JSON, ARROW_STREAM, ARROW_FILE, MSGPACK)
+RESPONSE_TYPES = (JSON, ARROW_STREAM, MSGPACK, OCTET_STREAM)
+# Row indices reported per invalid field
+MAX_REPORTED_ROWS = 10
+
+
+class UnsupportedMediaType(ValueError):
+    pass
+
+
+# The Accept header asks for an encoding whose package is not installed
+class NotAcceptable(UnsupportedMediaType):
+    pass
+
+
+class MalformedBody(ValueError):
+    pass
+
+
+# Column validation failures, in FastAPI's 422 `detail` layout plus the offending rows
+class SchemaError(ValueError):
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} invalid field(s)")
+        self.errors = errors
+
+
+def media_type(header):
+    value = (header or "").split(";")[0].strip().lower()
+    return MEDIA_ALIASES.get(value, value)
+
+
+# Response type from an Accept header: the first supported entry, JSON by default
+def negotiate(accept):
+    for entry in (accept or "").split(","):
+        value = media_type(entry)
+        if value in RESPONSE_TYPES:
+            return value
+    return JSON
+
+
+def _require(module, package, error=UnsupportedMediaType):
+    if module is None:
+        raise error(f"This encoding requires the {package} package")
+
+
+# Request body -> {field: column}. Columnar JSON and MessagePack are maps of field -> array;
+# Arrow IPC is a table with one column per field.
+def decode(body, content_type):
+    kind = media_type(content_type)
+    if kind not in REQUEST_TYPES:
+        raise UnsupportedMediaType(f"Content-Type must be one of {list(REQUEST_TYPES)}")
+    if kind == MSGPACK:
+        _require(msgpack, "msgpack")
+    elif kind != JSON:
+        _require(pa, "pyarrow")
+    try:
+        if kind == JSON:
+            columns = json.loads(body)
+        elif kind == MSGPACK:
+            columns = msgpack.unpackb(body, raw=False)
+        else:
+            reader = pa.ipc.open_stream(body) if kind == ARROW_STREAM else pa.ipc.open_file(body)
+            table = reader.read_all()
+            return {name: table.column(name) for name in table.column_names}
+    except ValueError as e:  # JSONDecodeError, ArrowInvalid and msgpack's unpack errors
+        raise MalformedBody(f"Could not decode {kind} body: {e}") from e
+    if not isinstance(columns, dict):
+        raise SchemaError([{"loc": ["body"], "msg": "expected an object of field -> array", "type": "type_error"}])
+    return columns
+
+
+def _error(field, msg, kind, rows=None):
+    error = {"loc": ["body", field], "msg": msg, "type": kind}
+    if rows is not None:
+        error["rows"] = np.flatnonzero(rows)[:MAX_REPORTED_ROWS].tolist()
+    return error
+
+
+# Arrow string or large_string type
+def _is_arrow_string(arrow_type):
+    return pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type)
+
+
+# One column -> (numpy array, error or None). Arrow columns are checked on their type and
+# null count; lists go through pandas' C type inference and only fall back to a per-value
+# scan to locate bad rows. Nulls in optional fields become NaN.
+def _column(field, values, kind):
+    optional = field in OPTIONAL_FIELDS
+    if pa is not None and isinstance(values, pa.ChunkedArray):
+        if values.null_count and not optional:
+            return None, _error(field, "null values", "missing", values.is_null().to_numpy(zero_copy_only=False))
+        if kind is str and pa.types.is_dictionary(values.type) and _is_arrow_string(values.type.value_type):
+            # pandas categoricals arrive dictionary-encoded; keep them categorical for the plan
+            return values.to_pandas().array, None
+        if kind is str and not _is_arrow_string(values.type):
+            return None, _error(field, f"expected string column, got {values.type}", "string_type")
+        if kind is not str and not (pa.types.is_integer(values.type) or pa.types.is_floating(values.type)
+                                    or (optional and pa.types.is_null(values.type))):
+            return None, _error(field, f"expected numeric column, got {values.type}", "type_error")
+        values = values.to_numpy(zero_copy_only=False)
+
+    inferred = pd.api.types.infer_dtype(values, skipna=False)
+    if kind is str:
+        if inferred not in ('string', 'empty'):
+            bad = np.array([not isinstance(v, str) for v in values], dtype=bool)
+            return None, _error(field, "expected strings", "string_type", bad)
+        return np.asarray(values, dtype=object), None
+
+    if inferred in ('integer', 'floating', 'mixed-integer-float'):
+        array = np.asarray(values, dtype=np.float64)
+    else:
+        # lax like pydantic: numeric strings are accepted, nulls and other values are not
+        array = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+        accepted = (lambda v: isinstance(v, float) or v is None) if optional else (lambda v: isinstance(v, float))
+        bad = np.isnan(array) & ~pd.Series(values, dtype=object).map(accepted).to_numpy()
+        if bad.any():
+            return None, _error(field, "expected numbers", "float_parsing" if kind is float else "int_parsing", bad)
+    if kind is int:
+        fractional = array != np.floor(array)
+        if optional:
+            fractional &= ~np.isnan(array)
+        if fractional.any():
+            return None, _error(field, "expected integers", "int_from_float", fractional)
+        return array if optional else array.astype(np.int64), None
+    return array, None
+
+
+def _is_array(values):
+    return isinstance(values, (list, np.ndarray)) or (pa is not None and isinstance(values, pa.ChunkedArray))
+
+
+# {field: column} -> DataFrame with SalesInput's fields (optional ones only when sent), or
+# SchemaError listing every bad field
+def validate(columns):
+    errors = [_error(field, "Field required", "missing")
+              for field in FIELD_TYPES if field not in columns and field not in OPTIONAL_FIELDS]
+    errors += [_error(field, "expected an array", "list_type")
+               for field in FIELD_TYPES if field in columns and not _is_array(columns[field])]
+    lengths = {field: len(columns[field]) for field in FIELD_TYPES if field in columns and _is_array(columns[field])}
+    if len(set(lengths.values())) > 1:
+        errors.append({"loc": ["body"], "msg": f"columns have different lengths: {lengths}", "type": "value_error"})
+    if errors:
+        raise SchemaError(errors)
+    frame = {}
+    for field, kind in FIELD_TYPES.items():
+        if field not in columns:
+            continue
+        array, error = _column(field, columns[field], kind)
+        if error is not None:
+            errors.append(error)
+        else:
+            frame[field] = array
+    if errors:
+        raise SchemaError(errors)
+    return pd.DataFrame(frame, copy=False)
+
+
+# Predictions -> (body bytes, media type)
+def encode(prediction, kind):
+    prediction = np.ascontiguousarray(prediction, dtype='<f8')
+    if kind == OCTET_STREAM:
+        return prediction.tobytes(), kind
+    if kind == MSGPACK:
+        _require(msgpack, "msgpack", NotAcceptable)
+        return msgpack.packb({"predictions": prediction.tobytes(), "dtype": "<f8",
+                              "records": len(prediction)}), kind
+    if kind == ARROW_STREAM:
+        _require(pa, "pyarrow", NotAcceptable)
+        table = pa.table({"prediction": prediction})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes(), kind
+    body = json.dumps({"status": "success", "predictions": prediction.tolist(), "records": len(prediction)})
+    return body.encode(), JSON